@@ -1,2 +1,61 @@
-from .avm import exe_path, installation_path, all_versions, default_version, latest_version, registered_applications
-from .entry_points import list_applications
+"""
+Interact with DNV GL Software's Application Version Manager
+
+The public functions and classes are imported on first use, so that `import avm` is fast and the XML machinery is only
+loaded when an XML file is actually parsed.
+"""
+import importlib
+
+# public names and the modules they are defined in
+_exports = dict(
+    exe_path='avm',
+    installation_path='avm',
+    all_versions='avm',
+    default_version='avm',
+    latest_version='avm',
+    select_version='avm',
+    registered_applications='avm',
+    invalidate='avm',
+    resolve_many='avm',
+    iter_versions='avm',
+    configure_registry_cache='avm',
+    registry_cache_info='avm',
+    pin='avm',
+    unpin='avm',
+    configure_path_cache='avm',
+    path_cache_info='avm',
+    VersionRecord='records',
+    Application='records',
+    Resolution='records',
+    Specifier='specifiers',
+    InvalidSpecifier='specifiers',
+    UnsatisfiableSpecifier='specifiers',
+    Registry='registry',
+    RegistryDiff='registry',
+    Store='store',
+    check_installations='health',
+    Finding='health',
+    list_applications='entry_points',
+)
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    module = _exports.get(name)
+    if module is None:
+        # submodules, e.g. `avm.entry_points`, as when they were imported by the package
+        try:
+            return importlib.import_module(f'.{name}', __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f'{__name__}.{name}':
+                raise
+            raise AttributeError(f"module '{__name__}' has no attribute '{name}'") from None
+
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+"""
+Asyncio interface to Application Version Manager
+
+The coroutines mirror the functions of the same name in `avm`, without blocking the event loop: locating, stat-ing and
+parsing the XML file and checking paths run on a thread pool shared by all event loops, which bounds the number of
+concurrent blocking operations (see `configure`). Concurrent awaits loading the same XML file are coalesced into a
+single load, and the parsed registry is kept in the same cache as the synchronous functions use.
+
+>>> import asyncio
+>>> from avm import aio
+>>> paths = asyncio.run(aio.resolve_many(['wadam', ('simo', '>=4.20')]))
+
+The coroutines are always answered in-process, the resolver daemon is not used.
+"""
+import asyncio
+import logging
+import os
+import threading
+from .avm import (_registry_cache, _appverxml_signature, _load_registry, _exe_path, _installation_path,
+                  _resolve_many)
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# default maximum number of concurrent blocking operations
+MAX_WORKERS = 8
+
+_max_workers = MAX_WORKERS
+_executor = None
+_executor_lock = threading.Lock()
+
+# loads in progress, by event loop and xml file
+_loading = dict()
+
+
+def configure(max_workers=None):
+    """
+    Configure the thread pool running the blocking operations
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of concurrent blocking operations, default `MAX_WORKERS`. Operations already running are not
+        affected.
+    """
+    global _executor, _max_workers
+    with _executor_lock:
+        if max_workers is not None and max_workers != _max_workers:
+            _max_workers = max_workers
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+                _executor = None
+
+
+async def registered_applications(appverxml=None):
+    """
+    Get the applications registered in Application Version Manager, see `avm.registered_applications`
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    data, _ = await _registry(appverxml)
+    return data
+
+
+async def exe_path(appname, version=None, appverxml=None, strict=False):
+    """
+    Return absolute path to DNV GL application executable, see `avm.exe_path`
+
+    Parameters
+    ----------
+    appname : str
+        Application name
+    version : str, optional
+        Application version or version specifier, by default the default version
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied.
+    strict : bool, optional
+        Check the existence of the executable on the file system, bypassing the cache of path checks
+
+    Returns
+    -------
+    str
+        Quoted absolute path to application executable, None if it does not exist
+    """
+    data, source = await _registry(appverxml)
+    return await _run(_exe_path, data.get(appname.lower()), source, appname, version, strict)
+
+
+async def installation_path(appname, version=None, appverxml=None, strict=False):
+    """
+    Return installation path to DNV GL application, see `avm.installation_path`
+
+    Parameters
+    ----------
+    appname : str
+        Application name
+    version : str, optional
+        Application version or version specifier, by default the default version
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied.
+    strict : bool, optional
+        Check the existence of the installation directory on the file system, bypassing the cache of path checks
+
+    Returns
+    -------
+    str
+        Quoted absolute path to installation directory, None if it does not exist
+    """
+    data, source = await _registry(appverxml)
+    return await _run(_installation_path, data.get(appname.lower()), source, appname, version, strict)
+
+
+async def resolve_many(requests, appverxml=None, max_workers=8, strict=False):
+    """
+    Resolve the executables of many application versions in one pass, see `avm.resolve_many`
+
+    Parameters
+    ----------
+    requests : iterable
+        Application names (default version) or (application name, version) pairs
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied.
+    max_workers : int, optional
+        Maximum number of threads checking paths concurrently
+    strict : bool, optional
+        Check the existence of paths on the file system, bypassing the cache of path checks
+
+    Returns
+    -------
+    list
+        `Resolution` per request, in the order of the requests
+    """
+    requests = list(requests)
+    data, source = await _registry(appverxml)
+    return await _run(_resolve_many, data, source, requests, max_workers, strict)
+
+
+def _get_executor():
+    """Thread pool shared by all event loops, created on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='avm-aio')
+        return _executor
+
+
+async def _run(function, *args):
+    """Run a blocking function on the thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), function, *args)
+
+
+def _load(appverxml):
+    """Load the registry of an xml file through the cache of parsed xml files, blocking"""
+    try:
+        source = _appverxml_signature(appverxml)
+    except FileNotFoundError:
+        logger.error("Failed to load application version data", exc_info=True)
+        raise FileNotFoundError("Failed to load application version data")
+
+    return _registry_cache.get(*source, _load_registry), source
+
+
+async def _registry(appverxml=None):
+    """
+    Registry of an xml file, coalescing concurrent loads of the same file in the running event loop
+
+    Returns
+    -------
+    tuple
+        Mapping of application names to applications, and the absolute path to the xml file along with its stat
+        signature
+    """
+    loop = asyncio.get_running_loop()
+    key = (loop, _key(appverxml))
+    task = _loading.get(key)
+    if task is None:
+        task = _loading[key] = loop.create_task(_run(_load, appverxml))
+        task.add_done_callback(lambda _: _loading.pop(key, None))
+
+    # shield the shared load from the cancellation of a single caller
+    return await asyncio.shield(task)
+
+
+def _key(appverxml):
+    """Normalized xml file argument, equal for arguments referring to the same files"""
+    if isinstance(appverxml, (list, tuple)):
+        return tuple(_key(layer) for layer in appverxml)
+    return None if appverxml is None else os.path.abspath(appverxml)
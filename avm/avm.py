@@ -4,15 +4,20 @@ Module for working with DNVGL Application Version Manager
 """
 import logging
 import os
-from xml.dom import minidom
-from xml.parsers.expat import ExpatError
-from collections import OrderedDict
+from . import client, layers, metrics, snapshot, specifiers
+from .cache import RegistryCache, PathCache, file_signature
+from .records import version_key, Resolution
 
 # configure logger
 logger = logging.getLogger(__name__)
 
+# process-wide cache of parsed xml files, memoized location of the xml file in APPDATA and cache of path checks
+_registry_cache = RegistryCache()
+_locations = dict()
+_path_cache = PathCache()
 
-def exe_path(appname, version=None, appverxml=None):
+
+def exe_path(appname, version=None, appverxml=None, strict=False):
     """
     Return absolute path to DNV GL application executable
 
@@ -22,9 +27,14 @@ def exe_path(appname, version=None, appverxml=None):
         Application name
     version : str, optional
         Application version, by default the application marked as default in
-        Application Version Manager is used.
-    appverxml : str, optional
-        XML file listing application-versions. By default the file in APPDATA is applied.
+        Application Version Manager is used. A version specifier, e.g. '>=9.4,<10',
+        selects a version as `select_version` does.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+    strict : bool, optional
+        Check the existence of the executable on the file system, bypassing the cache of path checks. See
+        `configure_path_cache`.
 
     Returns
     -------
@@ -37,63 +47,65 @@ def exe_path(appname, version=None, appverxml=None):
     on your local machine.
 
     """
-    # all registered applications
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('exe_path', appverxml, appname=appname, version=version, strict=strict)
+    if result is not client.UNAVAILABLE:
+        return result
+
+    # get app data
     try:
-        appdata = registered_applications(appverxml=appverxml)
+        app, source = _application(appname, appverxml=appverxml)
     except FileNotFoundError:
         logger.error("Failed to load application version data", exc_info=True)
         raise FileNotFoundError("Failed to load application version data")
 
-    # get app data
-    app = appdata.get(appname.lower())
-    if app is None:
-        logger.warning(f"Application '{appname}' is not registered in Application Version Manager.", exc_info=True)
-        return None
+    return _exe_path(app, source, appname, version=version, strict=strict)
 
-    if version is not None:
-        # requested specific version
-        appversion = app.get(version.lower())
-        if not appversion:
-            logger.warning(f"Version '{version}' of application '{appname}' is not registered in Application "
-                           f"Version Manager.")
-            return None
-        else:
-            if appname.lower() == 'simo':
-                path = os.path.join(appversion.get('installdir'), 'simo', 'bin', 'rsimo.exe')
-            elif appname.lower() == 'riflex':
-                path = os.path.join(appversion.get('installdir'), 'Riflex', 'bin', 'riflex.bat')
-            else:
-                path = appversion.get('exepath')
-            versionnumber = appversion.get('versionnumber')
 
-    else:
-        # use default version
-        path, versionnumber = None, None
-        for _, appversion in app.items():
-            if appversion.get('default'):
-                if appname.lower() == 'simo':
-                    path = os.path.join(appversion.get('installdir'), 'simo', 'bin', 'rsimo.exe')
-                elif appname.lower() == 'riflex':
-                    path = os.path.join(appversion.get('installdir'), 'Riflex', 'bin', 'riflex.bat')
-                else:
-                    path = appversion.get('exepath')
-                versionnumber = appversion.get('versionnumber')
-
-        if path is None:
-            logger.warning(f"There is no default version registered for application '{appname}' in Application "
-                           f"Version Manager.")
-            return None
+def resolve_many(requests, appverxml=None, max_workers=8, strict=False):
+    """
+    Resolve the executables of many application versions in one pass
 
-    # verify that the executable path exists
-    if not os.path.exists(path):
-        logger.warning(
-            f"The executable path '{path}' for application/version {appname}/{versionnumber} does not exist.")
-        return None
-    else:
-        return f'"{path}"'
+    The xml file is parsed (at most) once, identical requests are resolved once, and the existence of executables and
+    installation directories is checked concurrently, which pays off when they are located on network shares.
+
+    Parameters
+    ----------
+    requests : iterable
+        Application names (default version) or (application name, version) pairs. A version of None refers to the
+        default version, and a version specifier, e.g. '>=9.4,<10', selects a version as `select_version` does.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+    max_workers : int, optional
+        Maximum number of threads checking paths concurrently
+    strict : bool, optional
+        Check the existence of paths on the file system, bypassing the cache of path checks. See
+        `configure_path_cache`.
+
+    Returns
+    -------
+    list
+        `Resolution` per request, in the order of the requests. The reason for failure is given per request instead of
+        returning None.
+    """
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    requests = list(requests)
+    result = _ask_daemon('resolve_many', appverxml, requests=requests, max_workers=max_workers, strict=strict)
+    if result is not client.UNAVAILABLE:
+        return result
+
+    try:
+        source = _appverxml_signature(appverxml)
+    except FileNotFoundError:
+        logger.error("Failed to load application version data", exc_info=True)
+        raise FileNotFoundError("Failed to load application version data")
 
+    return _resolve_many(_registry_cache.get(*source, _load_registry), source, requests, max_workers=max_workers,
+                         strict=strict)
 
-def installation_path(appname, version=None, appverxml=None):
+
+def installation_path(appname, version=None, appverxml=None, strict=False):
     """
     Return installation path to DNV GL application
 
@@ -103,9 +115,14 @@ def installation_path(appname, version=None, appverxml=None):
         Application name
     version : str, optional
         Application version, by default the application marked as default in
-        Application Version Manager is used.
-    appverxml : str, optional
-        XML file listing application-versions. By default the file in APPDATA is applied.
+        Application Version Manager is used. A version specifier, e.g. '>=9.4,<10',
+        selects a version as `select_version` does.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+    strict : bool, optional
+        Check the existence of the installation directory on the file system, bypassing the cache of path checks. See
+        `configure_path_cache`.
 
     Returns
     -------
@@ -118,49 +135,19 @@ def installation_path(appname, version=None, appverxml=None):
     on your local machine.
 
     """
-    # all registered applications
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('installation_path', appverxml, appname=appname, version=version, strict=strict)
+    if result is not client.UNAVAILABLE:
+        return result
+
+    # get app data
     try:
-        appdata = registered_applications(appverxml=appverxml)
+        app, source = _application(appname, appverxml=appverxml)
     except FileNotFoundError:
         logger.error("Failed to load application version data", exc_info=True)
         raise FileNotFoundError("Failed to load application version data")
 
-    # get app data
-    app = appdata.get(appname.lower())
-    if app is None:
-        logger.warning(f"Application '{appname}' is not registered in Application Version Manager.", exc_info=True)
-        return None
-
-    if version is not None:
-        # requested specific version
-        appversion = app.get(version.lower())
-        if appversion is None:
-            logger.warning(f"Version '{version}' of application '{appname}' is not registered in Application "
-                           f"Version Manager.")
-            return None
-        else:
-            path = appversion.get('installdir')
-            versionnumber = appversion.get('versionnumber')
-
-    else:
-        # use default version
-        path, versionnumber = None, None
-        for _, appversion in app.items():
-            if appversion.get('default'):
-                path = appversion.get('installdir')
-                versionnumber = appversion.get('versionnumber')
-
-        if path is None:
-            logger.warning(f"There is no default version registered for application '{appname}' in Application "
-                           f"Version Manager.")
-            return None
-
-    # verify that the executable path exists
-    if not os.path.exists(path):
-        logger.warning(f"The path '{path}' for application/version {appname}/{versionnumber} does not exist.")
-        return None
-    else:
-        return f'"{path}"'
+    return _installation_path(app, source, appname, version=version, strict=strict)
 
 
 def default_version(appname, appverxml=None):
@@ -171,34 +158,33 @@ def default_version(appname, appverxml=None):
     ----------
     appname : str
         Application name
-    appverxml : str, optional
-        XML file listing application-versions. By default the file in APPDATA is applied.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
 
     Returns
     -------
     str : f"{major}.{minor}.{patch}"
         Default version of the application
     """
-    # all registered applications
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('default_version', appverxml, appname=appname)
+    if result is not client.UNAVAILABLE:
+        return result
+
+    # get app data
     try:
-        appdata = registered_applications(appverxml=appverxml)
+        app, _ = _application(appname, appverxml=appverxml)
     except FileNotFoundError:
         logger.error("Failed to load application version data", exc_info=True)
         raise FileNotFoundError("Failed to load application version data")
 
-    # get app data
-    app = appdata.get(appname.lower())
     if app is None:
         logger.warning(f"Application '{appname}' is not registered in Application Version Manager.", exc_info=True)
         return None
 
     # use default version
-    versionnumber = None
-    for _, appversion in app.items():
-        if appversion.get('default'):
-            versionnumber = appversion.get('versionnumber')
-
-    return versionnumber
+    return None if app.default is None else app.default.versionnumber
 
 
 def all_versions(appname, appverxml=None):
@@ -209,23 +195,29 @@ def all_versions(appname, appverxml=None):
     ----------
     appname : str
         Application name
-    appverxml : str, optional
-        XML file listing application-versions. By default the file in APPDATA is applied.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
 
     Returns
     -------
-    OrderedDict
-        Registered applications and versions
+    Application
+        Read-only mapping of version numbers to version records of the application
     """
-    # all registered applications
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('all_versions', appverxml, appname=appname)
+    if result is not client.UNAVAILABLE:
+        source, app = result
+        _registry_cache.put_application(*source, appname.lower(), app)
+        return app
+
+    # get app data
     try:
-        appdata = registered_applications(appverxml=appverxml)
+        app, _ = _application(appname, appverxml=appverxml)
     except FileNotFoundError:
         logger.error("Failed to load application version data", exc_info=True)
         raise FileNotFoundError("Failed to load application version data")
 
-    # get app data
-    app = appdata.get(appname.lower())
     if app is None:
         logger.warning(f"Application '{appname}' is not registered in Application Version Manager.", exc_info=True)
         return None
@@ -243,148 +235,823 @@ def latest_version(appname, below=None, appverxml=None):
         Application name
     below : str, optional, f"{major}[.{minor}[.{patch}]]"
         Version below which to return the latest version, by default the latest installed version is returned.
-    appverxml : str, optional
-        XML file listing application-versions. By default the file in APPDATA is applied.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
 
     Returns
     -------
     str : f"{major}.{minor}.{patch}"
         Latest available version of the application, optionally below a certain version
+
+    Notes
+    -----
+    Versions are compared numerically using the version index of the application, see `Application.latest`. Versions
+    with non-numeric parts, e.g. '6.2-08', are not considered.
     """
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('latest_version', appverxml, appname=appname, below=below)
+    if result is not client.UNAVAILABLE:
+        return result
 
-    if below is None:
-        below_major = None
-        below_minor = None
-        below_patch = None
-    else:
-        below_txt = below.split('.')
-        if len(below_txt) == 1:
-            below_major = int(below_txt[0])
-            below_minor = None
-            below_patch = None
-        elif len(below_txt) == 2:
-            below_major = int(below_txt[0])
-            below_minor = int(below_txt[1])
-            below_patch = None
-        elif len(below_txt) == 3:
-            below_major = int(below_txt[0])
-            below_minor = int(below_txt[1])
-            below_patch = int(below_txt[2])
-        else:
-            raise ValueError(f'Incorrect version definition used: below={below}')
+    below_key = _below_key(below)
+    app = all_versions(appname, appverxml)
+    return _latest_version(app, appname, below, below_key)
 
-    candidate = None
 
-    for version, _ in all_versions(appname, appverxml).items():
-        version_major, version_minor, version_patch = map(int, version.split('.'))
+def select_version(appname, specifier, appverxml=None):
+    """
+    Select the version of an application satisfying a version specifier
 
-        if not below_major or (
-                version_major < below_major) or (
-                version_major == below_major and below_minor and
-                version_major == below_major and version_minor < below_minor) or (
-                version_major == below_major and version_minor == below_minor and below_patch and
-                version_major == below_major and version_minor == below_minor and version_patch < below_patch
-        ):
+    Parameters
+    ----------
+    appname : str
+        Application name
+    specifier : str
+        Version specifier, e.g. '>=9.4,<10', '~=4.20' or 'default,>=6.3'. See `avm.specifiers` for the syntax.
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
 
-            if not candidate:
-                candidate = version
-            else:
-                candidate_major, candidate_minor, candidate_patch = map(int, candidate.split('.'))
-                if candidate_major > version_major:
-                    candidate = version
-                    continue
-                elif candidate_major == version_major and candidate_minor < version_minor:
-                    candidate = version
-                    continue
-                elif candidate_major == version_major and candidate_minor == version_minor and (
-                        candidate_patch < version_patch):
-                    candidate = version
-                    continue
-                else:
-                    continue
-
-    if not candidate:
-        raise ValueError(f'No {appname} version below {below} found')
-    else:
-        return candidate
+    Returns
+    -------
+    str
+        Latest version satisfying the specifier, or the default version if the specifier prefers it and it satisfies
+        the specifier
+
+    Raises
+    ------
+    InvalidSpecifier
+        If the specifier can not be parsed
+    UnsatisfiableSpecifier
+        If no registered version satisfies the specifier, listing the registered versions
+
+    Notes
+    -----
+    Specifiers are parsed once per process and evaluated by bisection of the version index of the application. Version
+    specifiers are accepted as `version` by `exe_path`, `installation_path` and `resolve_many` as well.
+    """
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('select_version', appverxml, appname=appname, specifier=specifier)
+    if result is not client.UNAVAILABLE:
+        return result
+
+    return _select_version(all_versions(appname, appverxml), appname, specifier).versionnumber
 
 
 def registered_applications(appverxml=None):
     """
     Get all applications registered in Application Version Manager
 
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+
+    Notes
+    -----
+    The parsed registry is cached for the lifetime of the process and the XML file is only parsed again when its
+    stat signature (modification time, size and inode) changes, or after `invalidate` is called. The registry is
+    read-only, so it is shared between callers without copying. If snapshots are enabled, see `avm.snapshot`, new
+    processes load the registry from a snapshot instead of parsing the XML file.
+    """
+    # ask the resolver daemon, if it is running and the registry is not cached in-process
+    result = _ask_daemon('registered_applications', appverxml)
+    if result is not client.UNAVAILABLE:
+        source, data = result
+        _registry_cache.put(*source, data)
+        return data
+
+    appverxml, signature = _appverxml_signature(appverxml)
+    return _registry_cache.get(appverxml, signature, _load_registry)
+
+
+def iter_versions(appverxml=None, appnames=None, category=None, platform=None, default_only=False):
+    """
+    Stream the application versions registered in Application Version Manager, as the XML file is parsed
+
+    Filters are applied while parsing, so versions that are filtered out are never collected. Unlike
+    `registered_applications` nothing is cached, and memory use does not depend on the size of the XML file.
+
     Parameters
     ----------
     appverxml : str, optional
         XML file listing application-versions. By default the file in APPDATA is applied.
+    appnames : iterable, optional
+        Only list versions of these applications. By default all applications are listed.
+    category : str, optional
+        Only list versions in this category, e.g. 'Sesam' (case-insensitive)
+    platform : str, optional
+        Only list versions for this platform, e.g. '64' (case-insensitive)
+    default_only : bool, optional
+        Only list versions marked as default
 
     Returns
     -------
-    OrderedDict
-        Registered applications and versions
+    generator
+        Application name (lowercase) and version record (VersionRecord) of each version, in the order they are listed
+
+    Notes
+    -----
+    The XML file is located before this function returns, so a missing file is reported immediately, while parse
+    errors are raised by the generator. The streaming parser is always used, regardless of the selected parser backend.
+    """
+    try:
+        path, _ = _appverxml_signature(appverxml)
+    except FileNotFoundError:
+        logger.error("Failed to load application version data", exc_info=True)
+        raise FileNotFoundError("Failed to load application version data")
+
+    appnames = None if appnames is None else set(appname.lower() for appname in appnames)
+    filters = []
+    if category is not None:
+        filters.append(lambda record: record.category.lower() == category.lower())
+    if platform is not None:
+        filters.append(lambda record: record.platform.lower() == platform.lower())
+    if default_only:
+        filters.append(lambda record: record.default)
+
+    def select(appname, record):
+        return all(f(record) for f in filters)
+
+    return _stream_versions(path, appnames, select if filters else None)
+
+
+def invalidate(appverxml=None):
+    """
+    Drop cached application version data, forcing the XML file to be parsed again on next use
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions, or a sequence of layered XML files. Layered registries including a
+        dropped file are dropped too. By default all cached files are dropped, along with the memoized location of the
+        file in APPDATA and the cached path checks.
     """
-    # Try to locate the ApplicationVersions.xml in appdata, if it is not specified
     if appverxml is None:
-        if os.getenv('appdata'):
-            if os.path.exists(
-                    os.path.join(os.getenv('appdata'), 'DNVGL', 'ApplicationVersionManager',
-                                 'ApplicationVersions.xml')
-            ):
-                appverxml = os.path.join(os.getenv('appdata'), 'DNVGL', 'ApplicationVersionManager',
-                                         'ApplicationVersions.xml')
-
-            elif os.path.exists(
-                    os.path.join(os.getenv('appdata'), 'DNV', 'ApplicationVersionManager',
-                                 'ApplicationVersions.xml')
-            ):
-                appverxml = os.path.join(os.getenv('appdata'), 'DNV', 'ApplicationVersionManager',
-                                         'ApplicationVersions.xml')
+        _locations.clear()
+        _registry_cache.invalidate()
+        _path_cache.clear()
+    elif isinstance(appverxml, (list, tuple)):
+        for layer in appverxml:
+            invalidate(layer)
+    else:
+        _registry_cache.invalidate(os.path.abspath(appverxml))
+
+
+def configure_registry_cache(maxsize=None, max_bytes=None, enabled=None):
+    """
+    Configure the cache of parsed XML files used by all lookups
+
+    The cache holds the registries of any number of XML files by default, e.g. one per user of a service resolving on
+    their behalf. Bound it to evict the least recently used registries first. Settings that are not specified are
+    kept, pass 0 to remove a bound.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached XML files
+    max_bytes : int, optional
+        Maximum estimated memory footprint of the cached registries, in bytes
+    enabled : bool, optional
+        Cache registries. If disabled every lookup parses the XML file.
+    """
+    _registry_cache.configure(maxsize=maxsize, max_bytes=max_bytes, enabled=enabled)
+
+
+def registry_cache_info():
+    """
+    Statistics of the cache of parsed XML files
+
+    Returns
+    -------
+    RegistryCacheInfo
+        Number of hits, misses and evictions, the current and maximum number of cached files, their current and maximum
+        estimated memory footprint, and the number of pinned files
+    """
+    return _registry_cache.info()
+
+
+def pin(appverxml=None):
+    """
+    Keep the registry of an XML file in the cache of parsed XML files, it is never evicted
+
+    The registry is still reloaded when the XML file changes, and dropped by `invalidate`.
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions, or a sequence of layered XML files. By default the file in APPDATA is
+        applied.
+    """
+    _registry_cache.pin(_cache_key(appverxml))
+
+
+def unpin(appverxml=None):
+    """
+    Allow the registry of an XML file to be evicted from the cache of parsed XML files again, see `pin`
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions, or a sequence of layered XML files. By default the file in APPDATA is
+        applied.
+    """
+    _registry_cache.unpin(_cache_key(appverxml))
+
+
+def configure_path_cache(maxsize=None, ttl=None, negative_ttl=None, enabled=None):
+    """
+    Configure the cache of path checks done by `exe_path`, `installation_path` and `resolve_many`
+
+    Results are cached per application version, xml file and stat signature of the xml file. Settings that are not
+    specified are kept.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached results, the least recently used result is evicted first. Default 1024.
+    ttl : float, optional
+        Seconds to cache that a path exists. Default 60 seconds.
+    negative_ttl : float, optional
+        Seconds to cache that a path does not exist. Default 10 seconds.
+    enabled : bool, optional
+        Cache results. Pass `strict=True` to bypass the cache for a single call instead.
+    """
+    _path_cache.configure(maxsize=maxsize, ttl=ttl, negative_ttl=negative_ttl, enabled=enabled)
+
+
+def path_cache_info():
+    """
+    Statistics of the cache of path checks
+
+    Returns
+    -------
+    PathCacheInfo
+        Number of hits, misses and evictions, and the current and maximum size of the cache
+    """
+    return _path_cache.info()
+
+
+def _version(app, appname, version=None):
+    """
+    Requested or default version of an application, logging why it is missing
+
+    Parameters
+    ----------
+    app : Application or None
+        Application, None if it is not registered
+    appname : str
+        Application name
+    version : str, optional
+        Application version, by default the default version
+
+    Returns
+    -------
+    VersionRecord or None
+        Application version, None if the application or version is not registered
+    """
+    if app is None:
+        logger.warning(f"Application '{appname}' is not registered in Application Version Manager.", exc_info=True)
+        return None
+
+    if version is not None and specifiers.is_specifier(version):
+        # requested version satisfying a specifier
+        try:
+            return _select_version(app, appname, version)
+        except specifiers.UnsatisfiableSpecifier as e:
+            logger.warning(str(e))
+            return None
+
+    if version is not None:
+        # requested specific version
+        appversion = app.get(version.lower())
+        if appversion is None:
+            logger.warning(f"Version '{version}' of application '{appname}' is not registered in Application "
+                           f"Version Manager.")
+        return appversion
+
+    # use default version
+    appversion = app.default
+    if appversion is None:
+        logger.warning(f"There is no default version registered for application '{appname}' in Application "
+                       f"Version Manager.")
+    return appversion
+
+
+def _exe_path(app, source, appname, version=None, strict=False):
+    """
+    Quoted path to the executable of an application version if it exists, see `exe_path`
+
+    Parameters
+    ----------
+    app : Application or None
+        Application, None if it is not registered
+    source : tuple
+        Absolute path to the xml file and its stat signature
+    appname : str
+        Application name
+    version : str, optional
+        Application version, by default the default version
+    strict : bool, optional
+        Bypass the cache of path checks
+
+    Returns
+    -------
+    str or None
+        Quoted path to the executable, None if the version is not registered or the executable does not exist
+    """
+    appversion = _version(app, appname, version)
+    if appversion is None:
+        return None
+
+    path = appversion.executable
+    versionnumber = appversion.versionnumber
+
+    # verify that the executable path exists
+    if not _path_cache.exists(('exe', app.name, versionnumber) + source, path, strict=strict):
+        logger.warning(
+            f"The executable path '{path}' for application/version {appname}/{versionnumber} does not exist.")
+        return None
+    else:
+        return f'"{path}"'
+
+
+def _installation_path(app, source, appname, version=None, strict=False):
+    """
+    Quoted path to the installation directory of an application version if it exists, see `installation_path`
+
+    Parameters
+    ----------
+    app : Application or None
+        Application, None if it is not registered
+    source : tuple
+        Absolute path to the xml file and its stat signature
+    appname : str
+        Application name
+    version : str, optional
+        Application version, by default the default version
+    strict : bool, optional
+        Bypass the cache of path checks
+
+    Returns
+    -------
+    str or None
+        Quoted path to the installation directory, None if the version is not registered or the directory does not
+        exist
+    """
+    appversion = _version(app, appname, version)
+    if appversion is None:
+        return None
+
+    path = appversion.installdir
+    versionnumber = appversion.versionnumber
+
+    # verify that the installation path exists
+    if not _path_cache.exists(('install', app.name, versionnumber) + source, path, strict=strict):
+        logger.warning(f"The path '{path}' for application/version {appname}/{versionnumber} does not exist.")
+        return None
+    else:
+        return f'"{path}"'
+
+
+def _select_version(app, appname, specifier):
+    """
+    Version of an application satisfying a version specifier, see `select_version`
+
+    Parameters
+    ----------
+    app : Application or None
+        Application, None if it is not registered
+    appname : str
+        Application name
+    specifier : str
+        Version specifier
+
+    Returns
+    -------
+    VersionRecord
+        Selected version
+
+    Raises
+    ------
+    InvalidSpecifier
+        If the specifier can not be parsed
+    UnsatisfiableSpecifier
+        If no version satisfies the specifier
+    """
+    spec = specifiers.parse(specifier)
+    record = None if app is None else spec.select(app)
+    if record is None:
+        raise spec.unsatisfied(app, appname)
+    return record
+
+
+def _below_key(below):
+    """Version key of the version below which to look for the latest version, None for no upper bound"""
+    if below is None:
+        return None
+    elif len(below.split('.')) > 3:
+        raise ValueError(f'Incorrect version definition used: below={below}')
+    else:
+        return version_key(below)
+
+
+def _latest_version(app, appname, below, below_key):
+    """
+    Latest version of an application, optionally below a certain version, see `latest_version`
+
+    Parameters
+    ----------
+    app : Application or None
+        Application, None if it is not registered
+    appname : str
+        Application name
+    below : str or None
+        Version below which to return the latest version
+    below_key : tuple or None
+        Version key of `below`, see `_below_key`
+
+    Returns
+    -------
+    str
+        Latest version number
+    """
+    candidate = None if app is None else app.latest(below=below_key)
+    if candidate is None:
+        raise ValueError(f'No {appname} version below {below} found')
+    else:
+        return candidate.versionnumber
+
+
+def _resolve_many(appdata, source, requests, max_workers=8, strict=False):
+    """
+    Resolve the executables of many application versions in a registry, see `resolve_many`
+
+    Parameters
+    ----------
+    appdata : Mapping
+        Mapping of application names to applications
+    source : tuple
+        Absolute path to the xml file and its stat signature
+    requests : iterable
+        Application names or (application name, version) pairs
+    max_workers : int, optional
+        Maximum number of threads checking paths concurrently
+    strict : bool, optional
+        Bypass the cache of path checks
+
+    Returns
+    -------
+    list
+        `Resolution` per request, in the order of the requests
+    """
+    # normalize and deduplicate requests
+    keys = []
+    for request in requests:
+        appname, version = (request, None) if isinstance(request, str) else request
+        keys.append((appname.lower(), None if version is None else version.lower()))
+
+    # look up versions and collect the paths to check
+    resolved = dict()
+    for appname, version in dict.fromkeys(keys):
+        app = appdata.get(appname)
+        if app is None:
+            reason = f"Application '{appname}' is not registered in Application Version Manager."
+        elif version is not None and specifiers.is_specifier(version):
+            try:
+                record = _select_version(app, appname, version)
+            except ValueError as e:
+                reason = str(e)
             else:
-                raise FileNotFoundError("Unable to automatically find 'ApplicationVersions.xml'")
+                resolved[(appname, version)] = (record, None)
+                continue
+        elif version is None and app.default is None:
+            reason = (f"There is no default version registered for application '{appname}' in Application Version "
+                      f"Manager.")
+        elif version is not None and version not in app:
+            reason = f"Version '{version}' of application '{appname}' is not registered in Application Version Manager."
         else:
-            logger.error("No environmental variable called 'APPDATA'. Unable to find 'ApplicationVersions.xml'.")
-            raise TypeError("No environmental variable called 'APPDATA'. Unable to find 'ApplicationVersions.xml'.")
+            reason = None
+
+        record = None if reason else (app.default if version is None else app[version])
+        resolved[(appname, version)] = (record, reason)
+
+    checks = dict()
+    for (appname, _), (record, _) in resolved.items():
+        if record is not None:
+            checks[('exe', appname, record.versionnumber) + source] = record.executable
+            checks[('install', appname, record.versionnumber) + source] = record.installdir
+
+    # check the existence of the paths concurrently
+    exists = dict()
+    if checks:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(checks)))) as executor:
+            futures = {key: executor.submit(_path_cache.exists, key, path, strict) for key, path in checks.items()}
+            exists = {key: future.result() for key, future in futures.items()}
+
+    results = dict()
+    for (appname, version), (record, reason) in resolved.items():
+        if record is None:
+            results[(appname, version)] = Resolution(appname, version, reason=reason)
+            continue
+
+        exepath = record.executable
+        exe_exists = exists[('exe', appname, record.versionnumber) + source]
+        installdir_exists = exists[('install', appname, record.versionnumber) + source]
+        if not exe_exists:
+            reason = (f"The executable path '{exepath}' for application/version {appname}/{record.versionnumber} does "
+                      f"not exist.")
+        results[(appname, version)] = Resolution(
+            appname, version, versionnumber=record.versionnumber,
+            exepath=exepath if exe_exists else None,
+            installdir=record.installdir if installdir_exists else None,
+            reason=reason
+        )
+
+    return [results[key] for key in keys]
+
+
+def _ask_daemon(op, appverxml=None, appname=None, **kwargs):
+    """
+    Ask the resolver daemon, unless the registry of the xml file (or the application) is cached in-process already
+
+    A warm in-process cache answers in microseconds, while the daemon costs a round-trip and decoding the answer.
+
+    Parameters
+    ----------
+    op : str
+        Query, see `client.request`
+    appverxml : str or sequence, optional
+        XML file listing application-versions
+    appname : str, optional
+        Application name, for queries of a single application
+    **kwargs
+        Other arguments of the query
 
-    # Verify the existence of the xml file
-    if os.path.exists(appverxml):
-        logger.debug(f"Using the xml file '{appverxml}'.")
+    Returns
+    -------
+    object
+        Result of the query, or `client.UNAVAILABLE` if it is to be answered in-process
+    """
+    if not client.available():
+        return client.UNAVAILABLE
+
+    try:
+        source = _appverxml_signature(appverxml)
+    except (FileNotFoundError, TypeError, ValueError):
+        return client.UNAVAILABLE  # the error is raised in-process
+    if _registry_cache.cached(*source, None if appname is None else appname.lower()):
+        return client.UNAVAILABLE
+
+    if appname is not None:
+        kwargs['appname'] = appname
+    return client.request(op, appverxml=source[0], **kwargs)
+
+
+def _application(appname, appverxml=None):
+    """
+    Get the versions of a single application registered in Application Version Manager
+
+    If the xml file is already parsed and cached the application is looked up in the cached data. Otherwise the file is
+    streamed up to the end of the (first entry of the) application, only building its versions, and the application is
+    cached on its own. Layered XML files are looked up layer by layer and the merged application is cached as well. If
+    snapshots are enabled the complete registry is loaded instead, from the snapshot if it is valid.
+
+    Parameters
+    ----------
+    appname : str
+        Application name
+    appverxml : str or sequence, optional
+        XML file listing application-versions, or a sequence of layered XML files. By default the file in APPDATA is
+        applied.
+
+    Returns
+    -------
+    tuple
+        Application and its versions, None if the application is not registered, and the absolute path to the xml file
+        along with its stat signature. For layered XML files the paths and signatures are tuples.
+    """
+    with metrics.timer('lookup'):
+        source = _appverxml_signature(appverxml)
+        if snapshot.directory() is not None:
+            return _registry_cache.get(*source, _load_registry).get(appname.lower()), source
+
+        if isinstance(source[0], tuple):
+            # look up the application in each layer, the merged application is cached on its own
+            def find(paths, name):
+                return layers.merge_applications(name, [
+                    _registry_cache.get_application(path, signature, name, _find_application)
+                    for path, signature in zip(*source)
+                ])
+
+            return _registry_cache.get_application(*source, appname.lower(), find), source
+
+        return _registry_cache.get_application(*source, appname.lower(), _find_application), source
+
+
+def _cache_key(appverxml=None):
+    """Key of an XML file in the cache of parsed XML files, the absolute path or the tuple of paths of layered files"""
+    if appverxml is None:
+        return _locate_appverxml()
+    elif isinstance(appverxml, (list, tuple)):
+        return tuple(_cache_key(layer) for layer in appverxml)
     else:
-        logger.error(f"The xml file '{appverxml}' does not exist.")
-        raise FileNotFoundError(f"The xml file '{appverxml}' does not exist.")
+        return os.path.abspath(appverxml)
+
+
+def _locate_appverxml():
+    """
+    Locate the ApplicationVersions.xml in APPDATA, memoized on the value of the APPDATA environmental variable
+
+    Returns
+    -------
+    str
+        Absolute path to the xml file
+    """
+    appdata = os.getenv('appdata')
+    if not appdata:
+        logger.error("No environmental variable called 'APPDATA'. Unable to find 'ApplicationVersions.xml'.")
+        raise TypeError("No environmental variable called 'APPDATA'. Unable to find 'ApplicationVersions.xml'.")
+
+    path = _locations.get(appdata)
+    if path is not None:
+        return path
+
+    for vendor in ('DNVGL', 'DNV'):
+        path = os.path.abspath(os.path.join(appdata, vendor, 'ApplicationVersionManager', 'ApplicationVersions.xml'))
+        if os.path.exists(path):
+            _locations[appdata] = path
+            return path
+
+    raise FileNotFoundError("Unable to automatically find 'ApplicationVersions.xml'")
+
+
+def _appverxml_signature(appverxml=None):
+    """
+    Resolve the path to the xml file and get its stat signature
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions, or a sequence of layered XML files. By default the file in APPDATA is
+        applied.
+
+    Returns
+    -------
+    tuple
+        Absolute path to the xml file and its stat signature. For layered XML files, a tuple of the paths and a tuple
+        of their signatures.
+    """
+    if isinstance(appverxml, (list, tuple)):
+        if not appverxml:
+            raise ValueError("No xml files to layer.")
+        sources = [_appverxml_signature(layer) for layer in appverxml]
+        return tuple(path for path, _ in sources), tuple(signature for _, signature in sources)
+
+    with metrics.timer('locate'):
+        if appverxml is None:
+            path = _locate_appverxml()
+            try:
+                return path, file_signature(path)
+            except FileNotFoundError:
+                # the memoized file has been removed since it was located, search again
+                _locations.clear()
+                path = _locate_appverxml()
+        else:
+            path = os.path.abspath(appverxml)
+
+        # Verify the existence of the xml file
+        try:
+            return path, file_signature(path)
+        except FileNotFoundError:
+            logger.error(f"The xml file '{path}' does not exist.")
+            raise FileNotFoundError(f"The xml file '{path}' does not exist.")
+
+
+def _load_registry(appverxml, signature):
+    """
+    Load the registry from its snapshot if it is valid, otherwise parse the xml file and write a new snapshot
+
+    Layered registries are merged from the registries of their layers, which are loaded and cached separately.
+
+    Parameters
+    ----------
+    appverxml : str or tuple
+        Absolute path to the xml file, or the paths to layered xml files
+    signature : tuple
+        Current stat signature of the xml file, or the signatures of the layered xml files
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    if isinstance(appverxml, tuple):
+        return layers.merge([_registry_cache.get(path, sig, _load_registry) for path, sig in zip(appverxml, signature)])
+
+    with metrics.timer('snapshot'):
+        data = snapshot.load(appverxml, signature)
+    if data is None:
+        data = _parse_registry(appverxml)
+        snapshot.write(appverxml, signature, data)
+
+    return data
+
+
+def _parse_registry(appverxml):
+    """
+    Parse the xml file listing application-versions
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    from xml.parsers.expat import ExpatError
+    from . import parsers
+
+    logger.debug(f"Using the xml file '{appverxml}'.")
 
     # parse document tree with application information
     try:
-        apps = minidom.parse(appverxml).getElementsByTagName('Application')
+        with metrics.timer('parse'):
+            data = parsers.parse(appverxml)
     except (AttributeError, ExpatError) as e:
         logger.error(f"Failed to parse {appverxml}", exc_info=True)
         raise e
 
-    # find specified application and version
-    data = OrderedDict()
-    for app in apps:
-        appname = app.getAttribute('Name').lower()  # lowercase for increased robustness
-        versions = app.getElementsByTagName('Version')
-        appdata = OrderedDict()
-        for version in versions:
-            vnumber = version.getAttribute('VersionNumber').lower()  # lowercase for increased robustness
-            exepath = version.getAttribute('ExeFilePath')
-            installdir = version.getAttribute('InstallDir')
-            platform = version.getAttribute('Platform')
-            producttype = version.getAttribute('ProductType')
-            category = version.getAttribute('Category')
-            isdefault = True if version.getAttribute('IsDefault').lower() == 'true' else False
-            appdata[vnumber] = OrderedDict(
-                versionnumber=vnumber,
-                exepath=exepath,
-                default=isdefault,
-                installdir=installdir,
-                platform=platform,
-                producttype=producttype,
-                category=category
-            )
-            logger.debug(f"Application '{appname}' - version '{vnumber}'- is default {isdefault}")
-
-        # add application data dict
-        data[appname] = appdata
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Parsed {len(data)} applications with {sum(len(app) for app in data.values())} versions from "
+                     f"the xml file '{appverxml}'.")
 
     return data
+
+
+def _find_application(appverxml, appname):
+    """
+    Find a single application in the xml file listing application-versions
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    appname : str
+        Application name (lowercase)
+
+    Returns
+    -------
+    Application or None
+        Application and its versions, None if the application is not registered
+    """
+    from xml.parsers.expat import ExpatError
+    from . import parsers
+
+    try:
+        with metrics.timer('parse'):
+            return parsers.find_application(appverxml, appname)
+    except (AttributeError, ExpatError) as e:
+        logger.error(f"Failed to parse {appverxml}", exc_info=True)
+        raise e
+
+
+def _stream_versions(appverxml, appnames=None, select=None):
+    """
+    Stream the application versions in the xml file, see `parsers.iter_versions`
+
+    Parameters
+    ----------
+    appverxml : str
+        Absolute path to the xml file
+    appnames : set, optional
+        Only yield versions of applications with these (lowercase) names
+    select : callable, optional
+        Called with the application name and the version record, only versions for which it returns true are yielded.
+
+    Yields
+    ------
+    tuple
+        Application name (lowercase) and version record
+    """
+    from xml.parsers.expat import ExpatError
+    from . import parsers
+
+    logger.debug(f"Streaming the xml file '{appverxml}'.")
+    try:
+        yield from parsers.iter_versions(appverxml, appnames=appnames, select=select)
+    except ExpatError as e:
+        logger.error(f"Failed to parse {appverxml}", exc_info=True)
+        raise e
@@ -0,0 +1,581 @@
+#!/usr/bin/python3
+"""
+Process-wide cache of parsed Application Version Manager registries
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from . import metrics
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path):
+    """
+    Stat signature of a file, used to detect changes to it
+
+    Parameters
+    ----------
+    path : str
+        Path to file
+
+    Returns
+    -------
+    tuple
+        Modification time (ns), size (bytes) and inode number of the file
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file does not exist
+    """
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+# estimated memory footprint of a parsed registry per byte of its XML file, and of a single version record
+FOOTPRINT_PER_BYTE = 2
+FOOTPRINT_PER_RECORD = 1024
+
+
+class _Entry:
+    """Cached data of a single XML file"""
+    __slots__ = ('signature', 'data', 'apps', 'footprint', 'used')
+
+    def __init__(self, signature, data=None, footprint=0, used=0):
+        self.signature = signature
+        self.data = data  # complete registry
+        self.apps = dict()  # single applications looked up before the complete registry was loaded
+        self.footprint = footprint  # estimated bytes
+        self.used = used  # tick of the last use, for least-recently-used eviction
+
+
+class _Flight:
+    """Load in progress, awaited by concurrent callers loading the same data"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RegistryCacheInfo(namedtuple('RegistryCacheInfo', ('hits', 'misses', 'evictions', 'size', 'maxsize', 'bytes',
+                                                         'max_bytes', 'pinned'))):
+    """Statistics of a `RegistryCache`"""
+    __slots__ = ()
+
+
+class RegistryCache:
+    """
+    Cache of parsed registries keyed on the XML file path and its stat signature
+
+    A registry is re-parsed only when the stat signature of its XML file changes, or after the cache has been
+    invalidated. Single applications looked up before the complete registry is loaded are cached separately. Layered
+    registries are keyed on the tuple of paths and signatures of their XML files.
+
+    The cache is safe to use from many threads. Loading is single-flight: concurrent callers missing the same registry
+    (or application) wait for one load instead of parsing the file each, and a failed load is raised to all of them.
+    Cached registries are immutable snapshots which are replaced, never modified, when the file changes, so cache hits
+    take no lock and never wait for a load in progress, and callers holding a registry keep a consistent view.
+
+    The cache may hold the registries of many XML files, e.g. one per user of a service. It is bounded by the number of
+    cached files and by their estimated memory footprint, evicting the least recently used files first. Pinned files
+    are never evicted. The footprint of a registry is estimated from the size of its XML file, see
+    `FOOTPRINT_PER_BYTE`, and that of single applications from their number of versions, see `FOOTPRINT_PER_RECORD`.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached files, by default unbounded
+    max_bytes : int, optional
+        Maximum estimated memory footprint of the cached registries, by default unbounded. A single registry exceeding
+        the limit is still cached, evicting all other files that are not pinned.
+    enabled : bool, optional
+        Cache registries, if disabled every lookup loads the XML file.
+    """
+
+    def __init__(self, maxsize=None, max_bytes=None, enabled=True):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = dict()
+        self._flights = dict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by `invalidate`, loads started before are not cached
+        self._ticks = itertools.count(1)
+        self._bytes = 0
+        self._hits = self._misses = self._evictions = 0
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def configure(self, maxsize=None, max_bytes=None, enabled=None):
+        """
+        Change the cache settings, see `RegistryCache`. Settings that are not specified are kept, pass 0 to remove a
+        bound.
+        """
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize or None
+            if max_bytes is not None:
+                self.max_bytes = max_bytes or None
+            if enabled is not None:
+                self.enabled = enabled
+                if not enabled:
+                    self._clear()
+            self._evict()
+
+    def pin(self, path):
+        """
+        Never evict the registry of an XML file, whether it is cached already or not
+
+        Parameters
+        ----------
+        path : str or tuple
+            Absolute path to the XML file, or the paths to layered XML files
+        """
+        with self._lock:
+            self._pinned.add(path)
+
+    def unpin(self, path):
+        """
+        Allow the registry of an XML file to be evicted again
+
+        Parameters
+        ----------
+        path : str or tuple
+            Absolute path to the XML file, or the paths to layered XML files
+        """
+        with self._lock:
+            self._pinned.discard(path)
+            self._evict()
+
+    def info(self):
+        """
+        Cache statistics
+
+        Returns
+        -------
+        RegistryCacheInfo
+            Number of hits, misses and evictions, the current and maximum number of cached files, their current and
+            maximum estimated memory footprint, and the number of pinned files. Hits are counted without locking, so
+            they may be undercounted under contention.
+        """
+        with self._lock:
+            return RegistryCacheInfo(self._hits, self._misses, self._evictions, len(self._entries), self.maxsize,
+                                     self._bytes, self.max_bytes, len(self._pinned))
+
+    def _hit(self, entry):
+        entry.used = next(self._ticks)
+        self._hits += 1
+        metrics.increment('registry_cache.hit')
+
+    def _miss(self):
+        with self._lock:
+            self._misses += 1
+        metrics.increment('registry_cache.miss')
+
+    def _entry(self, path, signature):
+        """Cache entry of a file, replaced if the signature has changed, the lock must be held"""
+        entry = self._entries.get(path)
+        if entry is None or entry.signature != signature:
+            entry = _Entry(signature, used=next(self._ticks))
+            self._store(path, entry)
+        return entry
+
+    def _store(self, path, entry):
+        """Cache an entry, replacing the entry of the same file and evicting others if needed, the lock must be held"""
+        old = self._entries.get(path)
+        if old is not None:
+            self._bytes -= old.footprint
+        self._entries[path] = entry
+        self._bytes += entry.footprint
+        self._evict(keep=path)
+
+    def _grow(self, path, entry, footprint):
+        """Add to the footprint of an entry, and to the total if it is still cached, the lock must be held"""
+        entry.footprint += footprint
+        if self._entries.get(path) is entry:
+            self._bytes += footprint
+            self._evict(keep=path)
+
+    def _evict(self, keep=None):
+        """Evict least recently used entries exceeding the bounds, the lock must be held"""
+        def over():
+            return ((self.maxsize is not None and len(self._entries) > self.maxsize)
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes))
+
+        while over():
+            candidates = [(entry.used, path) for path, entry in self._entries.items()
+                          if path not in self._pinned and path != keep]
+            if not candidates:
+                break
+            _, path = min(candidates, key=lambda candidate: candidate[0])
+            entry = self._entries.pop(path)
+            self._bytes -= entry.footprint
+            self._evictions += 1
+            metrics.increment('registry_cache.eviction')
+            logger.debug(f"Evicted the registry of the xml file '{path}' from the cache.")
+
+    def _clear(self):
+        """Drop all entries, the lock must be held"""
+        self._generation += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def _fly(self, key, load):
+        """
+        Call `load` once for concurrent callers with the same key, the others wait for its result
+
+        The result must be cached by `load` before it returns, so that callers arriving after the flight has landed
+        find it in the cache.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            metrics.increment('registry_cache.wait')
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.result
+
+    def get(self, path, signature, loader):
+        """
+        Get the parsed registry of an XML file, loading it if it is not cached or has changed
+
+        Parameters
+        ----------
+        path : str
+            Absolute path to the XML file
+        signature : tuple
+            Current stat signature of the XML file, see `file_signature`
+        loader : callable
+            Function loading the registry of the XML file, called with the path and signature as arguments
+
+        Returns
+        -------
+        object
+            Parsed registry as returned by `loader`
+        """
+        if not self.enabled:
+            self._miss()
+            return loader(path, signature)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == signature and entry.data is not None:
+            self._hit(entry)
+            return entry.data
+
+        def load():
+            # the registry may have been loaded by a flight which landed after the check above
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature and entry.data is not None:
+                self._hit(entry)
+                return entry.data
+
+            self._miss()
+            logger.debug(f"Loading the xml file '{path}'.")
+            generation = self._generation
+            data = loader(path, signature)
+            with self._lock:
+                if generation == self._generation and self.enabled:
+                    self._store(path, _Entry(signature, data, _footprint(signature), next(self._ticks)))
+            return data
+
+        return self._fly(('registry', path, signature), load)
+
+    def get_application(self, path, signature, appname, finder):
+        """
+        Get a single application of an XML file, looking it up if it is not cached or the file has changed
+
+        Parameters
+        ----------
+        path : str
+            Absolute path to the XML file
+        signature : tuple
+            Current stat signature of the XML file, see `file_signature`
+        appname : str
+            Application name (lowercase)
+        finder : callable
+            Function finding the application in the XML file, called with the path and application name as arguments.
+            Returns None if the application is not registered.
+
+        Returns
+        -------
+        object
+            Application as returned by `finder`, None if it is not registered
+        """
+        if not self.enabled:
+            self._miss()
+            return finder(path, appname)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == signature:
+            if entry.data is not None:
+                self._hit(entry)
+                return entry.data.get(appname)
+            if appname in entry.apps:
+                self._hit(entry)
+                return entry.apps[appname]
+
+        def find():
+            with self._lock:
+                entry = self._entry(path, signature)
+                generation = self._generation
+            if entry.data is not None:
+                self._hit(entry)
+                return entry.data.get(appname)
+            if appname in entry.apps:
+                self._hit(entry)
+                return entry.apps[appname]
+
+            self._miss()
+            logger.debug(f"Looking up application '{appname}' in the xml file '{path}'.")
+            app = finder(path, appname)
+            with self._lock:
+                if generation == self._generation and self.enabled:
+                    entry.apps[appname] = app
+                    entry.used = next(self._ticks)
+                    self._grow(path, entry, FOOTPRINT_PER_RECORD * (1 if app is None else max(1, len(app))))
+            return app
+
+        return self._fly(('application', path, signature, appname), find)
+
+    def cached(self, path, signature, appname=None):
+        """
+        Check if the registry of an XML file, or a single application, is cached for the current stat signature
+
+        Parameters
+        ----------
+        path : str or tuple
+            Absolute path to the XML file, or the paths to layered XML files
+        signature : tuple
+            Current stat signature of the XML file, see `file_signature`
+        appname : str, optional
+            Application name (lowercase). By default only the complete registry counts.
+
+        Returns
+        -------
+        bool
+            True if `get` (or `get_application`) would return without loading
+        """
+        entry = self._entries.get(path)
+        return (entry is not None and entry.signature == signature and
+                (entry.data is not None or (appname is not None and appname in entry.apps)))
+
+    def put(self, path, signature, data):
+        """
+        Cache a registry loaded elsewhere, e.g. received from the resolver daemon
+
+        Parameters
+        ----------
+        path : str or tuple
+            Absolute path to the XML file, or the paths to layered XML files
+        signature : tuple
+            Stat signature of the XML file the registry was loaded from
+        data : object
+            Parsed registry
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(path, _Entry(signature, data, _footprint(signature), next(self._ticks)))
+
+    def put_application(self, path, signature, appname, app):
+        """
+        Cache a single application loaded elsewhere, e.g. received from the resolver daemon
+
+        Parameters
+        ----------
+        path : str or tuple
+            Absolute path to the XML file, or the paths to layered XML files
+        signature : tuple
+            Stat signature of the XML file the application was loaded from
+        appname : str
+            Application name (lowercase)
+        app : object
+            Application, None if it is not registered
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entry(path, signature)
+            if entry.data is None and appname not in entry.apps:
+                entry.apps[appname] = app
+                entry.used = next(self._ticks)
+                self._grow(path, entry, FOOTPRINT_PER_RECORD * (1 if app is None else max(1, len(app))))
+
+    def invalidate(self, path=None):
+        """
+        Drop cached registries, keeping the statistics and pinned files
+
+        Parameters
+        ----------
+        path : str, optional
+            Absolute path to the XML file to drop, along with the layered registries it is part of. By default all
+            registries are dropped.
+        """
+        with self._lock:
+            if path is None:
+                self._clear()
+                return
+
+            self._generation += 1
+            for key in [key for key in self._entries if key == path or (isinstance(key, tuple) and path in key)]:
+                self._bytes -= self._entries.pop(key).footprint
+
+    def clear(self):
+        """
+        Drop all cached registries and pinned files, and reset the statistics
+        """
+        with self._lock:
+            self._clear()
+            self._pinned.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+def _footprint(signature):
+    """Estimated memory footprint of a registry from the size of its XML file, or the sizes of layered XML files"""
+    if signature and isinstance(signature[0], tuple):
+        return sum(_footprint(layer) for layer in signature)
+    return FOOTPRINT_PER_BYTE * signature[1]
+
+
+class PathCacheInfo(namedtuple('PathCacheInfo', ('hits', 'misses', 'evictions', 'size', 'maxsize'))):
+    """Statistics of a `PathCache`"""
+    __slots__ = ()
+
+
+class PathCache:
+    """
+    Bounded least-recently-used cache of path existence checks with time-to-live
+
+    Checking the existence of executables and installation directories on network shares costs milliseconds per
+    check, and more when the path is missing. Results are cached for `ttl` seconds if the path exists and for
+    `negative_ttl` seconds if it does not.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of cached results, the least recently used result is evicted first.
+    ttl : float, optional
+        Seconds to cache that a path exists
+    negative_ttl : float, optional
+        Seconds to cache that a path does not exist
+    enabled : bool, optional
+        Cache results, if disabled every check is done on the file system.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60., negative_ttl=10., enabled=True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def configure(self, maxsize=None, ttl=None, negative_ttl=None, enabled=None):
+        """
+        Change the cache settings, see `PathCache`. Settings that are not specified are kept.
+        """
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            if negative_ttl is not None:
+                self.negative_ttl = negative_ttl
+            if enabled is not None:
+                self.enabled = enabled
+            self._evict()
+
+    def exists(self, key, path, strict=False):
+        """
+        Check whether a path exists, using the cached result if it has not expired
+
+        Parameters
+        ----------
+        key : tuple
+            Cache key, e.g. kind of path, application name, version number, xml file path and its stat signature
+        path : str
+            Path to check
+        strict : bool, optional
+            Always check on the file system, and refresh the cached result.
+
+        Returns
+        -------
+        bool
+            The path exists
+        """
+        if self.enabled and not strict:
+            with self._lock:
+                cached = self._results.get(key)
+                if cached is not None and cached[1] > time.monotonic():
+                    self._results.move_to_end(key)
+                    self._hits += 1
+                    metrics.increment('path_cache.hit')
+                    return cached[0]
+                self._misses += 1
+            metrics.increment('path_cache.miss')
+
+        with metrics.timer('path_check'):
+            result = os.path.exists(path)
+        if self.enabled:
+            with self._lock:
+                self._results[key] = (result, time.monotonic() + (self.ttl if result else self.negative_ttl))
+                self._results.move_to_end(key)
+                self._evict()
+
+        return result
+
+    def _evict(self):
+        """Evict least recently used results exceeding the maximum size, the lock must be held"""
+        while len(self._results) > max(self.maxsize, 0):
+            self._results.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """
+        Drop all cached results and reset the statistics
+        """
+        with self._lock:
+            self._results.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def info(self):
+        """
+        Cache statistics
+
+        Returns
+        -------
+        PathCacheInfo
+            Number of hits, misses and evictions, and the current and maximum size of the cache
+        """
+        with self._lock:
+            return PathCacheInfo(self._hits, self._misses, self._evictions, len(self._results), self.maxsize)
@@ -0,0 +1,308 @@
+#!/usr/bin/python3
+"""
+Client of the `avm-serve` resolver daemon
+
+When the daemon is reachable, `exe_path`, `installation_path`, `default_version`, `all_versions`, `latest_version`,
+`select_version`, `registered_applications` and `resolve_many` are answered by the daemon instead of parsing the XML
+file in every process. When it is not, they fall back to parsing the XML file in-process, and the daemon is not tried
+again for `RETRY_INTERVAL` seconds. Queries of a registry (or application) which is cached in-process for the current
+stat signature of the XML file are answered in-process without asking the daemon, and the registries and applications
+received from the daemon are cached in-process, keyed on the signature the daemon loaded them from.
+
+The daemon listens on a Unix domain socket, by default `default_socket_path()`. Point clients to another socket with
+`enable` or the environmental variable `AVM_SOCKET`, or stop using the daemon with `disable`. A socket is only used if
+it is owned by the current user (or root) and its directory can not be written by other users, unless the directory
+is sticky like '/tmp', so that another user can not answer queries with executables of their choosing. Where the
+platform reports the credentials of the peer, the daemon must run as the current user (or root) as well.
+
+The protocol is a JSON object per line. Requests carry the name of the query and its keyword arguments, e.g.
+`{"op": "exe_path", "args": {"appname": "wadam"}}`, and responses carry the result, `{"result": "..."}`, or an error,
+`{"error": "...", "type": "ValueError"}`. Each thread keeps its connection open across calls. The XML file is always
+sent as an absolute path, the default file is located in the APPDATA of the caller rather than that of the daemon.
+"""
+import logging
+import os
+import threading
+import time
+from .records import FIELDS, VersionRecord, Application, Resolution, registry
+from .specifiers import InvalidSpecifier, UnsatisfiableSpecifier
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# environmental variable pointing to the socket of the daemon
+SOCKET_ENV = 'AVM_SOCKET'
+
+# seconds to wait for a response, and to wait before trying an unreachable daemon again
+TIMEOUT = 5.
+RETRY_INTERVAL = 5.
+
+# returned by `request` if the daemon is not reachable
+UNAVAILABLE = object()
+
+# errors raised by the daemon which are raised by the client as well, other errors fall back to in-process parsing
+ERRORS = dict(FileNotFoundError=FileNotFoundError, ValueError=ValueError, TypeError=TypeError,
+              InvalidSpecifier=InvalidSpecifier, UnsatisfiableSpecifier=UnsatisfiableSpecifier)
+
+_socket_path = None
+_disabled = False
+_retry_at = 0.
+_local = threading.local()
+
+
+def default_socket_path():
+    """
+    Default path to the socket of the daemon
+
+    Returns
+    -------
+    str
+        'avm-<uid>.sock' in '$XDG_RUNTIME_DIR', or in the temporary directory
+    """
+    folder = os.getenv('XDG_RUNTIME_DIR') or os.getenv('TMPDIR') or '/tmp'
+    user = os.getuid() if hasattr(os, 'getuid') else os.getenv('USERNAME', 'user')
+    return os.path.join(folder, f'avm-{user}.sock')
+
+
+def enable(path=None):
+    """
+    Use the daemon when it is reachable, which is the default
+
+    Parameters
+    ----------
+    path : str, optional
+        Path to the socket of the daemon. By default the value of `AVM_SOCKET`, or `default_socket_path()`.
+    """
+    global _socket_path, _disabled, _retry_at
+    close()
+    _socket_path, _disabled, _retry_at = path, False, 0.
+
+
+def disable():
+    """
+    Never use the daemon, always parse the XML file in-process
+    """
+    global _disabled
+    close()
+    _disabled = True
+
+
+def socket_path():
+    """
+    Path to the socket of the daemon
+
+    Returns
+    -------
+    str or None
+        Socket path, None if the daemon is disabled or Unix domain sockets are not supported on this platform
+    """
+    import socket
+
+    if _disabled or not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    return _socket_path or os.getenv(SOCKET_ENV) or default_socket_path()
+
+
+def available():
+    """
+    Check if the daemon may be asked, i.e. it is not disabled and not found unreachable in the last `RETRY_INTERVAL`
+    seconds
+
+    Returns
+    -------
+    bool
+        True if `request` tries the daemon
+    """
+    return not _disabled and time.monotonic() >= _retry_at
+
+
+def close():
+    """
+    Close the connection of the current thread to the daemon
+    """
+    connection = getattr(_local, 'connection', None)
+    _local.connection = None
+    if connection is not None:
+        try:
+            connection[2].close()
+        except OSError:
+            pass  # unsent data of a broken connection
+        connection[1].close()
+
+
+def request(op, **kwargs):
+    """
+    Send a query to the daemon
+
+    Parameters
+    ----------
+    op : str
+        Query, one of the functions answered by the daemon
+    **kwargs
+        Keyword arguments of the query
+
+    Returns
+    -------
+    object
+        Result of the query, or `UNAVAILABLE` if the daemon is not reachable or failed to answer
+
+    Raises
+    ------
+    FileNotFoundError, ValueError, TypeError
+        If raised by the daemon when answering the query
+    """
+    if not available():
+        return UNAVAILABLE
+
+    import json
+
+    if 'appverxml' in kwargs and kwargs['appverxml'] is None:
+        # the daemon has another environment, locate the xml file in the APPDATA of the caller
+        from .avm import _locate_appverxml
+
+        try:
+            kwargs['appverxml'] = _locate_appverxml()
+        except (FileNotFoundError, TypeError):
+            return UNAVAILABLE  # the error is raised by parsing in-process
+    if kwargs.get('appverxml') is not None:
+        kwargs['appverxml'] = _abspath(kwargs['appverxml'])
+    if kwargs.get('requests') is not None:
+        kwargs['requests'] = [[item, None] if isinstance(item, str) else list(item) for item in kwargs['requests']]
+
+    try:
+        stream = _connection()
+        if stream is None:
+            return _unavailable()
+
+        stream.write(json.dumps(dict(op=op, args=kwargs)).encode('utf-8') + b'\n')
+        stream.flush()
+        line = stream.readline()
+        if not line:
+            raise ConnectionError('Connection closed by the daemon.')
+        response = json.loads(line)
+    except (OSError, ValueError):
+        logger.debug("Failed to query the avm daemon, parsing the xml file in-process.", exc_info=True)
+        close()
+        return _unavailable()
+
+    if 'error' in response:
+        error = ERRORS.get(response.get('type'))
+        if error is None:
+            logger.debug(f"The avm daemon failed to answer '{op}': {response['error']}")
+            return UNAVAILABLE
+        raise error(response['error'])
+
+    return DECODERS.get(op, _identity)(response['result'])
+
+
+def _connection():
+    """Open connection of the current thread to the daemon, None if there is no daemon"""
+    connection = getattr(_local, 'connection', None)
+    if connection is not None and connection[0] == os.getpid():
+        return connection[2]
+
+    # connections are not shared with forked processes
+    _local.connection = None
+    path = socket_path()
+    if path is None or not os.path.exists(path) or not _trusted(path):
+        return None
+
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(TIMEOUT)
+        sock.connect(path)
+        if not _trusted_peer(sock):
+            logger.warning(f"The avm daemon at '{path}' runs as another user, parsing the xml file in-process.")
+            sock.close()
+            return None
+    except OSError:
+        sock.close()
+        raise
+
+    _local.connection = (os.getpid(), sock, sock.makefile('rwb'))
+    logger.debug(f"Connected to the avm daemon at '{path}'.")
+    return _local.connection[2]
+
+
+def _trusted(path):
+    """
+    Check that a socket can only have been created by the current user: it is owned by the current user (or root),
+    and its directory is owned by the current user (or root) and not writable by others unless it is sticky
+    """
+    import stat
+
+    uids = (os.getuid(), 0)
+    st = os.stat(path)
+    folder = os.stat(os.path.dirname(os.path.abspath(path)))
+    if st.st_uid not in uids:
+        logger.warning(f"The avm daemon socket '{path}' is owned by another user, parsing the xml file in-process.")
+        return False
+    if folder.st_uid not in uids or (folder.st_mode & (stat.S_IWGRP | stat.S_IWOTH) and
+                                     not folder.st_mode & stat.S_ISVTX):
+        logger.warning(f"The directory of the avm daemon socket '{path}' is writable by other users, parsing the xml "
+                       f"file in-process.")
+        return False
+    return True
+
+
+def _trusted_peer(sock):
+    """Check that the daemon runs as the current user (or root), where the platform reports the peer credentials"""
+    import socket
+    import struct
+
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return True
+    _, uid, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    return uid in (os.getuid(), 0)
+
+
+def _unavailable():
+    """Stop trying the daemon for `RETRY_INTERVAL` seconds"""
+    global _retry_at
+    _retry_at = time.monotonic() + RETRY_INTERVAL
+    return UNAVAILABLE
+
+
+def _abspath(appverxml):
+    """Absolute path to the xml file, or paths to layered xml files, as the daemon has another working directory"""
+    if isinstance(appverxml, (list, tuple)):
+        return [os.path.abspath(layer) for layer in appverxml]
+    return os.path.abspath(appverxml)
+
+
+def _identity(result):
+    return result
+
+
+def encode_application(app):
+    """Application as a JSON-serializable list of its name and version records"""
+    return [app.name, [[getattr(record, field) for field in FIELDS] for record in app.records]]
+
+
+def decode_application(value):
+    """Application from its JSON-serializable list, see `encode_application`"""
+    if value is None:
+        return None
+    name, records = value
+    return Application(name, (VersionRecord(*record) for record in records))
+
+
+def decode_source(path, signature):
+    """Path to the xml file and its stat signature sent by the daemon, as tuples where the daemon has tuples"""
+    def astuple(value):
+        return tuple(astuple(item) for item in value) if isinstance(value, list) else value
+
+    return astuple(path), astuple(signature)
+
+
+# decoders of query results, by query. Registries and applications come with the xml file and signature they were
+# loaded from, so that they can be cached by the client.
+DECODERS = dict(
+    all_versions=lambda value: (decode_source(*value[:2]), decode_application(value[2])),
+    registered_applications=lambda value: (decode_source(*value[:2]),
+                                           registry(decode_application(app) for app in value[2])),
+    resolve_many=lambda value: [Resolution(*resolution) for resolution in value],
+)
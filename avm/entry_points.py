@@ -3,8 +3,15 @@
 Console entry points for the avm package
 """
 import argparse
+import csv
+import json
 import logging
-from .avm import registered_applications
+import os
+import re
+import shlex
+import sys
+from collections import deque
+from .records import FIELDS
 
 # setup logging levels
 LOGGING_LEVELS = dict(
@@ -24,46 +31,433 @@ def list_applications():
                                      description="List applications registered in DNV GL Software's Application Version"
                                                  " Manager.")
     parser.add_argument("--all-versions", action="store_true",
-                        help="List all versions, not just the ones marked as default.")
+                        help="List all versions, not just the ones marked as default. Only applies to the table "
+                             "format, the other formats list all versions unless --default-only is given.")
     parser.add_argument("--xml-file", dest='xml_file', action='store',
                         help="XML file listing application-versions.")
+    parser.add_argument("--format", default="table", choices=list(OUTPUT_FORMATS),
+                        help="Output format. The json, jsonl and csv formats stream one record per version.")
+    parser.add_argument("--app", dest='apps', action='append', metavar='APP',
+                        help="Only list this application. May be given more than once.")
+    parser.add_argument("--category", help="Only list versions in this category, e.g. 'Sesam'.")
+    parser.add_argument("--platform", help="Only list versions for this platform, e.g. '64'.")
+    parser.add_argument("--default-only", action="store_true", help="Only list versions marked as default.")
+    parser.add_argument("--check-paths", action="store_true",
+                        help="Check if the executables exist, adding an 'exists' column.")
 
     parser.add_argument("-l", "--logging-level", default="info", choices=list(LOGGING_LEVELS.keys()),
                         help="Set logging level.")
 
     # parse command line arguments
     args = parser.parse_args()
+    _configure_logging(args.logging_level)
 
+    # stream application version data, the parsing machinery is only loaded once the arguments are valid
+    from .avm import iter_versions
+    default_only = args.default_only or (args.format == 'table' and not args.all_versions)
+    versions = iter_versions(appverxml=args.xml_file, appnames=args.apps, category=args.category,
+                             platform=args.platform, default_only=default_only)
+    if args.check_paths:
+        versions = _check_paths(versions)
+    else:
+        versions = ((appname, version, None) for appname, version in versions)
+
+    # print application details to screen
+    OUTPUT_FORMATS[args.format](versions, sys.stdout, check_paths=args.check_paths)
+
+
+def check_applications():
+    """
+    Check the installations registered in Application Version Manager, see `avm.health`
+
+    Returns
+    -------
+    int
+        Exit status, 1 if problems were found and 0 otherwise
+    """
+    # create console argument parser
+    parser = argparse.ArgumentParser(prog="avm-check",
+                                     description="Check the installations registered in DNV GL Software's Application "
+                                                 "Version Manager for missing executables and installation "
+                                                 "directories, and missing or duplicate default versions.")
+    parser.add_argument("--xml-file", dest='xml_file', action='store',
+                        help="XML file listing application-versions.")
+    parser.add_argument("--format", default="table", choices=list(CHECK_FORMATS), help="Output format.")
+    parser.add_argument("--app", dest='apps', action='append', metavar='APP',
+                        help="Only check this application. May be given more than once.")
+    parser.add_argument("--max-workers", type=int, default=16, help="Maximum number of concurrent path checks.")
+    parser.add_argument("-l", "--logging-level", default="info", choices=list(LOGGING_LEVELS.keys()),
+                        help="Set logging level.")
+
+    # parse command line arguments
+    args = parser.parse_args()
+    _configure_logging(args.logging_level)
+
+    from .health import check_installations
+    findings = check_installations(appverxml=args.xml_file, appnames=args.apps, max_workers=args.max_workers)
+    CHECK_FORMATS[args.format](findings, sys.stdout)
+    return 1 if findings else 0
+
+
+def inventory_applications():
+    """
+    Inventory the applications installed across hosts, from a directory of collected XML files, see `avm.inventory`
+    """
+    # create console argument parser
+    parser = argparse.ArgumentParser(prog="avm-inventory",
+                                     description="Scan a directory of Application Version Manager XML files collected "
+                                                 "from many hosts, and report which application versions are "
+                                                 "installed where.")
+    parser.add_argument("directory", help="Directory of collected XML files, including subdirectories.")
+    parser.add_argument("--pattern", default="*.xml", help="Glob pattern of the XML file names.")
+    parser.add_argument("--has", dest='queries', action='append', type=lambda text: ('has', text),
+                        metavar='APP[@VERSION]',
+                        help="List the hosts with this application version installed, VERSION may be a version "
+                             "specifier, e.g. 'wadam@>=9.4'. May be given more than once.")
+    parser.add_argument("--default", dest='queries', action='append', type=lambda text: ('default', text),
+                        metavar='APP[@VERSION]', help="List the hosts where this application version is the default.")
+    parser.add_argument("--lacks", dest='queries', action='append', type=lambda text: ('lacks', text),
+                        metavar='APP[@VERSION]', help="List the hosts without this application version installed.")
+    parser.add_argument("--format", default="table", choices=('table', 'json'), help="Output format.")
+    parser.add_argument("--max-workers", type=int, help="Number of worker processes, by default the number of "
+                                                        "processors.")
+    parser.add_argument("-l", "--logging-level", default="info", choices=list(LOGGING_LEVELS.keys()),
+                        help="Set logging level.")
+
+    # parse command line arguments
+    args = parser.parse_args()
+    _configure_logging(args.logging_level)
+
+    from .inventory import scan
+    inventory = scan(args.directory, pattern=args.pattern, max_workers=args.max_workers)
+
+    queries = []
+    for kind, text in args.queries or ():
+        appname, version = _parse_query(text)
+        if kind == 'lacks':
+            hosts = inventory.hosts_without(appname, version)
+        else:
+            hosts = inventory.hosts_with(appname, version, default=kind == 'default')
+        queries.append(dict(query=f"{kind} {text}", hosts=hosts))
+
+    if args.format == 'json':
+        result = dict(hosts=len(inventory.hosts), failures=[failure._asdict() for failure in inventory.failures])
+        if queries:
+            result['queries'] = queries
+        else:
+            result['versions'] = [dict(zip(('appname', 'versionnumber', 'hosts', 'default'), row))
+                                  for row in inventory.summary()]
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+
+    print(115 * "=")
+    if queries:
+        for query in queries:
+            print(f"{query['query']}: {len(query['hosts'])} hosts")
+            for host in query['hosts']:
+                print(f"    {host}")
+    else:
+        print("{:20} {:10} {:>8} {:>8}".format('Application', 'Version', 'Hosts', 'Default'))
+        print(115 * "-")
+        for row in inventory.summary():
+            print("{:20} {:10} {:8d} {:8d}".format(*row))
+    print(115 * "-")
+    print(f"{len(inventory.hosts)} hosts scanned, {len(inventory.failures)} files failed.")
+    for failure in inventory.failures:
+        print(f"    {failure.host}: {failure.error}")
+    print(115 * "=")
+
+
+def which_applications():
+    """
+    Resolve the executables of one or many application versions, parsing the XML file once for all of them
+
+    Returns
+    -------
+    int
+        Exit status, 1 if any query could not be resolved and 0 otherwise
+    """
+    # create console argument parser
+    parser = argparse.ArgumentParser(prog="avm-which",
+                                     description="Print the executables of applications registered in DNV GL "
+                                                 "Software's Application Version Manager, one per query. Queries are "
+                                                 "read from the arguments, from a file or from standard input.")
+    parser.add_argument("queries", nargs='*', metavar='APP[@VERSION]',
+                        help="Application, optionally with a version number or version specifier, e.g. 'wadam', "
+                             "'wadam@9.5.3' or 'wadam@>=9.4,<10'. If no queries are given, they are read from "
+                             "standard input.")
+    parser.add_argument("-f", "--file", help="Read queries from this file, one per line, '-' for standard input. "
+                                             "Blank lines and lines starting with '#' are skipped.")
+    parser.add_argument("--xml-file", dest='xml_file', action='store',
+                        help="XML file listing application-versions.")
+    parser.add_argument("--format", default="path", choices=('path', 'json'),
+                        help="Output format: one path per line, an empty line if a query can not be resolved, or a "
+                             "JSON array of resolutions.")
+    parser.add_argument("--export", action="store_true",
+                        help="Print assignments of environmental variables <APP>_EXE instead, for the resolved queries.")
+    parser.add_argument("--shell", default=_default_shell(), choices=list(EXPORT_FORMATS),
+                        help="Shell to print the assignments for.")
+    parser.add_argument("--strict", action="store_true", help="Check the paths on the file system, bypassing the cache.")
+    parser.add_argument("--max-workers", type=int, default=8, help="Maximum number of concurrent path checks.")
+    parser.add_argument("-l", "--logging-level", default="warning", choices=list(LOGGING_LEVELS.keys()),
+                        help="Set logging level.")
+
+    # parse command line arguments
+    args = parser.parse_args()
+    _configure_logging(args.logging_level)
+
+    texts = list(args.queries)
+    if args.file == '-' or (args.file is None and not texts):
+        texts.extend(_read_queries(sys.stdin))
+    elif args.file is not None:
+        with open(args.file) as f:
+            texts.extend(_read_queries(f))
+
+    from .avm import resolve_many
+    resolutions = resolve_many([_parse_query(text) for text in texts], appverxml=args.xml_file,
+                               max_workers=args.max_workers, strict=args.strict)
+
+    for text, resolution in zip(texts, resolutions):
+        if not resolution.ok:
+            print(f"avm-which: {text}: {resolution.reason}", file=sys.stderr)
+
+    if args.export:
+        for resolution in resolutions:
+            if resolution.ok:
+                print(EXPORT_FORMATS[args.shell](_variable(resolution.appname), resolution.exepath))
+    elif args.format == 'json':
+        json.dump([dict(query=text, ok=resolution.ok, **resolution._asdict())
+                   for text, resolution in zip(texts, resolutions)], sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for resolution in resolutions:
+            print(resolution.exepath or '')
+
+    return 0 if all(resolution.ok for resolution in resolutions) else 1
+
+
+def serve_applications():
+    """
+    Run the resolver daemon answering queries of other processes, see `avm.server`
+    """
+    # create console argument parser
+    parser = argparse.ArgumentParser(prog="avm-serve",
+                                     description="Keep the applications registered in DNV GL Software's Application "
+                                                 "Version Manager in memory, and answer queries of other processes "
+                                                 "over a Unix domain socket.")
+    parser.add_argument("--socket", help="Path to the socket to listen on. By default the value of AVM_SOCKET, or "
+                                         "'avm-<uid>.sock' in the runtime or temporary directory.")
+    parser.add_argument("--xml-file", dest='xml_files', action='append', metavar='XML_FILE',
+                        help="XML file to load on start-up, other files are loaded on first use. May be given more "
+                             "than once. By default the file in APPDATA is loaded.")
+    parser.add_argument("--refresh-interval", type=float, default=1.,
+                        help="Seconds between checks for changes to the XML files.")
+    parser.add_argument("-l", "--logging-level", default="info", choices=list(LOGGING_LEVELS.keys()),
+                        help="Set logging level.")
+
+    # parse command line arguments
+    args = parser.parse_args()
+    _configure_logging(args.logging_level)
+
+    from . import client, server
+    server.serve(args.socket or os.getenv(client.SOCKET_ENV), refresh_interval=args.refresh_interval,
+                 preload=args.xml_files or [None])
+
+
+def _configure_logging(level):
+    """Log to console at the given level"""
     # grab and configure logger
     logger = logging.getLogger()
-    logger.setLevel(LOGGING_LEVELS.get(args.logging_level))
+    logger.setLevel(LOGGING_LEVELS.get(level))
     ch = logging.StreamHandler()
     formatter = logging.Formatter("%(asctime)s:%(levelname)s:%(name)s: %(message)s")
     ch.setFormatter(formatter)
-    ch.setLevel(LOGGING_LEVELS.get(args.logging_level))
+    ch.setLevel(LOGGING_LEVELS.get(level))
     logger.addHandler(ch)
 
-    # get application version data
-    data = registered_applications(appverxml=args.xml_file)
 
-    # print application details to screen
-    print(115 * "=")
-    print("{:20} {:10} {:8} {}".format('Application', 'Version', 'Default', 'Executable'))
-    print(115 * "-")
-    for appname, app in data.items():
-        for versionnumber, version in app.items():
-            isdefault = version.get('default')
-            exepath = version.get('exepath')
-            defmark = '*' if isdefault else ''
-
-            if args.all_versions:
-                # list all versions
-                print("{:20} {:10} {:8} {}".format(appname, versionnumber, defmark, exepath))
-            if not args.all_versions and isdefault:
-                # list only default versions
-                print("{:20} {:10} {:8} {}".format(appname, versionnumber, defmark, exepath))
-            else:
-                logger.debug(f"Skipping non-default application/version '{appname}'/'{versionnumber}'")
-                continue
+def _parse_query(text):
+    """
+    Parse a query of an application version
 
-    print(115 * "=")
+    Parameters
+    ----------
+    text : str
+        Application name, optionally followed by '@' and a version number or version specifier, e.g. 'wadam',
+        'wadam@9.5.3' or 'wadam@>=9.4,<10'
+
+    Returns
+    -------
+    tuple
+        Application name and version, None if no version is given
+    """
+    appname, _, version = text.strip().partition('@')
+    return appname.strip(), version.strip() or None
+
+
+def _read_queries(stream):
+    """Queries listed in a file, one per line, skipping blank lines and comments"""
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def _default_shell():
+    """Shell to export environmental variables for, by default"""
+    return 'cmd' if os.name == 'nt' else 'sh'
+
+
+def _variable(appname):
+    """Name of the environmental variable of an application executable, e.g. 'SIMA_EXE' for 'sima'"""
+    name = re.sub(r'\W', '_', appname.upper())
+    return f"{'_' if name[:1].isdigit() else ''}{name}_EXE"
+
+
+def _check_paths(versions, max_workers=8):
+    """
+    Check if the executables of streamed application versions exist, on a thread pool
+
+    At most a few paths per worker are checked ahead of the output, so memory use does not depend on the number of
+    versions.
+
+    Parameters
+    ----------
+    versions : iterable
+        Application name and version record of each version
+    max_workers : int, optional
+        Maximum number of concurrent path checks
+
+    Yields
+    ------
+    tuple
+        Application name, version record and whether its executable exists, in the order of `versions`
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for appname, version in versions:
+            pending.append((appname, version, executor.submit(os.path.exists, version.executable)))
+            if len(pending) >= 4 * max_workers:
+                appname, version, future = pending.popleft()
+                yield appname, version, future.result()
+
+        while pending:
+            appname, version, future = pending.popleft()
+            yield appname, version, future.result()
+
+
+def _columns(check_paths):
+    """Column names of the machine-readable output formats, with the checked executable when checking paths"""
+    return ('appname',) + FIELDS + (('executable', 'exists') if check_paths else ())
+
+
+def _values(appname, version, exists, check_paths):
+    """Column values of an application version"""
+    return (appname,) + tuple(getattr(version, field) for field in FIELDS) + \
+        ((version.executable, exists) if check_paths else ())
+
+
+def _write_table(versions, stream, check_paths=False):
+    """Write application versions as a fixed-width text table, with the checked executable when checking paths"""
+    def row(*values):
+        if check_paths:
+            return "{:20} {:10} {:8} {:7} {}".format(*values)
+        return "{:20} {:10} {:8} {}".format(*(values[:3] + values[4:]))
+
+    print(115 * "=", file=stream)
+    print(row('Application', 'Version', 'Default', 'Exists', 'Executable'), file=stream)
+    print(115 * "-", file=stream)
+    for appname, version, exists in versions:
+        defmark = '*' if version.default else ''
+        path = version.executable if check_paths else version.exepath
+        print(row(appname, version.versionnumber, defmark, 'yes' if exists else 'no', path), file=stream)
+
+    print(115 * "=", file=stream)
+
+
+def _write_json(versions, stream, check_paths=False):
+    """Write application versions as a JSON array of objects, one version per line"""
+    columns = _columns(check_paths)
+    stream.write('[')
+    separator = '\n'
+    for appname, version, exists in versions:
+        stream.write(separator + json.dumps(dict(zip(columns, _values(appname, version, exists, check_paths)))))
+        separator = ',\n'
+    stream.write('\n]\n')
+
+
+def _write_jsonl(versions, stream, check_paths=False):
+    """Write application versions as JSON lines, one object per version"""
+    columns = _columns(check_paths)
+    for appname, version, exists in versions:
+        stream.write(json.dumps(dict(zip(columns, _values(appname, version, exists, check_paths)))) + '\n')
+
+
+def _write_csv(versions, stream, check_paths=False):
+    """Write application versions as comma-separated values with a header row"""
+    writer = csv.writer(stream, lineterminator='\n')
+    writer.writerow(_columns(check_paths))
+    for appname, version, exists in versions:
+        writer.writerow(_values(appname, version, exists, check_paths))
+
+
+# output formats of avm-list
+OUTPUT_FORMATS = dict(
+    table=_write_table,
+    json=_write_json,
+    jsonl=_write_jsonl,
+    csv=_write_csv,
+)
+
+
+def _write_findings_table(findings, stream):
+    """Write health check findings as a fixed-width text table"""
+    print(115 * "=", file=stream)
+    print("{:20} {:10} {:19} {}".format('Application', 'Version', 'Problem', 'Path'), file=stream)
+    print(115 * "-", file=stream)
+    for finding in findings:
+        print("{:20} {:10} {:19} {}".format(finding.appname, finding.versionnumber or '', finding.problem,
+                                            finding.path or ''), file=stream)
+
+    print(115 * "=", file=stream)
+    print(f"{len(findings)} problems found.", file=stream)
+
+
+def _write_findings_json(findings, stream):
+    """Write health check findings as a JSON array of objects"""
+    json.dump([finding._asdict() for finding in findings], stream, indent=2)
+    stream.write('\n')
+
+
+# output formats of avm-check
+CHECK_FORMATS = dict(
+    table=_write_findings_table,
+    json=_write_findings_json,
+)
+
+
+def _export_sh(name, value):
+    """Assignment of an environmental variable in POSIX shells"""
+    return f"export {name}={shlex.quote(value)}"
+
+
+def _export_cmd(name, value):
+    """Assignment of an environmental variable in the Windows command prompt"""
+    return f'set "{name}={value}"'
+
+
+def _export_powershell(name, value):
+    """Assignment of an environmental variable in PowerShell"""
+    quoted = value.replace("'", "''")
+    return f"$env:{name} = '{quoted}'"
+
+
+# assignments of environmental variables by shell, for avm-which --export
+EXPORT_FORMATS = dict(
+    sh=_export_sh,
+    cmd=_export_cmd,
+    powershell=_export_powershell,
+)
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""
+Health check of the installations registered in Application Version Manager
+
+Every version listed in the XML file is checked: its registered executable ('ExeFilePath'), its installation directory
+('InstallDir') and, if a layout rule applies, the executable derived from the rule (see `avm.layouts`). An empty
+'ExeFilePath' is expected when a layout rule applies, and is only a problem when there is no rule. Each distinct
+path is checked once, on a bounded thread pool, so that a registry on a slow network share is checked in roughly the
+time of its slowest paths rather than the sum of all of them. The checks bypass the cache of path checks.
+
+Applications are checked for their default version as well, since the XML file may mark none or several versions as
+default, which is hidden by the parsed registry.
+"""
+import logging
+import os
+from collections import namedtuple
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# problems, in the order they are reported per version
+NO_EXEPATH = 'no-exepath'
+MISSING_EXEPATH = 'missing-exepath'
+MISSING_INSTALLDIR = 'missing-installdir'
+MISSING_EXECUTABLE = 'missing-executable'
+MISSING_DEFAULT = 'missing-default'
+DUPLICATE_DEFAULT = 'duplicate-default'
+PROBLEMS = (NO_EXEPATH, MISSING_EXEPATH, MISSING_INSTALLDIR, MISSING_EXECUTABLE, MISSING_DEFAULT, DUPLICATE_DEFAULT)
+
+# problems of the paths returned by `_paths`
+_PATH_PROBLEMS = (MISSING_EXEPATH, MISSING_INSTALLDIR, MISSING_EXECUTABLE)
+
+
+class Finding(namedtuple('Finding', ('appname', 'versionnumber', 'problem', 'path'), defaults=(None, None))):
+    """
+    Problem found by the health check, see `check_installations`
+
+    Attributes
+    ----------
+    appname : str
+        Application name
+    versionnumber : str or None
+        Version number, None for problems of the application as a whole
+    problem : str
+        One of `PROBLEMS`
+    path : str or None
+        Missing path, None for problems that are not about paths
+    """
+    __slots__ = ()
+
+
+def check_installations(appverxml=None, appnames=None, max_workers=16):
+    """
+    Check the registered installations for missing paths and ambiguous default versions
+
+    Parameters
+    ----------
+    appverxml : str, optional
+        XML file listing application-versions. By default the file in APPDATA is applied.
+    appnames : iterable, optional
+        Only check these applications. By default all applications are checked.
+    max_workers : int, optional
+        Maximum number of concurrent path checks
+
+    Returns
+    -------
+    list
+        `Finding` per problem, ordered by application and version as listed in the XML file. Empty if all is well.
+    """
+    from .avm import iter_versions
+
+    # collect the versions, keeping every version marked as default
+    versions = dict()
+    for appname, record in iter_versions(appverxml=appverxml, appnames=appnames):
+        versions.setdefault(appname, []).append(record)
+
+    # check each distinct path once
+    distinct = set(path for records in versions.values() for record in records for path in _paths(record) if path)
+    exists = _exists(list(distinct), max_workers=max_workers)
+
+    findings = []
+    for appname, records in versions.items():
+        for record in records:
+            if not record.executable:
+                # no registered executable, and no layout rule deriving one
+                findings.append(Finding(appname, record.versionnumber, NO_EXEPATH))
+            for problem, path in zip(_PATH_PROBLEMS, _paths(record)):
+                if path is not None and not exists.get(path, False):
+                    findings.append(Finding(appname, record.versionnumber, problem, path))
+
+        defaults = [record for record in records if record.default]
+        if not defaults:
+            findings.append(Finding(appname, None, MISSING_DEFAULT))
+        elif len(defaults) > 1:
+            findings.extend(Finding(appname, record.versionnumber, DUPLICATE_DEFAULT) for record in defaults)
+
+    logger.debug(f"Checked {len(distinct)} paths of {sum(map(len, versions.values()))} versions of "
+                 f"{len(versions)} applications, found {len(findings)} problems.")
+    return findings
+
+
+def _paths(record):
+    """
+    Registered executable (None if it is empty), installation directory and rule-derived executable (None if there is
+    no rule)
+    """
+    return record.exepath or None, record.installdir, None if record.executable == record.exepath else record.executable
+
+
+def _exists(paths, max_workers=16):
+    """
+    Check the existence of paths on a thread pool
+
+    Parameters
+    ----------
+    paths : list
+        Paths to check
+    max_workers : int, optional
+        Maximum number of concurrent checks
+
+    Returns
+    -------
+    dict
+        Whether each path exists, by path
+    """
+    if not paths:
+        return dict()
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as executor:
+        return dict(zip(paths, executor.map(os.path.exists, paths)))
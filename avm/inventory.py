@@ -0,0 +1,336 @@
+#!/usr/bin/python3
+"""
+Inventory of the applications installed across many hosts, from collected Application Version Manager XML files
+
+The XML files collected from workstations and compute nodes are parsed in parallel on a process pool. Each worker
+streams a file with the expat parser and returns only the application versions found and whether they are the default,
+which are folded into an `Inventory` as soon as they arrive, so the parsed registries are never kept in memory.
+Files which can not be read or parsed are reported as failures of their host, and do not stop the scan.
+
+>>> from avm.inventory import scan
+>>> inventory = scan('collected')
+>>> inventory.hosts_with('wadam', '9.5.3', default=True)
+>>> inventory.hosts_without('riflex', '==4.20.*')
+
+The host of a file is its path relative to the scanned directory without extension, e.g. 'node042' for
+'collected/node042.xml', or the directory of the file if it is named 'ApplicationVersions.xml', e.g. 'node042' for
+'collected/node042/ApplicationVersions.xml'.
+"""
+import fnmatch
+import logging
+import os
+from collections import namedtuple
+from . import specifiers
+from .records import version_key
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# name of the XML file in APPDATA, its host is the directory it is collected in
+APPVERXML = 'applicationversions.xml'
+
+# files per task sent to a worker
+CHUNKSIZE = 16
+
+
+class Failure(namedtuple('Failure', ('host', 'path', 'error'))):
+    """
+    XML file which could not be scanned
+
+    Attributes
+    ----------
+    host : str
+        Host the file was collected from
+    path : str
+        Path to the file
+    error : str
+        Reason for the failure
+    """
+    __slots__ = ()
+
+
+class Inventory:
+    """
+    Aggregate of the application versions installed on many hosts
+
+    Attributes
+    ----------
+    hosts : set
+        Hosts whose XML file was scanned
+    failures : list
+        `Failure` per XML file which could not be scanned
+    installed : dict
+        Hosts by application name and version number
+    defaults : dict
+        Hosts where the version is the default, by application name and version number
+    """
+
+    def __init__(self):
+        self.hosts = set()
+        self.failures = []
+        self.installed = dict()
+        self.defaults = dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(hosts={len(self.hosts)}, failures={len(self.failures)})"
+
+    def add(self, host, versions):
+        """
+        Add the application versions of a host
+
+        Parameters
+        ----------
+        host : str
+            Host name
+        versions : iterable
+            Application name, version number and default flag of each version
+        """
+        self.hosts.add(host)
+        for appname, versionnumber, default in versions:
+            self.installed.setdefault((appname, versionnumber), set()).add(host)
+            if default:
+                self.defaults.setdefault((appname, versionnumber), set()).add(host)
+
+    def add_failure(self, host, path, error):
+        """
+        Report an XML file which could not be scanned
+
+        Parameters
+        ----------
+        host : str
+            Host name
+        path : str
+            Path to the file
+        error : str
+            Reason for the failure
+        """
+        self.failures.append(Failure(host, path, error))
+
+    def hosts_with(self, appname, version=None, default=False):
+        """
+        Hosts with an application version installed
+
+        Parameters
+        ----------
+        appname : str
+            Application name
+        version : str, optional
+            Version number or version specifier, e.g. '9.5.3' or '>=9.4,<10'. By default any version.
+        default : bool, optional
+            Only hosts where a matching version is the default
+
+        Returns
+        -------
+        list
+            Sorted host names
+        """
+        found = set()
+        for (name, versionnumber), hosts in (self.defaults if default else self.installed).items():
+            if name == appname.lower() and _matches(versionnumber, version):
+                found.update(hosts)
+        return sorted(found)
+
+    def hosts_without(self, appname, version=None):
+        """
+        Hosts without an application version installed
+
+        Parameters
+        ----------
+        appname : str
+            Application name
+        version : str, optional
+            Version number or version specifier, e.g. '4.20.4' or '==4.20.*'. By default any version.
+
+        Returns
+        -------
+        list
+            Sorted host names, among the hosts whose XML file was scanned
+        """
+        return sorted(self.hosts.difference(self.hosts_with(appname, version)))
+
+    def summary(self):
+        """
+        Number of hosts per application version
+
+        Returns
+        -------
+        list
+            Application name, version number, number of hosts where it is installed and number of hosts where it is
+            the default, sorted by application name and version number
+        """
+        return [(appname, versionnumber, len(hosts), len(self.defaults.get((appname, versionnumber), ())))
+                for (appname, versionnumber), hosts in sorted(self.installed.items(), key=_sort_key)]
+
+
+def host_name(path, directory):
+    """
+    Host an XML file was collected from, see the module documentation
+
+    Parameters
+    ----------
+    path : str
+        Path to the XML file
+    directory : str
+        Scanned directory
+
+    Returns
+    -------
+    str
+        Host name
+    """
+    relative = os.path.relpath(path, directory)
+    folder, filename = os.path.split(relative)
+    if filename.lower() == APPVERXML and folder:
+        return folder.replace(os.sep, '/')
+    return os.path.splitext(relative)[0].replace(os.sep, '/')
+
+
+def iter_files(directory, pattern='*.xml'):
+    """
+    Walk a directory for collected XML files
+
+    Parameters
+    ----------
+    directory : str
+        Directory to walk, including subdirectories
+    pattern : str, optional
+        Glob pattern of file names (case-insensitive)
+
+    Yields
+    ------
+    tuple
+        Host name and path of each file, in sorted order per directory
+    """
+    pattern = pattern.lower()
+    for folder, subfolders, filenames in os.walk(directory):
+        subfolders.sort()
+        for filename in sorted(filenames):
+            if fnmatch.fnmatchcase(filename.lower(), pattern):
+                path = os.path.join(folder, filename)
+                yield host_name(path, directory), path
+
+
+def scan(directory, pattern='*.xml', max_workers=None, chunksize=CHUNKSIZE, inventory=None):
+    """
+    Scan a directory of collected XML files into an inventory
+
+    Parameters
+    ----------
+    directory : str
+        Directory of collected XML files, including subdirectories
+    pattern : str, optional
+        Glob pattern of file names (case-insensitive)
+    max_workers : int, optional
+        Number of worker processes, by default the number of processors. With a single worker the files are scanned in
+        this process.
+    chunksize : int, optional
+        Number of files per task sent to a worker
+    inventory : Inventory, optional
+        Inventory to add to, by default a new inventory
+
+    Returns
+    -------
+    Inventory
+        Application versions per host, and the files which could not be scanned
+    """
+    inventory = Inventory() if inventory is None else inventory
+    for host, path, versions, error in scan_files(iter_files(directory, pattern), max_workers=max_workers,
+                                                  chunksize=chunksize):
+        if error is None:
+            inventory.add(host, versions)
+        else:
+            logger.warning(f"Failed to scan the xml file '{path}' of host '{host}': {error}")
+            inventory.add_failure(host, path, error)
+
+    logger.debug(f"Scanned {len(inventory.hosts)} hosts, {len(inventory.failures)} failures.")
+    return inventory
+
+
+def scan_files(files, max_workers=None, chunksize=CHUNKSIZE):
+    """
+    Scan XML files on a process pool, streaming the results as they complete
+
+    At most two tasks per worker are pending at a time, so memory use does not depend on the number of files.
+
+    Parameters
+    ----------
+    files : iterable
+        Host name and path of each file
+    max_workers : int, optional
+        Number of worker processes, by default the number of processors. With a single worker the files are scanned in
+        this process.
+    chunksize : int, optional
+        Number of files per task sent to a worker
+
+    Yields
+    ------
+    tuple
+        Host name, path, versions (application name, version number and default flag) and error, which is None if the
+        file was scanned. Results are yielded in the order they complete.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    chunks = _chunks(files, chunksize)
+    if max_workers == 1:
+        for chunk in chunks:
+            yield from _scan_chunk(chunk)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_scan_chunk, chunk))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+        for future in pending:
+            yield from future.result()
+
+
+def _chunks(files, chunksize):
+    """Lists of at most `chunksize` files"""
+    chunk = []
+    for item in files:
+        chunk.append(item)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _scan_chunk(chunk):
+    """Scan files in a worker, returning the versions of each file or why it failed"""
+    from xml.parsers.expat import ExpatError
+    from .parsers import iter_versions
+
+    results = []
+    for host, path in chunk:
+        try:
+            versions = [(appname, record.versionnumber, record.default) for appname, record in iter_versions(path)]
+        except (ExpatError, OSError, UnicodeDecodeError) as e:
+            results.append((host, path, None, f"{type(e).__name__}: {e}"))
+        else:
+            results.append((host, path, versions, None))
+    return results
+
+
+def _matches(versionnumber, version):
+    """A version number matches a requested version number or version specifier, or any version if None"""
+    if version is None:
+        return True
+    if specifiers.is_specifier(version):
+        return specifiers.parse(version).contains(versionnumber)
+    return versionnumber == version.lower()
+
+
+def _sort_key(item):
+    """Sort key of application versions by name and version number, numerically where possible"""
+    (appname, versionnumber), _ = item
+    try:
+        return appname, 0, version_key(versionnumber), ''
+    except ValueError:
+        return appname, 1, (), versionnumber
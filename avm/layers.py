@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Layered registries, merging several Application Version Manager XML files into a single view
+
+The layers are ordered from highest to lowest precedence, e.g. a per-user XML file followed by a centrally managed
+XML file on a network share. The merged view follows these rules:
+
+- An application is registered if it is registered in any layer.
+- A version listed in several layers is taken from the layer with the highest precedence.
+- The default version is the default of the layer with the highest precedence that marks a version of the application
+  as default. The default flag of all other versions is cleared, so there is at most one default per application.
+"""
+from types import MappingProxyType
+from .records import Application
+
+
+def merge_applications(appname, apps):
+    """
+    Merge the versions of an application registered in several layers
+
+    Parameters
+    ----------
+    appname : str
+        Application name (lowercase)
+    apps : sequence
+        Application in each layer, from highest to lowest precedence. None if it is not registered in a layer.
+
+    Returns
+    -------
+    Application or None
+        Merged application, None if it is not registered in any layer. If it is only registered in a single layer the
+        application of that layer is returned as is.
+    """
+    apps = [app for app in apps if app is not None]
+    if not apps:
+        return None
+    elif len(apps) == 1:
+        return apps[0]
+
+    default = next((app.default.versionnumber for app in apps if app.default is not None), None)
+    records = dict()
+    for app in apps:
+        for record in app.records:
+            records.setdefault(record.versionnumber, record)
+
+    return Application(appname, (
+        record if record.default == (versionnumber == default) else record._replace(default=versionnumber == default)
+        for versionnumber, record in records.items()
+    ))
+
+
+def merge(registries):
+    """
+    Merge several registries into a single view
+
+    Parameters
+    ----------
+    registries : sequence
+        Mapping of application names to applications of each layer, from highest to lowest precedence
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to merged applications, in the order they are first listed in the
+        layers with the highest precedence. Applications registered in a single layer are the objects of that layer.
+    """
+    appnames = dict.fromkeys(appname for data in registries for appname in data)
+    return MappingProxyType({
+        appname: merge_applications(appname, [data.get(appname) for data in registries]) for appname in appnames
+    })
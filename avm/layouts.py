@@ -0,0 +1,222 @@
+#!/usr/bin/python3
+"""
+Executable layout rules, mapping applications to the location of their executable
+
+For most applications the executable is the 'ExeFilePath' registered in Application Version Manager. Some applications
+register a launcher there instead, and their executable lives at a fixed place in the installation directory. A layout
+rule maps an application name, or a glob pattern of application names, to a template of the executable path:
+
+- templates are relative to the installation directory, e.g. 'simo/bin/rsimo.exe', unless they start with
+  '{installdir}' or '{exepath}'
+- templates may refer to the attributes of the version record, e.g. 'bin/{platform}/app.exe' or '{exepath}.bat'
+- '/' separates path components, which are joined with the separator of the platform
+- a rule without template (None) turns off a built-in rule, so the registered 'ExeFilePath' is used
+
+Exact names take precedence over patterns, and patterns are tried in the order they were added. The effective path is
+computed once when an application is loaded and stored on its version records, see `VersionRecord.executable`.
+
+Rules are extended without code changes by pointing the environmental variable `AVM_LAYOUTS` to a JSON file mapping
+names or patterns to templates, e.g. `{"wasim": "bin/wasim_solver.exe", "sesam*": "bin/{versionnumber}/run.bat"}`,
+or at runtime with `register`. Rules added at runtime drop the cached registries, so they apply to the next lookup,
+and `avm.Registry` (and so the resolver daemon) applies them on its next refresh.
+"""
+import logging
+import os
+from fnmatch import fnmatchcase
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# built-in rules, applications whose executable is not the registered 'ExeFilePath'
+LAYOUTS = {
+    'simo': 'simo/bin/rsimo.exe',
+    'riflex': 'Riflex/bin/riflex.bat',
+}
+
+# environmental variable pointing to a JSON file of user rules
+LAYOUTS_ENV = 'AVM_LAYOUTS'
+
+# version attributes available in templates
+_FIELDS = dict(versionnumber='', exepath='', default=False, installdir='', platform='', producttype='', category='')
+
+# templates starting with these are not relative to the installation directory
+_ANCHORED = ('{installdir}', '{exepath}')
+
+# user rules added with `register`, the effective rules and the rule found per application name
+_registered = dict()
+_rules = None
+_resolved = dict()
+
+# number of changes of the rules
+_generation = 0
+
+
+def rules():
+    """
+    Effective layout rules: the built-in rules, updated with the rules in `AVM_LAYOUTS` and those added with `register`
+
+    Returns
+    -------
+    dict
+        Templates by application name or pattern (lowercase)
+    """
+    global _rules
+    if _rules is None:
+        effective = dict(LAYOUTS)
+        effective.update(_load(os.getenv(LAYOUTS_ENV)))
+        effective.update(_registered)
+        _rules = effective
+    return _rules
+
+
+def register(pattern, template):
+    """
+    Add a layout rule, or replace the rule of the same name or pattern
+
+    Parameters
+    ----------
+    pattern : str
+        Application name or glob pattern of application names, e.g. 'sesam*'
+    template : str or None
+        Template of the executable path, see the module documentation. None turns off the rule of the same name or
+        pattern, so the registered 'ExeFilePath' is used.
+
+    Raises
+    ------
+    ValueError
+        If the template refers to an unknown attribute
+    """
+    pattern = pattern.lower()
+    _validate(pattern, template)
+    _registered[pattern] = template
+    _changed()
+
+
+def unregister(pattern):
+    """
+    Remove a layout rule added with `register`
+
+    Parameters
+    ----------
+    pattern : str
+        Application name or glob pattern of application names
+    """
+    if _registered.pop(pattern.lower(), False) is not False:
+        _changed()
+
+
+def reload():
+    """
+    Read the rules in `AVM_LAYOUTS` again, e.g. after the file changed or the variable was set
+    """
+    _changed()
+
+
+def template(appname):
+    """
+    Template of the executable path of an application
+
+    Parameters
+    ----------
+    appname : str
+        Application name (lowercase)
+
+    Returns
+    -------
+    str or None
+        Template of the executable path, None if the registered 'ExeFilePath' is used
+    """
+    try:
+        return _resolved[appname]
+    except KeyError:
+        pass
+
+    effective = rules()
+    if appname in effective:
+        found = effective[appname]
+    else:
+        found = next((template_ for pattern, template_ in effective.items()
+                      if template_ is not None and fnmatchcase(appname, pattern)), None)
+    _resolved[appname] = found
+    return found
+
+
+def executable(template_, record):
+    """
+    Path to the executable of an application version
+
+    Parameters
+    ----------
+    template_ : str
+        Template of the executable path, see `template`
+    record : VersionRecord
+        Application version
+
+    Returns
+    -------
+    str
+        Path to the executable
+    """
+    fields = {name: getattr(record, name) for name in _FIELDS}
+    parts = [part.format(**fields) for part in template_.split('/')]
+    if not template_.startswith(_ANCHORED):
+        parts.insert(0, record.installdir)
+    return os.path.join(*parts)
+
+
+def _validate(pattern, template_):
+    """Raise a ValueError if a template is not a string or refers to an unknown attribute"""
+    if template_ is None:
+        return
+    if not isinstance(template_, str):
+        raise ValueError(f"The layout rule '{pattern}' is not a template string: {template_!r}")
+    try:
+        template_.format(**_FIELDS)
+    except (KeyError, IndexError, ValueError) as e:
+        raise ValueError(f"The layout rule '{pattern}' has an invalid template '{template_}': {e!r}") from None
+
+
+def _load(path):
+    """Rules in a JSON file, no rules if the path is empty. Invalid files are logged and ignored."""
+    if not path:
+        return dict()
+
+    import json
+
+    try:
+        with open(path) as f:
+            loaded = json.load(f)
+        if not isinstance(loaded, dict):
+            raise ValueError('The file does not contain a JSON object.')
+        loaded = {pattern.lower(): template_ for pattern, template_ in loaded.items()}
+        for pattern, template_ in loaded.items():
+            _validate(pattern, template_)
+    except (OSError, ValueError):
+        logger.warning(f"Ignoring the layout rules in '{path}'.", exc_info=True)
+        return dict()
+
+    logger.debug(f"Loaded {len(loaded)} layout rules from '{path}'.")
+    return loaded
+
+
+def generation():
+    """
+    Number of times the rules have changed, for holders of applications to detect that their executables are outdated
+
+    Returns
+    -------
+    int
+        Incremented by `register`, `unregister` and `reload`
+    """
+    return _generation
+
+
+def _changed():
+    """Forget the effective rules, and drop cached registries whose executables were computed with them"""
+    global _rules, _generation
+    _rules = None
+    _resolved.clear()
+    _generation += 1
+
+    from .avm import invalidate
+    invalidate()
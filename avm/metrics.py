@@ -0,0 +1,229 @@
+#!/usr/bin/python3
+"""
+Opt-in instrumentation of locating the XML file, parsing it, looking up applications and checking paths
+
+Instrumentation is disabled by default and then costs a single function call per instrumented stage. Enable it with
+an in-memory sink collecting counters and timing histograms,
+
+>>> from avm import metrics
+>>> sink = metrics.enable()
+>>> sink.snapshot()
+
+or with a callback receiving every measurement, e.g. to forward them to a metrics system,
+
+>>> metrics.enable(metrics.CallbackSink(lambda kind, name, value: print(kind, name, value)))
+
+Instrumented stages (timers, in seconds): 'locate', 'parse', 'snapshot', 'lookup' and 'path_check'. Counters:
+'registry_cache.hit', 'registry_cache.miss', 'path_cache.hit' and 'path_cache.miss'.
+"""
+import bisect
+import threading
+import time
+
+# upper bounds of the timing histogram buckets, in seconds
+BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1., 10., float('inf'))
+
+_sink = None
+
+
+class Histogram:
+    """
+    Histogram of timings
+
+    Attributes
+    ----------
+    count : int
+        Number of timings
+    total : float
+        Sum of timings, in seconds
+    min, max : float
+        Shortest and longest timing, in seconds
+    buckets : list
+        Number of timings per bucket, see `BUCKETS`
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.min = float('inf')
+        self.max = 0.
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds):
+        """Add a timing, in seconds"""
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def asdict(self):
+        """Histogram as a dictionary"""
+        return dict(count=self.count, total=self.total, mean=self.total / self.count if self.count else 0.,
+                    min=self.min if self.count else 0., max=self.max,
+                    buckets=dict(zip((str(bound) for bound in BUCKETS), self.buckets)))
+
+
+class InMemorySink:
+    """
+    Sink collecting counters and timing histograms in memory
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = dict()
+        self.timings = dict()
+
+    def increment(self, name, value=1):
+        """Increment a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Add a timing to a histogram"""
+        with self._lock:
+            histogram = self.timings.get(name)
+            if histogram is None:
+                histogram = self.timings[name] = Histogram()
+            histogram.add(seconds)
+
+    def snapshot(self):
+        """
+        Current counters and timing histograms
+
+        Returns
+        -------
+        dict
+            Counters and timing histograms by name
+        """
+        with self._lock:
+            return dict(counters=dict(self.counters),
+                        timings={name: histogram.asdict() for name, histogram in self.timings.items()})
+
+    def reset(self):
+        """Drop all counters and timings"""
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+
+class CallbackSink:
+    """
+    Sink passing every measurement to a callback
+
+    Parameters
+    ----------
+    callback : callable
+        Called with the kind of measurement ('counter' or 'timing'), its name and value (increment or seconds).
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def increment(self, name, value=1):
+        """Pass a counter increment to the callback"""
+        self.callback('counter', name, value)
+
+    def observe(self, name, seconds):
+        """Pass a timing to the callback"""
+        self.callback('timing', name, seconds)
+
+
+class _NullTimer:
+    """Context manager doing nothing, used when instrumentation is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_null_timer = _NullTimer()
+
+
+class _Timer:
+    """Context manager timing a stage"""
+    __slots__ = ('sink', 'name', 'start')
+
+    def __init__(self, sink, name):
+        self.sink = sink
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sink.observe(self.name, time.perf_counter() - self.start)
+
+
+def enable(sink=None):
+    """
+    Enable instrumentation
+
+    Parameters
+    ----------
+    sink : object, optional
+        Sink receiving measurements, with methods `increment(name, value)` and `observe(name, seconds)`. By default a
+        new `InMemorySink`.
+
+    Returns
+    -------
+    object
+        The sink
+    """
+    global _sink
+    _sink = InMemorySink() if sink is None else sink
+    return _sink
+
+
+def disable():
+    """
+    Disable instrumentation
+    """
+    global _sink
+    _sink = None
+
+
+def get_sink():
+    """
+    Sink receiving measurements
+
+    Returns
+    -------
+    object or None
+        The sink, None if instrumentation is disabled
+    """
+    return _sink
+
+
+def timer(name):
+    """
+    Context manager timing a stage, if instrumentation is enabled
+
+    Parameters
+    ----------
+    name : str
+        Stage name
+    """
+    sink = _sink
+    return _null_timer if sink is None else _Timer(sink, name)
+
+
+def increment(name, value=1):
+    """
+    Increment a counter, if instrumentation is enabled
+
+    Parameters
+    ----------
+    name : str
+        Counter name
+    value : int, optional
+        Increment
+    """
+    sink = _sink
+    if sink is not None:
+        sink.increment(name, value)
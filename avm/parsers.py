@@ -0,0 +1,343 @@
+#!/usr/bin/python3
+"""
+Parser backends for the Application Version Manager XML file
+"""
+import logging
+from xml.parsers import expat
+from . import layouts
+from .records import VersionRecord, Application, registry
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# number of bytes fed to the streaming parser at a time
+CHUNK_SIZE = 64 * 1024
+
+
+def _version_record(getattr_):
+    """
+    Build the record of an application version
+
+    Parameters
+    ----------
+    getattr_ : callable
+        Function returning the value of an attribute of the 'Version' element, or an empty string if it is missing.
+
+    Returns
+    -------
+    VersionRecord
+        Version record
+    """
+    return VersionRecord(
+        versionnumber=getattr_('VersionNumber').lower(),  # lowercase for increased robustness
+        exepath=getattr_('ExeFilePath'),
+        default=getattr_('IsDefault').lower() == 'true',
+        installdir=getattr_('InstallDir'),
+        platform=getattr_('Platform'),
+        producttype=getattr_('ProductType'),
+        category=getattr_('Category')
+    )
+
+
+def parse_minidom(appverxml):
+    """
+    Parse the xml file by building the complete document tree with `xml.dom.minidom`
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    from xml.dom import minidom
+
+    apps = []
+    for app in minidom.parse(appverxml).getElementsByTagName('Application'):
+        appname = app.getAttribute('Name').lower()  # lowercase for increased robustness
+        records = []
+        for version in app.getElementsByTagName('Version'):
+            records.append(_version_record(version.getAttribute))
+
+        apps.append(Application(appname, records))
+
+    return registry(apps)
+
+
+def iter_applications(appverxml, appname=None):
+    """
+    Stream the applications in the xml file, without building a document tree
+
+    The file is fed to an expat parser in chunks of `CHUNK_SIZE` bytes, and each application is yielded as soon as its
+    'Application' element is closed, so memory use does not depend on the size of the file. Reading stops when the
+    generator is closed.
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    appname : str, optional
+        Only yield applications with this (lowercase) name, the versions of other applications are skipped without
+        being built. By default all applications are yielded.
+
+    Yields
+    ------
+    Application
+        Application and its versions
+
+    Raises
+    ------
+    xml.parsers.expat.ExpatError
+        If the file is not well-formed xml
+    """
+    parser = expat.ParserCreate()
+    completed = []
+    state = dict(depth=0, appname=None, records=None)
+
+    def start_element(name, attrs):
+        if name == 'Application':
+            if state['depth'] == 0:
+                state['appname'] = attrs.get('Name', '').lower()  # lowercase for increased robustness
+                skip = appname is not None and state['appname'] != appname
+                state['records'] = None if skip else []
+            state['depth'] += 1
+        elif name == 'Version' and state['records'] is not None:
+            state['records'].append(_version_record(lambda key: attrs.get(key, '')))
+
+    def end_element(name):
+        if name == 'Application':
+            state['depth'] -= 1
+            if state['depth'] == 0:
+                if state['records'] is not None:
+                    completed.append(Application(state['appname'], state['records']))
+                state['records'] = None
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+
+    with open(appverxml, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            yield from completed
+            completed.clear()
+            if not chunk:
+                break
+
+
+def iter_versions(appverxml, appnames=None, select=None):
+    """
+    Stream the application versions in the xml file, one record per 'Version' element as it is parsed
+
+    Like `iter_applications` the file is fed to an expat parser in chunks, but versions are yielded without collecting
+    the versions of their application first, so memory use is constant even for applications with many versions.
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    appnames : set, optional
+        Only yield versions of applications with these (lowercase) names, the versions of other applications are
+        skipped without being built. By default versions of all applications are yielded.
+    select : callable, optional
+        Called with the application name and the version record, only versions for which it returns true are yielded.
+
+    Yields
+    ------
+    tuple
+        Application name (lowercase) and version record, in the order they are listed. Unlike the parsed registry,
+        versions listed more than once are yielded every time.
+
+    Raises
+    ------
+    xml.parsers.expat.ExpatError
+        If the file is not well-formed xml
+    """
+    parser = expat.ParserCreate()
+    completed = []
+    state = dict(depth=0, appname=None, skip=True)
+
+    def start_element(name, attrs):
+        if name == 'Application':
+            if state['depth'] == 0:
+                state['appname'] = attrs.get('Name', '').lower()  # lowercase for increased robustness
+                state['skip'] = appnames is not None and state['appname'] not in appnames
+            state['depth'] += 1
+        elif name == 'Version' and state['depth'] and not state['skip']:
+            record = _version_record(lambda key: attrs.get(key, ''))
+            layout = layouts.template(state['appname'])
+            if layout is not None:
+                record = record._replace(executable=layouts.executable(layout, record))
+            if select is None or select(state['appname'], record):
+                completed.append((state['appname'], record))
+
+    def end_element(name):
+        if name == 'Application':
+            state['depth'] -= 1
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+
+    with open(appverxml, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            yield from completed
+            completed.clear()
+            if not chunk:
+                break
+
+
+def parse_expat(appverxml):
+    """
+    Parse the xml file with the streaming expat parser, see `iter_applications`
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    return registry(iter_applications(appverxml))
+
+
+def find_application_expat(appverxml, appname):
+    """
+    Find a single application with the streaming expat parser, stopping as soon as it is found
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    appname : str
+        Application name (lowercase)
+
+    Returns
+    -------
+    Application or None
+        Application and its versions, None if it is not registered
+
+    Notes
+    -----
+    Only the part of the file up to the end of the application is parsed, so errors in the xml beyond it are not
+    detected. If the application is listed more than once the first entry is returned, like in the parsed registry.
+    """
+    apps = iter_applications(appverxml, appname=appname)
+    try:
+        for app in apps:
+            return app
+    finally:
+        apps.close()
+
+    return None
+
+
+def find_application_minidom(appverxml, appname):
+    """
+    Find a single application by parsing the complete document tree with `xml.dom.minidom`
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    appname : str
+        Application name (lowercase)
+
+    Returns
+    -------
+    Application or None
+        Application and its versions, None if it is not registered
+    """
+    return parse_minidom(appverxml).get(appname)
+
+
+# available parser backends
+BACKENDS = dict(
+    expat=(parse_expat, find_application_expat),
+    minidom=(parse_minidom, find_application_minidom),
+)
+
+_backend = 'expat'
+
+
+def get_backend():
+    """
+    Name of the parser backend currently in use
+
+    Returns
+    -------
+    str
+        Backend name
+    """
+    return _backend
+
+
+def set_backend(name):
+    """
+    Select the parser backend used when parsing the xml file
+
+    Parameters
+    ----------
+    name : str
+        Backend name, one of `BACKENDS`
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}'. Choose from {', '.join(BACKENDS)}.")
+    _backend = name
+
+
+def parse(appverxml, backend=None):
+    """
+    Parse the xml file listing application-versions
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    backend : str, optional
+        Parser backend, by default the backend selected with `set_backend` is used (expat).
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    return _get_backend(backend)[0](appverxml)
+
+
+def find_application(appverxml, appname, backend=None):
+    """
+    Find a single application in the xml file listing application-versions
+
+    Parameters
+    ----------
+    appverxml : str
+        XML file listing application-versions
+    appname : str
+        Application name (lowercase)
+    backend : str, optional
+        Parser backend, by default the backend selected with `set_backend` is used (expat).
+
+    Returns
+    -------
+    Application or None
+        Application and its versions, None if it is not registered
+    """
+    return _get_backend(backend)[1](appverxml, appname)
+
+
+def _get_backend(backend=None):
+    """Parse and find functions of a parser backend"""
+    name = backend or _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend '{name}'. Choose from {', '.join(BACKENDS)}.")
+
+    return BACKENDS[name]
@@ -0,0 +1,300 @@
+#!/usr/bin/python3
+"""
+Record types for applications and versions registered in Application Version Manager
+"""
+import sys
+from bisect import bisect_left
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+from . import layouts
+
+# version attributes, in the order they are listed
+FIELDS = ('versionnumber', 'exepath', 'default', 'installdir', 'platform', 'producttype', 'category')
+
+# bypass the read-only attributes when constructing records
+_setattr = object.__setattr__
+_intern = sys.intern
+
+
+def version_key(versionnumber):
+    """
+    Sortable key of a version number
+
+    Parameters
+    ----------
+    versionnumber : str
+        Version number, f"{major}[.{minor}[.{patch}...]]"
+
+    Returns
+    -------
+    tuple
+        Integer version parts, with trailing zeros removed so that e.g. '9.5' and '9.5.0' are equal
+
+    Raises
+    ------
+    ValueError
+        If a version part is not an integer
+    """
+    parts = [int(part) for part in versionnumber.split('.')]
+    while parts and parts[-1] == 0:
+        parts.pop()
+
+    return tuple(parts)
+
+
+class VersionRecord(Mapping):
+    """
+    Immutable record of an application version
+
+    The attributes are available both as attributes and as a read-only mapping, e.g. `record.exepath` and
+    `record['exepath']`, so records can be used where the version dictionaries of earlier releases were used.
+
+    Parameters
+    ----------
+    versionnumber : str
+        Version number (lowercase)
+    exepath : str
+        Path to application executable
+    default : bool
+        Version is marked as default
+    installdir : str
+        Path to installation directory
+    platform : str
+        Platform, e.g. '32' or '64'
+    producttype : str
+        Product type
+    category : str
+        Category, e.g. 'Sesam'
+    executable : str, optional
+        Effective path to the executable, by default `exepath`. Computed from the layout rules when the application is
+        loaded, see `avm.layouts`. It is not one of the mapping keys, and it is not compared.
+    """
+    __slots__ = FIELDS + ('executable',)
+
+    def __init__(self, versionnumber, exepath, default, installdir, platform, producttype, category, executable=None):
+        _setattr(self, 'versionnumber', versionnumber)
+        _setattr(self, 'exepath', exepath)
+        _setattr(self, 'default', default)
+        _setattr(self, 'installdir', installdir)
+        _setattr(self, 'platform', _intern(platform))
+        _setattr(self, 'producttype', _intern(producttype))
+        _setattr(self, 'category', _intern(category))
+        _setattr(self, 'executable', exepath if executable is None else executable)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, VersionRecord):
+            return self._astuple() == other._astuple()
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash(self._astuple())
+
+    def __reduce__(self):
+        return type(self), self._astuple() + (self.executable,)
+
+    def _replace(self, **changes):
+        """
+        New record with some attributes replaced
+
+        Parameters
+        ----------
+        **changes
+            New attribute values by name. The executable is kept unless the paths change.
+
+        Returns
+        -------
+        VersionRecord
+            New record
+        """
+        values = dict(zip(FIELDS, self._astuple()))
+        if 'exepath' not in changes and 'installdir' not in changes:
+            values['executable'] = self.executable
+        values.update(changes)
+        return type(self)(**values)
+
+    def _astuple(self):
+        """Attribute values, in the order of `FIELDS`"""
+        return (self.versionnumber, self.exepath, self.default, self.installdir, self.platform, self.producttype,
+                self.category)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in FIELDS)})"
+
+
+class Application(Mapping):
+    """
+    Immutable read-only mapping of version numbers to version records of an application
+
+    The versions are indexed on construction: numeric version numbers are parsed once and sorted, and the default
+    version is located, so that the latest version (below some version) and the default version are found without
+    scanning the versions. Version numbers with non-numeric parts, e.g. '6.2-08', are not part of the index.
+
+    The executable of each version is computed on construction as well, from the layout rule of the application if
+    there is one, see `avm.layouts`.
+
+    Parameters
+    ----------
+    name : str
+        Application name (lowercase)
+    records : iterable
+        Version records, in the order they are listed. A later record replaces an earlier record with the same
+        version number.
+    """
+    __slots__ = ('name', '_versions', '_keys', '_sorted', 'default')
+
+    def __init__(self, name, records=()):
+        layout = layouts.template(name)
+        if layout is not None:
+            records = (record._replace(executable=layouts.executable(layout, record)) for record in records)
+        versions = {record.versionnumber: record for record in records}
+        indexed = []
+        default = None
+        for record in versions.values():
+            if record.default:
+                default = record
+            try:
+                indexed.append((version_key(record.versionnumber), record))
+            except ValueError:
+                continue
+        indexed.sort(key=lambda item: item[0])
+
+        _setattr(self, 'name', name)
+        _setattr(self, '_versions', versions)
+        _setattr(self, '_keys', tuple(key for key, _ in indexed))
+        _setattr(self, '_sorted', tuple(record for _, record in indexed))
+        _setattr(self, 'default', default)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only")
+
+    def __getitem__(self, versionnumber):
+        return self._versions[versionnumber]
+
+    def __iter__(self):
+        return iter(self._versions)
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __eq__(self, other):
+        if isinstance(other, Application):
+            return self._versions == other._versions
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash((self.name, tuple(self._versions.values())))
+
+    def __reduce__(self):
+        return type(self), (self.name, tuple(self._versions.values()))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, versions={list(self._versions)!r})"
+
+    @property
+    def records(self):
+        """tuple: Version records, in the order they are listed"""
+        return tuple(self._versions.values())
+
+    @property
+    def sorted(self):
+        """tuple: Version records with numeric version numbers, from oldest to latest"""
+        return self._sorted
+
+    @property
+    def version_keys(self):
+        """tuple: Version keys of the records in `sorted`, see `version_key`, for bisection"""
+        return self._keys
+
+    @property
+    def unindexed(self):
+        """tuple: Version numbers with non-numeric parts, which are not part of the version index"""
+        indexed = set(record.versionnumber for record in self._sorted)
+        return tuple(versionnumber for versionnumber in self._versions if versionnumber not in indexed)
+
+    def latest(self, below=None):
+        """
+        Latest version, optionally below a certain version
+
+        Parameters
+        ----------
+        below : tuple, optional
+            Version key, see `version_key`, below which to return the latest version. By default the latest version
+            is returned.
+
+        Returns
+        -------
+        VersionRecord or None
+            Latest version, None if there is no version (below the specified version)
+        """
+        i = len(self._keys) if below is None else bisect_left(self._keys, below)
+        return self._sorted[i - 1] if i else None
+
+
+def registry(applications):
+    """
+    Read-only registry of applications
+
+    Parameters
+    ----------
+    applications : iterable
+        Applications, in the order they are listed. If an application is listed more than once the first entry is
+        kept, as the lookup of a single application stops at the first entry, see `parsers.find_application_expat`.
+
+    Returns
+    -------
+    types.MappingProxyType
+        Read-only mapping of application names to applications
+    """
+    data = dict()
+    for app in applications:
+        data.setdefault(app.name, app)
+    return MappingProxyType(data)
+
+
+class Resolution(namedtuple('Resolution', ('appname', 'version', 'versionnumber', 'exepath', 'installdir', 'reason'),
+                            defaults=(None, None, None, None, None))):
+    """
+    Result of resolving an application version, see `avm.resolve_many`
+
+    Attributes
+    ----------
+    appname : str
+        Requested application name
+    version : str or None
+        Requested version, None for the default version
+    versionnumber : str or None
+        Resolved version number, None if the application or version is not registered
+    exepath : str or None
+        Absolute path to the application executable, None if it does not exist
+    installdir : str or None
+        Absolute path to the installation directory, None if it does not exist
+    reason : str or None
+        Reason for failing to resolve the executable, None on success
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """bool: The executable was resolved"""
+        return self.reason is None
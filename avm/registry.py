@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+"""
+Registry of applications owning a parsed snapshot of the Application Version Manager XML file
+"""
+import logging
+import threading
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+from . import layouts
+from .avm import _appverxml_signature, _load_registry
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+
+class RegistryDiff(namedtuple('RegistryDiff', ('added_applications', 'removed_applications', 'modified_applications',
+                                               'added_versions', 'removed_versions', 'modified_versions'),
+                              defaults=((), (), (), (), (), ()))):
+    """
+    Changes between two snapshots of a registry, see `Registry.refresh`
+
+    Attributes
+    ----------
+    added_applications : tuple
+        Names of added applications
+    removed_applications : tuple
+        Names of removed applications
+    modified_applications : tuple
+        Names of applications with added, removed or modified versions
+    added_versions : tuple
+        (application name, version number) of added versions, including the versions of added applications
+    removed_versions : tuple
+        (application name, version number) of removed versions, including the versions of removed applications
+    modified_versions : tuple
+        (application name, version number) of versions with modified attributes, e.g. a changed default flag, or
+        a changed executable after the layout rules changed
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return any(len(changes) for changes in self)
+
+
+def diff(old, new):
+    """
+    Compare two snapshots of a registry, reusing unchanged applications of the old snapshot
+
+    Parameters
+    ----------
+    old : Mapping
+        Old mapping of application names to applications
+    new : Mapping
+        New mapping of application names to applications
+
+    Returns
+    -------
+    tuple
+        New snapshot (types.MappingProxyType), where applications that are unchanged are the objects of the old
+        snapshot, and the changes (RegistryDiff)
+    """
+    merged = dict()
+    added_apps, modified_apps, added, removed, modified = [], [], [], [], []
+    for appname, app in new.items():
+        old_app = old.get(appname)
+        if old_app is None:
+            added_apps.append(appname)
+            added.extend((appname, versionnumber) for versionnumber in app)
+        elif old_app == app and _same_executables(old_app, app):
+            app = old_app
+        else:
+            modified_apps.append(appname)
+            added.extend((appname, versionnumber) for versionnumber in app if versionnumber not in old_app)
+            removed.extend((appname, versionnumber) for versionnumber in old_app if versionnumber not in app)
+            modified.extend((appname, versionnumber) for versionnumber, record in app.items()
+                            if versionnumber in old_app and (old_app[versionnumber] != record or
+                                                             old_app[versionnumber].executable != record.executable))
+        merged[appname] = app
+
+    removed_apps = [appname for appname in old if appname not in new]
+    for appname in removed_apps:
+        removed.extend((appname, versionnumber) for versionnumber in old[appname])
+
+    changes = (added_apps, removed_apps, modified_apps, added, removed, modified)
+    return MappingProxyType(merged), RegistryDiff(*map(tuple, changes))
+
+
+def _same_executables(old_app, app):
+    """Equal applications have the same executables, which are not compared by the records, see `avm.layouts`"""
+    return all(record.executable == app[versionnumber].executable for versionnumber, record in old_app.items())
+
+
+class Registry(Mapping):
+    """
+    Applications registered in Application Version Manager, reloaded incrementally when the XML file changes
+
+    The registry is a read-only mapping of application names (lowercase) to applications. Call `refresh` to re-read
+    the XML file if it has changed. Applications that did not change keep their identity across refreshes, so data
+    derived from them remains valid.
+
+    The registry is safe to use from many threads. A refresh builds a new snapshot and swaps it in at once, so readers
+    never wait for a refresh in progress and never see a partially refreshed registry, and concurrent refreshes wait
+    for each other instead of parsing the file each.
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+        merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+    """
+
+    def __init__(self, appverxml=None):
+        self._appverxml = appverxml
+        self._snapshot = (MappingProxyType(dict()), None, None)  # applications, path and signature
+        self._layouts = None  # generation of the layout rules the executables were computed with
+        self._refresh_lock = threading.Lock()
+        self.refresh()
+
+    def __getitem__(self, appname):
+        return self._snapshot[0][appname.lower()]
+
+    def __iter__(self):
+        return iter(self._snapshot[0])
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+    def __contains__(self, appname):
+        return isinstance(appname, str) and appname.lower() in self._snapshot[0]
+
+    def __repr__(self):
+        data, path, _ = self._snapshot
+        return f"{type(self).__name__}({path!r}, applications={len(data)})"
+
+    @property
+    def path(self):
+        """str or tuple: Absolute path to the XML file, or the paths to the layered XML files"""
+        return self._snapshot[1]
+
+    @property
+    def signature(self):
+        """tuple: Stat signature of the XML file when it was loaded, or the signatures of the layered XML files"""
+        return self._snapshot[2]
+
+    @property
+    def applications(self):
+        """types.MappingProxyType: Current snapshot, a read-only mapping of application names to applications"""
+        return self._snapshot[0]
+
+    @property
+    def snapshot(self):
+        """tuple: Current snapshot, the path and the signature it was loaded from, consistent with each other"""
+        return self._snapshot
+
+    def refresh(self, force=False):
+        """
+        Re-read the XML file if it has changed since it was loaded, or if the layout rules have changed
+
+        Parameters
+        ----------
+        force : bool, optional
+            Re-read the XML file even if its stat signature and the layout rules are unchanged
+
+        Returns
+        -------
+        RegistryDiff
+            Added, removed and modified applications and versions. Empty (false) if nothing changed.
+        """
+        with self._refresh_lock:
+            current, current_path, current_signature = self._snapshot
+            path, signature = _appverxml_signature(self._appverxml)
+            generation = layouts.generation()
+            if (not force and path == current_path and signature == current_signature and
+                    generation == self._layouts):
+                return RegistryDiff()
+
+            data, changes = diff(current, _load_registry(path, signature))
+            self._snapshot = (data, path, signature)
+            self._layouts = generation
+
+        if changes:
+            logger.debug(f"Reloaded the xml file '{path}': {len(changes.added_applications)} added, "
+                         f"{len(changes.removed_applications)} removed and {len(changes.modified_applications)} "
+                         f"modified applications.")
+
+        return changes
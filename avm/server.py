@@ -0,0 +1,297 @@
+#!/usr/bin/python3
+"""
+Resolver daemon keeping parsed registries in memory, answering queries of `avm.client` over a Unix domain socket
+
+Start it with the `avm-serve` command. The daemon keeps a `Registry` per XML file (or layered XML files) it is asked
+about, and refreshes them in the background, so queries are answered without parsing or even checking the XML file.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from . import avm, client
+from .registry import Registry
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer the queries sent on a connection, one JSON object per line, until the client disconnects"""
+
+    def setup(self):
+        super().setup()
+        self.server.resolver._opened(self.connection)
+
+    def finish(self):
+        self.server.resolver._closed(self.connection)
+        super().finish()
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = dict(result=self.server.resolver.query(request['op'], **request.get('args', dict())))
+            except Exception as e:
+                response = dict(error=str(e), type=type(e).__name__)
+
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class Server:
+    """
+    Resolver daemon answering queries of `avm.client`
+
+    Parameters
+    ----------
+    path : str, optional
+        Path to the socket to listen on, by default `client.default_socket_path()`
+    refresh_interval : float, optional
+        Seconds between refreshes of the registries
+    max_registries : int, optional
+        Maximum number of registries kept in memory, the registry that was added first is dropped first.
+    """
+
+    def __init__(self, path=None, refresh_interval=1., max_registries=16):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError("Unix domain sockets are not supported on this platform.")
+
+        self.path = path or client.default_socket_path()
+        self.refresh_interval = refresh_interval
+        self.max_registries = max_registries
+        self._registries = dict()
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+
+    def registry(self, appverxml=None):
+        """
+        Registry of an XML file, created on first use
+
+        Parameters
+        ----------
+        appverxml : str or sequence, optional
+            XML file listing application-versions, or a sequence of layered XML files. By default the file in APPDATA
+            is applied.
+
+        Returns
+        -------
+        Registry
+            Registry of the XML file
+        """
+        key = tuple(appverxml) if isinstance(appverxml, list) else appverxml
+        registry = self._registries.get(key)
+        if registry is not None:
+            return registry
+
+        with self._lock:
+            registry = self._registries.get(key)
+            if registry is None:
+                try:
+                    registry = Registry(appverxml)
+                except FileNotFoundError:
+                    logger.error("Failed to load application version data", exc_info=True)
+                    raise FileNotFoundError("Failed to load application version data")
+
+                while len(self._registries) >= self.max_registries:
+                    del self._registries[next(iter(self._registries))]
+                self._registries[key] = registry
+
+        return registry
+
+    def refresh(self):
+        """
+        Refresh all registries, dropping the registries of XML files that no longer exist
+        """
+        for key, registry in list(self._registries.items()):
+            try:
+                registry.refresh()
+            except FileNotFoundError:
+                logger.warning(f"Dropping the registry of the removed xml file '{registry.path}'.")
+                with self._lock:
+                    self._registries.pop(key, None)
+            except Exception:
+                logger.warning(f"Failed to refresh the registry of the xml file '{registry.path}'.", exc_info=True)
+
+    def query(self, op, **kwargs):
+        """
+        Answer a query
+
+        Parameters
+        ----------
+        op : str
+            Query, one of `QUERIES`
+        **kwargs
+            Keyword arguments of the query
+
+        Returns
+        -------
+        object
+            JSON-serializable result
+        """
+        if op not in QUERIES:
+            raise KeyError(f"Unknown query '{op}'.")
+        return QUERIES[op](self, **kwargs)
+
+    def serve_forever(self, poll_interval=0.5):
+        """
+        Listen on the socket and answer queries until `shutdown` is called
+
+        Parameters
+        ----------
+        poll_interval : float, optional
+            Seconds between checks for shutdown
+        """
+        if os.path.exists(self.path):
+            # remove a stale socket, but never steal the socket of a running daemon
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.remove(self.path)
+            else:
+                raise OSError(f"An avm daemon is already listening on '{self.path}'.")
+            finally:
+                probe.close()
+
+        self._server = socketserver.ThreadingUnixStreamServer(self.path, _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.resolver = self
+        refresher = threading.Thread(target=self._refresh_forever, name='avm-refresh', daemon=True)
+        refresher.start()
+        logger.info(f"Listening on '{self.path}'.")
+        try:
+            self._server.serve_forever(poll_interval=poll_interval)
+        finally:
+            self._stop.set()
+            self._server.server_close()
+
+            # disconnect clients, so they fall back to in-process parsing
+            with self._lock:
+                connections = list(self._connections)
+            for connection in connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def shutdown(self):
+        """
+        Stop answering queries, called from another thread than `serve_forever`
+        """
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _opened(self, connection):
+        with self._lock:
+            self._connections.add(connection)
+
+    def _closed(self, connection):
+        with self._lock:
+            self._connections.discard(connection)
+
+    def _refresh_forever(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+
+def _snapshot(server, appverxml):
+    """Applications of a registry, and the path to the xml file and its stat signature they were loaded from"""
+    data, path, signature = server.registry(appverxml).snapshot
+    return data, (path, signature)
+
+
+def _exe_path(server, appname, version=None, appverxml=None, strict=False):
+    data, source = _snapshot(server, appverxml)
+    return avm._exe_path(data.get(appname.lower()), source, appname, version=version, strict=strict)
+
+
+def _installation_path(server, appname, version=None, appverxml=None, strict=False):
+    data, source = _snapshot(server, appverxml)
+    return avm._installation_path(data.get(appname.lower()), source, appname, version=version, strict=strict)
+
+
+def _default_version(server, appname, appverxml=None):
+    app = server.registry(appverxml).get(appname)
+    return None if app is None or app.default is None else app.default.versionnumber
+
+
+def _all_versions(server, appname, appverxml=None):
+    data, (path, signature) = _snapshot(server, appverxml)
+    app = data.get(appname.lower())
+    return [path, signature, None if app is None else client.encode_application(app)]
+
+
+def _latest_version(server, appname, below=None, appverxml=None):
+    below_key = avm._below_key(below)
+    return avm._latest_version(server.registry(appverxml).get(appname), appname, below, below_key)
+
+
+def _select_version(server, appname, specifier, appverxml=None):
+    return avm._select_version(server.registry(appverxml).get(appname), appname, specifier).versionnumber
+
+
+def _registered_applications(server, appverxml=None):
+    data, (path, signature) = _snapshot(server, appverxml)
+    return [path, signature, [client.encode_application(app) for app in data.values()]]
+
+
+def _resolve_many(server, requests, appverxml=None, max_workers=8, strict=False):
+    data, source = _snapshot(server, appverxml)
+    resolutions = avm._resolve_many(data, source, [tuple(item) for item in requests], max_workers=max_workers,
+                                    strict=strict)
+    return [list(resolution) for resolution in resolutions]
+
+
+def _ping(server):
+    return dict(pid=os.getpid(), registries=len(server._registries))
+
+
+# queries answered by the daemon
+QUERIES = dict(
+    exe_path=_exe_path,
+    installation_path=_installation_path,
+    default_version=_default_version,
+    all_versions=_all_versions,
+    latest_version=_latest_version,
+    select_version=_select_version,
+    registered_applications=_registered_applications,
+    resolve_many=_resolve_many,
+    ping=_ping,
+)
+
+
+def serve(path=None, refresh_interval=1., preload=()):
+    """
+    Run the resolver daemon until interrupted
+
+    Parameters
+    ----------
+    path : str, optional
+        Path to the socket to listen on, by default `client.default_socket_path()`
+    refresh_interval : float, optional
+        Seconds between refreshes of the registries
+    preload : iterable, optional
+        XML files to load before listening, None for the file in APPDATA
+    """
+    # the daemon answers queries itself, never by querying a daemon
+    client.disable()
+    server = Server(path, refresh_interval=refresh_interval)
+    for appverxml in preload:
+        server.registry(appverxml)
+
+    # stop cleanly when terminated, removing the socket
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopped.")
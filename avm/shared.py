@@ -0,0 +1,341 @@
+#!/usr/bin/python3
+"""
+Flat, read-only encoding of a parsed registry, shared between processes through a memory-mapped file
+
+The parent process publishes the registry once, and worker processes attach to it. Lookups read the memory-mapped
+file directly: only the application that is looked up is decoded, so attaching costs the same regardless of the size
+of the registry, and the pages of the file are shared between all processes by the operating system.
+
+>>> from concurrent.futures import ProcessPoolExecutor
+>>> from avm import shared
+>>> with shared.publish() as registry, ProcessPoolExecutor() as pool:
+...     paths = list(pool.map(registry.exe_path, ['wadam', 'sima']))
+
+A `SharedRegistry` is pickled as its path, so passing it to a worker attaches the worker to the same file.
+
+The file consists of a header followed by arrays of unsigned 32-bit integers and a blob of UTF-8 encoded strings, all
+referring to each other by index:
+
+- string offsets, string i is the bytes between offsets i and i+1 of the blob
+- applications, 4 integers per application: name, index of the first version, number of versions and index of the
+  default version (`NO_DEFAULT` if there is none)
+- application index, indices of the applications sorted by name, searched by bisection
+- versions, 7 integers per version: the fields of `VersionRecord`, with `default` as 0 or 1 and the others as strings
+"""
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from .records import FIELDS, VersionRecord, Application
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# file format, bump when the layout changes
+MAGIC = b'AVMFLAT1'
+HEADER = struct.Struct('<8sIIIQQQ')
+NO_DEFAULT = 0xFFFFFFFF
+
+# integers per application and per version
+_APP_WIDTH = 4
+_RECORD_WIDTH = len(FIELDS)
+
+# registries attached by unpickling, by path, so workers attach once
+_attached = dict()
+
+
+def encode(data, source):
+    """
+    Encode a registry in the flat format
+
+    Parameters
+    ----------
+    data : Mapping
+        Mapping of application names to applications
+    source : tuple
+        Absolute path to the xml file and its stat signature
+
+    Returns
+    -------
+    bytes
+        Encoded registry
+    """
+    from array import array
+
+    appverxml, signature = source
+    strings = dict()
+
+    def string(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    string(appverxml)
+    apps, records = array('I'), array('I')
+    for app in data.values():
+        first = len(records) // _RECORD_WIDTH
+        default = NO_DEFAULT
+        for i, record in enumerate(app.records):
+            if record is app.default:
+                default = first + i
+            records.extend(int(value) if field == 'default' else string(value)
+                           for field, value in zip(FIELDS, record._astuple()))
+        apps.extend((string(app.name), first, len(app), default))
+
+    names = list(strings)
+    index = array('I', sorted(range(len(apps) // _APP_WIDTH), key=lambda i: names[apps[i * _APP_WIDTH]]))
+    blobs = [name.encode('utf-8', 'surrogatepass') for name in names]
+    offsets = array('I', [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    header = HEADER.pack(MAGIC, len(apps) // _APP_WIDTH, len(records) // _RECORD_WIDTH, len(names), *signature)
+    return b''.join([header, offsets.tobytes(), apps.tobytes(), index.tobytes(), records.tobytes()] + blobs)
+
+
+def _layered_signature(signatures):
+    """
+    Signature of layered XML files, which changes when the stat signature of any of the layers changes
+
+    Parameters
+    ----------
+    signatures : tuple
+        Stat signature of each layer, see `avm.cache.file_signature`
+
+    Returns
+    -------
+    tuple
+        Signature with as many (unsigned 64-bit) integers as the signature of a single file
+    """
+    import hashlib
+
+    digest = hashlib.blake2b(repr(tuple(signatures)).encode('ascii'), digest_size=8 * len(signatures[0])).digest()
+    return struct.unpack(f'<{len(signatures[0])}Q', digest)
+
+
+def publish(appverxml=None, path=None):
+    """
+    Publish a registry for other processes to attach to
+
+    Parameters
+    ----------
+    appverxml : str or sequence, optional
+        XML file listing application-versions, or a sequence of layered XML files. By default the file in APPDATA is
+        applied.
+    path : str, optional
+        File to publish the registry to, by default a new temporary file
+
+    Returns
+    -------
+    SharedRegistry
+        Registry attached to the published file, which removes the file when it is closed
+    """
+    import tempfile
+    from .avm import _appverxml_signature, _registry_cache, _load_registry
+
+    source = _appverxml_signature(appverxml)
+    data = _registry_cache.get(*source, _load_registry)
+    if isinstance(source[0], tuple):
+        # layered registries are published under their joined paths, with a signature combining those of all layers
+        source = os.pathsep.join(source[0]), _layered_signature(source[1])
+
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='avm-', suffix='.registry')
+        os.close(fd)
+
+    # write to a temporary file which then replaces the published file, so readers never see a partial file
+    folder = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=folder, suffix='.tmp', delete=False) as f:
+        f.write(encode(data, source))
+    os.replace(f.name, path)
+    logger.debug(f"Published the registry of the xml file '{source[0]}' to '{path}'.")
+
+    return SharedRegistry(path, owner=True)
+
+
+def attach(path):
+    """
+    Attach to a published registry
+
+    Parameters
+    ----------
+    path : str
+        Published file, see `publish`
+
+    Returns
+    -------
+    SharedRegistry
+        Read-only registry
+    """
+    return SharedRegistry(path)
+
+
+def _reattach(path):
+    """Registry attached to a published file, reused by all registries unpickled in this process"""
+    registry = _attached.get(path)
+    if registry is None or registry.closed:
+        registry = _attached[path] = SharedRegistry(path)
+    return registry
+
+
+class SharedRegistry(Mapping):
+    """
+    Read-only mapping of application names to applications, backed by a memory-mapped file in the flat format
+
+    Applications are decoded on access. The lookup methods mirror the functions of the same name in `avm`, checking
+    paths with the same cache of path checks.
+
+    Parameters
+    ----------
+    path : str
+        Published file, see `publish`
+    owner : bool, optional
+        Remove the file when the registry is closed
+    """
+
+    def __init__(self, path, owner=False):
+        self.path = path
+        self.owner = owner
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self._mmap)
+        magic, n_apps, n_records, n_strings, *signature = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"The file '{path}' is not a published registry.")
+
+        # integer arrays, cast without copying
+        offset = HEADER.size
+        arrays = []
+        for length in (n_strings + 1, n_apps * _APP_WIDTH, n_apps, n_records * _RECORD_WIDTH):
+            arrays.append(view[offset:offset + 4 * length].cast('I'))
+            offset += 4 * length
+        self._offsets, self._apps, self._index, self._records = arrays
+        self._blob = view[offset:]
+        self._view = view
+        self._n_apps = n_apps
+        self.source = self._string(0), tuple(signature)
+
+    def __reduce__(self):
+        return _reattach, (self.path,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, applications={len(self)})"
+
+    @property
+    def closed(self):
+        """bool: The registry is detached from the file"""
+        return self._mmap.closed
+
+    def close(self):
+        """
+        Detach from the file, and remove it if this registry published it
+        """
+        if self._mmap.closed:
+            return
+
+        for view in (self._offsets, self._apps, self._index, self._records, self._blob, self._view):
+            view.release()
+        self._mmap.close()
+        if self.owner and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _string(self, index):
+        """Decode string number `index`"""
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8', 'surrogatepass')
+
+    def _find(self, appname):
+        """Index of an application, None if it is not registered"""
+        lo, hi = 0, self._n_apps
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = self._string(self._apps[self._index[mid] * _APP_WIDTH])
+            if name < appname:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_apps:
+            i = self._index[lo]
+            if self._string(self._apps[i * _APP_WIDTH]) == appname:
+                return i
+        return None
+
+    def _record(self, index):
+        """Decode version number `index`"""
+        values = self._records[index * _RECORD_WIDTH:(index + 1) * _RECORD_WIDTH]
+        return VersionRecord(*(bool(value) if field == 'default' else self._string(value)
+                               for field, value in zip(FIELDS, values)))
+
+    def _application(self, index):
+        """Decode application number `index`"""
+        name, first, count, _ = self._apps[index * _APP_WIDTH:(index + 1) * _APP_WIDTH]
+        return Application(self._string(name), (self._record(i) for i in range(first, first + count)))
+
+    def __getitem__(self, appname):
+        index = self._find(appname.lower()) if isinstance(appname, str) else None
+        if index is None:
+            raise KeyError(appname)
+        return self._application(index)
+
+    def __iter__(self):
+        for i in range(self._n_apps):
+            yield self._string(self._apps[i * _APP_WIDTH])
+
+    def __len__(self):
+        return self._n_apps
+
+    def __contains__(self, appname):
+        return isinstance(appname, str) and self._find(appname.lower()) is not None
+
+    def default_version(self, appname):
+        """Default version of an application, see `avm.default_version`"""
+        index = self._find(appname.lower())
+        if index is None:
+            logger.warning(f"Application '{appname}' is not registered in Application Version Manager.")
+            return None
+
+        default = self._apps[index * _APP_WIDTH + 3]
+        return None if default == NO_DEFAULT else self._string(self._records[default * _RECORD_WIDTH])
+
+    def all_versions(self, appname):
+        """All versions of an application, see `avm.all_versions`"""
+        app = self.get(appname)
+        if app is None:
+            logger.warning(f"Application '{appname}' is not registered in Application Version Manager.")
+        return app
+
+    def latest_version(self, appname, below=None):
+        """Latest version of an application, optionally below a certain version, see `avm.latest_version`"""
+        from .avm import _below_key, _latest_version
+
+        below_key = _below_key(below)
+        return _latest_version(self.get(appname), appname, below, below_key)
+
+    def exe_path(self, appname, version=None, strict=False):
+        """Quoted path to the executable of an application version if it exists, see `avm.exe_path`"""
+        from .avm import _exe_path
+
+        return _exe_path(self.get(appname), self.source, appname, version=version, strict=strict)
+
+    def installation_path(self, appname, version=None, strict=False):
+        """Quoted path to the installation directory of an application version if it exists, see
+        `avm.installation_path`"""
+        from .avm import _installation_path
+
+        return _installation_path(self.get(appname), self.source, appname, version=version, strict=strict)
+
+    def resolve_many(self, requests, max_workers=8, strict=False):
+        """Resolve the executables of many application versions, see `avm.resolve_many`"""
+        from .avm import _resolve_many
+
+        return _resolve_many(self, self.source, requests, max_workers=max_workers, strict=strict)
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""
+Persistent snapshots of parsed registries, for fast cold starts of new processes
+
+A snapshot is a compact `marshal` serialization of the parsed registry, stored in a user cache directory. It is keyed
+on the absolute path to the xml file, and only used if the stat signature stored with it matches the current signature
+of the xml file. Snapshots are disabled by default; enable them with `enable` or by setting the environmental variable
+`AVM_SNAPSHOT_DIR` to the directory to store them in.
+"""
+import logging
+import marshal
+import os
+import sys
+from .records import FIELDS, VersionRecord, Application, registry
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# snapshot format, bump when the layout of the snapshot changes
+MAGIC = 'avm-snapshot'
+FORMAT_VERSION = 1
+
+# environmental variable enabling snapshots, pointing to the directory to store them in
+SNAPSHOT_DIR_ENV = 'AVM_SNAPSHOT_DIR'
+
+_directory = None
+
+
+def default_directory():
+    """
+    Default directory to store snapshots in
+
+    Returns
+    -------
+    str
+        '%LOCALAPPDATA%\\avm\\Cache' on Windows, '$XDG_CACHE_HOME/avm' or '~/.cache/avm' elsewhere
+    """
+    if os.getenv('localappdata'):
+        return os.path.join(os.getenv('localappdata'), 'avm', 'Cache')
+
+    return os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'avm')
+
+
+def enable(directory=None):
+    """
+    Enable snapshots
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory to store snapshots in, see `default_directory`.
+    """
+    global _directory
+    _directory = directory or default_directory()
+
+
+def disable():
+    """
+    Disable snapshots, unless enabled by the environmental variable `AVM_SNAPSHOT_DIR`
+    """
+    global _directory
+    _directory = None
+
+
+def directory():
+    """
+    Directory snapshots are stored in
+
+    Returns
+    -------
+    str or None
+        Snapshot directory, None if snapshots are disabled
+    """
+    return _directory or os.getenv(SNAPSHOT_DIR_ENV) or None
+
+
+def snapshot_path(appverxml, folder=None):
+    """
+    Path to the snapshot of an xml file
+
+    Parameters
+    ----------
+    appverxml : str
+        Absolute path to the xml file
+    folder : str, optional
+        Snapshot directory, by default the current snapshot directory
+
+    Returns
+    -------
+    str
+        Path to snapshot file
+    """
+    import hashlib
+
+    name = hashlib.sha1(appverxml.encode('utf-8', 'surrogatepass')).hexdigest()
+    return os.path.join(folder or directory(), f'{name}.snapshot')
+
+
+def load(appverxml, signature):
+    """
+    Load the snapshot of an xml file, if it is valid
+
+    Parameters
+    ----------
+    appverxml : str
+        Absolute path to the xml file
+    signature : tuple
+        Current stat signature of the xml file
+
+    Returns
+    -------
+    types.MappingProxyType or None
+        Read-only mapping of application names to applications, None if snapshots are disabled or there is no valid
+        snapshot of the file.
+    """
+    folder = directory()
+    if folder is None:
+        return None
+
+    path = snapshot_path(appverxml, folder)
+    try:
+        with open(path, 'rb') as f:
+            header, apps = marshal.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError):
+        logger.debug(f"Ignoring unreadable snapshot '{path}'.", exc_info=True)
+        return None
+
+    if header != _header(appverxml, signature):
+        logger.debug(f"Ignoring stale snapshot '{path}' of the xml file '{appverxml}'.")
+        return None
+
+    try:
+        return registry(Application(name, (VersionRecord(*values) for values in records)) for name, records in apps)
+    except (TypeError, ValueError):
+        logger.debug(f"Ignoring corrupt snapshot '{path}'.", exc_info=True)
+        return None
+
+
+def write(appverxml, signature, data):
+    """
+    Write the snapshot of an xml file
+
+    The snapshot is written to a temporary file which then replaces the snapshot, so readers never see a partially
+    written snapshot. Failing to write the snapshot is logged, but not raised.
+
+    Parameters
+    ----------
+    appverxml : str
+        Absolute path to the xml file
+    signature : tuple
+        Stat signature of the xml file when it was parsed
+    data : Mapping
+        Mapping of application names to applications
+    """
+    folder = directory()
+    if folder is None:
+        return
+
+    import tempfile
+
+    apps = tuple((name, tuple(tuple(getattr(record, field) for field in FIELDS) for record in app.records))
+                 for name, app in data.items())
+    path = snapshot_path(appverxml, folder)
+    tmp = None
+    try:
+        os.makedirs(folder, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=folder, suffix='.tmp', delete=False) as f:
+            tmp = f.name
+            f.write(marshal.dumps((_header(appverxml, signature), apps)))
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning(f"Failed to write snapshot of the xml file '{appverxml}' to '{path}'.", exc_info=True)
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+    else:
+        logger.debug(f"Wrote snapshot of the xml file '{appverxml}' to '{path}'.")
+
+
+def _header(appverxml, signature):
+    """Header identifying the format, python version, xml file and its signature"""
+    return MAGIC, FORMAT_VERSION, tuple(sys.version_info[:2]), appverxml, tuple(signature)
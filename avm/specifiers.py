@@ -0,0 +1,330 @@
+#!/usr/bin/python3
+"""
+Version specifiers, selecting application versions by constraints such as '>=9.4,<10' or '~=4.20'
+
+A specifier is a comma-separated list of clauses which must all hold:
+
+- '==9.4.1', '!=9.4.1', '>=9.4', '>9.4', '<=10', '<10', or a bare version '9.4.1' meaning '==9.4.1'
+- '==9.4.*' and '!=9.4.*', any version starting with 9.4
+- '~=4.20', a compatible release, i.e. '>=4.20,==4.*', and '~=4.20.1' meaning '>=4.20.1,==4.20.*'
+- 'default', preferring the default version if it satisfies the other clauses
+
+The versions satisfying the clauses are found by bisection of the pre-sorted version keys of the application, see
+`Application.version_keys`, and the latest of them is selected unless the specifier prefers the default version. For
+instance 'default,>=6.3' selects the default version unless it is older than 6.3, and the latest version otherwise.
+Versions with non-numeric parts, e.g. '6.2-08', never satisfy version clauses.
+
+Specifiers are parsed once and cached, see `parse`.
+"""
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from .records import version_key
+
+# clause: operator, version and optional wildcard
+_CLAUSE = re.compile(r'^(==|!=|>=|<=|~=|>|<)?\s*(\d+(?:\.\d+)*)(\.\*)?$')
+
+# characters a specifier can start with, unlike a version number
+_OPERATOR_CHARS = '=!<>~'
+
+# maximum number of versions listed in error messages
+_MAX_LISTED = 10
+
+
+class InvalidSpecifier(ValueError):
+    """Specifier which can not be parsed"""
+
+
+class UnsatisfiableSpecifier(ValueError):
+    """Specifier which no version satisfies, either because its clauses contradict each other or because no registered
+    version of the application satisfies it"""
+
+
+def is_specifier(text):
+    """
+    Check if a version string is a specifier rather than a plain version number
+
+    Parameters
+    ----------
+    text : str
+        Version string
+
+    Returns
+    -------
+    bool
+        True if the string starts with an operator, contains several clauses or is 'default'
+    """
+    text = text.strip()
+    return bool(text) and (text[0] in _OPERATOR_CHARS or ',' in text or text.lower() == 'default')
+
+
+@lru_cache(maxsize=256)
+def parse(text):
+    """
+    Parse a specifier, cached so that each specifier is parsed once
+
+    Parameters
+    ----------
+    text : str
+        Specifier, e.g. '>=9.4,<10'
+
+    Returns
+    -------
+    Specifier
+        Parsed specifier
+
+    Raises
+    ------
+    InvalidSpecifier
+        If the specifier can not be parsed
+    UnsatisfiableSpecifier
+        If the clauses of the specifier contradict each other
+    """
+    return Specifier(text)
+
+
+def _bump(parts):
+    """Key of the first version not starting with `parts`, e.g. (9, 5) for (9, 4)"""
+    return version_key('.'.join(map(str, parts[:-1] + (parts[-1] + 1,))))
+
+
+class Specifier:
+    """
+    Parsed version specifier, see the module documentation for the syntax
+
+    Parameters
+    ----------
+    text : str
+        Specifier, e.g. '>=9.4,<10'
+
+    Attributes
+    ----------
+    lower, upper : tuple or None
+        Version keys bounding the satisfying versions, None if unbounded
+    lower_inclusive, upper_inclusive : bool
+        Bounds are inclusive
+    excluded : tuple
+        Excluded ranges of version keys, (lower, upper, upper inclusive)
+    prefer_default : bool
+        Prefer the default version if it satisfies the specifier
+
+    Raises
+    ------
+    InvalidSpecifier
+        If the specifier can not be parsed
+    UnsatisfiableSpecifier
+        If the clauses of the specifier contradict each other
+    """
+    __slots__ = ('text', 'lower', 'lower_inclusive', 'upper', 'upper_inclusive', 'excluded', 'prefer_default')
+
+    def __init__(self, text):
+        self.text = text.strip()
+        self.lower, self.lower_inclusive = None, True
+        self.upper, self.upper_inclusive = None, True
+        self.prefer_default = False
+        excluded = []
+
+        for clause in self.text.split(','):
+            clause = clause.strip()
+            if clause.lower() == 'default':
+                self.prefer_default = True
+                continue
+
+            match = _CLAUSE.match(clause)
+            if match is None:
+                raise InvalidSpecifier(f"Invalid clause '{clause}' in version specifier '{self.text}'.")
+
+            op, version, wildcard = match.groups()
+            op = op or '=='
+            parts = tuple(int(part) for part in version.split('.'))
+            key = version_key(version)
+            if wildcard and op not in ('==', '!='):
+                raise InvalidSpecifier(f"Wildcards are only allowed with '==' and '!=' in version specifier "
+                                       f"'{self.text}'.")
+
+            if op == '~=':
+                if len(parts) < 2:
+                    raise InvalidSpecifier(f"'~=' requires at least two version parts in version specifier "
+                                           f"'{self.text}'.")
+                self._bound_lower(key, True)
+                self._bound_upper(_bump(parts[:-1]), False)
+            elif op == '==' and wildcard:
+                self._bound_lower(key, True)
+                self._bound_upper(_bump(parts), False)
+            elif op == '==':
+                self._bound_lower(key, True)
+                self._bound_upper(key, True)
+            elif op == '!=':
+                excluded.append((key, _bump(parts), False) if wildcard else (key, key, True))
+            elif op in ('>=', '>'):
+                self._bound_lower(key, op == '>=')
+            else:
+                self._bound_upper(key, op == '<=')
+
+        self.excluded = tuple(excluded)
+        if self._empty():
+            raise UnsatisfiableSpecifier(f"The clauses of version specifier '{self.text}' contradict each other, no "
+                                         f"version can satisfy it.")
+
+    def _bound_lower(self, key, inclusive):
+        if self.lower is None or key > self.lower:
+            self.lower, self.lower_inclusive = key, inclusive
+        elif key == self.lower:
+            self.lower_inclusive = self.lower_inclusive and inclusive
+
+    def _bound_upper(self, key, inclusive):
+        if self.upper is None or key < self.upper:
+            self.upper, self.upper_inclusive = key, inclusive
+        elif key == self.upper:
+            self.upper_inclusive = self.upper_inclusive and inclusive
+
+    def _empty(self):
+        """The bounds and exclusions leave no version"""
+        if self.lower is None or self.upper is None:
+            return False
+        if self.lower > self.upper:
+            return True
+        if self.lower == self.upper:
+            return not (self.lower_inclusive and self.upper_inclusive) or self._is_excluded(self.lower)
+        return False
+
+    def _is_excluded(self, key):
+        return any(lo <= key and (key <= hi if inclusive else key < hi) for lo, hi, inclusive in self.excluded)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r})"
+
+    def __str__(self):
+        return self.text
+
+    def __eq__(self, other):
+        if isinstance(other, Specifier):
+            return self._state() == other._state()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._state())
+
+    def _state(self):
+        return (self.lower, self.lower_inclusive, self.upper, self.upper_inclusive, self.excluded,
+                self.prefer_default)
+
+    @property
+    def constrained(self):
+        """bool: The specifier has version clauses, i.e. it is more than 'default'"""
+        return self.lower is not None or self.upper is not None or bool(self.excluded)
+
+    def contains(self, versionnumber):
+        """
+        Check if a version satisfies the version clauses of the specifier
+
+        Parameters
+        ----------
+        versionnumber : str
+            Version number
+
+        Returns
+        -------
+        bool
+            True if the version satisfies the specifier. Versions with non-numeric parts only satisfy specifiers
+            without version clauses.
+        """
+        try:
+            key = version_key(versionnumber)
+        except ValueError:
+            return not self.constrained
+
+        if self.lower is not None and (key < self.lower or (key == self.lower and not self.lower_inclusive)):
+            return False
+        if self.upper is not None and (key > self.upper or (key == self.upper and not self.upper_inclusive)):
+            return False
+        return not self._is_excluded(key)
+
+    def _range(self, app):
+        """Slice of the sorted versions of an application within the bounds"""
+        keys = app.version_keys
+        if self.lower is None:
+            lo = 0
+        else:
+            lo = (bisect_left if self.lower_inclusive else bisect_right)(keys, self.lower)
+        if self.upper is None:
+            hi = len(keys)
+        else:
+            hi = (bisect_right if self.upper_inclusive else bisect_left)(keys, self.upper)
+        return lo, hi
+
+    def filter(self, app):
+        """
+        Versions of an application satisfying the version clauses
+
+        Parameters
+        ----------
+        app : Application
+            Application
+
+        Returns
+        -------
+        tuple
+            Version records, from oldest to latest
+        """
+        lo, hi = self._range(app)
+        keys, records = app.version_keys, app.sorted
+        if not self.excluded:
+            return records[lo:hi]
+        return tuple(records[i] for i in range(lo, hi) if not self._is_excluded(keys[i]))
+
+    def select(self, app):
+        """
+        Version of an application selected by the specifier
+
+        Parameters
+        ----------
+        app : Application
+            Application
+
+        Returns
+        -------
+        VersionRecord or None
+            The default version if preferred and it satisfies the specifier, otherwise the latest version satisfying
+            the specifier. None if no version satisfies it.
+        """
+        if self.prefer_default and app.default is not None and self.contains(app.default.versionnumber):
+            return app.default
+        if self.prefer_default and not self.constrained:
+            return None
+
+        lo, hi = self._range(app)
+        keys, records = app.version_keys, app.sorted
+        for i in range(hi - 1, lo - 1, -1):
+            if not self._is_excluded(keys[i]):
+                return records[i]
+        return None
+
+    def unsatisfied(self, app, appname=None):
+        """
+        Error explaining that no version of an application satisfies the specifier
+
+        Parameters
+        ----------
+        app : Application or None
+            Application, None if it is not registered
+        appname : str, optional
+            Application name, by default the name of the application
+
+        Returns
+        -------
+        UnsatisfiableSpecifier
+            Error listing the registered versions
+        """
+        appname = appname or app.name
+        if app is None:
+            return UnsatisfiableSpecifier(f"Application '{appname}' is not registered in Application Version Manager, "
+                                          f"no version satisfies '{self.text}'.")
+        if self.prefer_default and not self.constrained:
+            return UnsatisfiableSpecifier(f"There is no default version registered for application '{appname}', no "
+                                          f"version satisfies '{self.text}'.")
+
+        versions = [record.versionnumber for record in app.sorted]
+        listed = ', '.join(versions if len(versions) <= _MAX_LISTED else versions[:3] + ['...'] + versions[-6:])
+        return UnsatisfiableSpecifier(f"No version of application '{appname}' satisfies '{self.text}'. Registered "
+                                      f"versions: {listed or 'none'}.")
@@ -0,0 +1,372 @@
+#!/usr/bin/python3
+"""
+Indexed store of application versions in a local SQLite database, for queries across large or many XML files
+
+Scanning the parsed registry answers a lookup by application name in constant time, but queries on other attributes,
+such as all 64-bit versions in the category 'Sesam' or every application whose default version is installed below a
+certain directory, visit every version of every application. The store keeps the versions of any number of XML files
+in a SQLite database, indexed on application name, version, default flag, category and platform, so such queries
+only visit the matching versions.
+
+>>> from avm.store import Store
+>>> store = Store('avm.sqlite')
+>>> store.ingest(['node001.xml', 'node002.xml'])
+>>> store.query(category='Sesam', platform='64')
+>>> store.query(default=True, installdir='C:\\Program Files\\DNV')
+>>> store.application('wadam', appverxml='node001.xml')
+
+Ingesting is incremental: an XML file is only parsed again if its stat signature (modification time, size and inode)
+differs from the signature stored when it was last ingested, in which case its versions are replaced in a single
+transaction. Queries return the same record types as `avm.registered_applications` and `avm.iter_versions`, with the
+executables computed from the current layout rules, see `avm.layouts`.
+
+The store is optional and only depends on the `sqlite3` module of the standard library, which is imported on first use.
+"""
+import logging
+import os
+import threading
+from .records import VersionRecord, Application, registry, version_key
+
+# configure logger
+logger = logging.getLogger(__name__)
+
+# layout of the database, bump when the schema changes. Databases of another format are rebuilt.
+FORMAT_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    ino INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    file INTEGER NOT NULL REFERENCES files(id),
+    position INTEGER NOT NULL,
+    appname TEXT NOT NULL,
+    versionnumber TEXT NOT NULL,
+    key BLOB,
+    exepath TEXT NOT NULL,
+    is_default INTEGER NOT NULL,
+    installdir TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    producttype TEXT NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_file ON versions (file, position);
+CREATE INDEX IF NOT EXISTS versions_app ON versions (appname, key);
+CREATE INDEX IF NOT EXISTS versions_default ON versions (is_default, installdir);
+CREATE INDEX IF NOT EXISTS versions_category ON versions (category COLLATE NOCASE, platform COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS versions_platform ON versions (platform COLLATE NOCASE);
+"""
+
+# stored columns of a version, in the order of `FIELDS`
+_COLUMNS = ('versionnumber', 'exepath', 'is_default', 'installdir', 'platform', 'producttype', 'category')
+
+# largest version part which is indexed
+_MAX_PART = 2 ** 32 - 1
+
+
+class Store:
+    """
+    Application versions of XML files in an indexed SQLite database, see the module documentation
+
+    The store may be shared between threads, operations are serialized.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path to the database file, created if it does not exist. By default the database is kept in memory.
+    """
+
+    def __init__(self, path=':memory:'):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            (format_version,), = self._connection.execute('PRAGMA user_version')
+            if format_version not in (0, FORMAT_VERSION):
+                logger.debug(f"Rebuilding the store '{path}' of format {format_version}.")
+                self._connection.executescript('DROP TABLE IF EXISTS versions; DROP TABLE IF EXISTS files;')
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f'PRAGMA user_version = {FORMAT_VERSION}')
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Close the database"""
+        with self._lock:
+            self._connection.close()
+
+    def ingest(self, appverxml=None):
+        """
+        Ingest the versions of XML files which are new or changed since they were last ingested
+
+        Parameters
+        ----------
+        appverxml : str or sequence, optional
+            XML file listing application-versions, or a sequence of XML files. By default the file in APPDATA is
+            applied.
+
+        Returns
+        -------
+        int
+            Number of XML files parsed, the other files are unchanged
+
+        Raises
+        ------
+        FileNotFoundError
+            If an XML file does not exist. The files before it are ingested.
+        """
+        from .avm import _appverxml_signature, _stream_versions
+
+        count = 0
+        for layer in (appverxml if isinstance(appverxml, (list, tuple)) else [appverxml]):
+            path, signature = _appverxml_signature(layer)
+            with self._lock:
+                stored = self._connection.execute('SELECT id, mtime_ns, size, ino FROM files WHERE path = ?',
+                                                  (path,)).fetchone()
+                if stored is not None and tuple(stored[1:]) == signature:
+                    continue
+
+                with self._connection:
+                    if stored is None:
+                        file = self._connection.execute('INSERT INTO files (path, mtime_ns, size, ino) VALUES (?, ?, ?, ?)',
+                                                        (path,) + signature).lastrowid
+                    else:
+                        file = stored[0]
+                        self._connection.execute('UPDATE files SET mtime_ns = ?, size = ?, ino = ? WHERE id = ?',
+                                                 signature + (file,))
+                        self._connection.execute('DELETE FROM versions WHERE file = ?', (file,))
+                    rows = ((file, position, appname, _key(record.versionnumber)) + record._astuple()
+                            for position, (appname, record) in enumerate(_stream_versions(path)))
+                    self._connection.executemany(
+                        f"INSERT INTO versions (file, position, appname, key, {', '.join(_COLUMNS)}) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+            logger.debug(f"Ingested the xml file '{path}'.")
+            count += 1
+
+        return count
+
+    def remove(self, appverxml):
+        """
+        Remove the versions of an XML file from the store
+
+        Parameters
+        ----------
+        appverxml : str
+            XML file listing application-versions, it need not exist
+
+        Returns
+        -------
+        bool
+            True if the file was in the store
+        """
+        path = os.path.abspath(appverxml)
+        with self._lock, self._connection:
+            stored = self._connection.execute('SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+            if stored is None:
+                return False
+            self._connection.execute('DELETE FROM versions WHERE file = ?', stored)
+            self._connection.execute('DELETE FROM files WHERE id = ?', stored)
+        return True
+
+    def sources(self):
+        """
+        XML files in the store
+
+        Returns
+        -------
+        list
+            Absolute paths to the XML files, sorted
+        """
+        with self._lock:
+            return [path for path, in self._connection.execute('SELECT path FROM files ORDER BY path')]
+
+    def query(self, appnames=None, version=None, category=None, platform=None, default=None, installdir=None,
+              appverxml=None):
+        """
+        Versions matching all of the given conditions
+
+        Parameters
+        ----------
+        appnames : iterable, optional
+            Only versions of these applications. By default all applications.
+        version : str, optional
+            Version number or version specifier, e.g. '9.5.3' or '>=9.4,<10'. The 'default' clause of a specifier is
+            ignored, see `default`.
+        category : str, optional
+            Only versions in this category, e.g. 'Sesam' (case-insensitive)
+        platform : str, optional
+            Only versions for this platform, e.g. '64' (case-insensitive)
+        default : bool, optional
+            Only versions marked (True) or not marked (False) as default
+        installdir : str, optional
+            Only versions installed in this directory or below it
+        appverxml : str or sequence, optional
+            Only versions listed in this XML file, or in these XML files. By default all XML files in the store.
+
+        Returns
+        -------
+        list
+            Application name (lowercase) and version record (VersionRecord) of each version, per XML file in the order
+            they are listed
+        """
+        from . import layouts, specifiers
+
+        conditions, parameters = [], []
+        if appnames is not None:
+            appnames = sorted(set(appname.lower() for appname in appnames))
+            conditions.append(f"appname IN ({', '.join('?' * len(appnames))})")
+            parameters.extend(appnames)
+        if version is not None and specifiers.is_specifier(version):
+            specifier = specifiers.parse(version)
+            if specifier.constrained:
+                conditions.append('key IS NOT NULL')
+            if specifier.lower is not None:
+                conditions.append(f"key {'>=' if specifier.lower_inclusive else '>'} ?")
+                parameters.append(_encode(specifier.lower))
+            if specifier.upper is not None:
+                conditions.append(f"key {'<=' if specifier.upper_inclusive else '<'} ?")
+                parameters.append(_encode(specifier.upper))
+        elif version is not None:
+            specifier = None
+            conditions.append('versionnumber = ?')
+            parameters.append(version.lower())
+        else:
+            specifier = None
+        if category is not None:
+            conditions.append('category = ? COLLATE NOCASE')
+            parameters.append(category)
+        if platform is not None:
+            conditions.append('platform = ? COLLATE NOCASE')
+            parameters.append(platform)
+        if default is not None:
+            conditions.append('is_default = ?')
+            parameters.append(int(bool(default)))
+        if installdir is not None:
+            base = installdir.rstrip('/\\')
+            conditions.append('installdir >= ? AND installdir < ?')
+            parameters.extend((base, base + '\U0010ffff'))
+        if appverxml is not None:
+            paths = [os.path.abspath(path) for path in (appverxml if isinstance(appverxml, (list, tuple)) else
+                                                        [appverxml])]
+            conditions.append(f"file IN (SELECT id FROM files WHERE path IN ({', '.join('?' * len(paths))}))")
+            parameters.extend(paths)
+
+        sql = (f"SELECT appname, {', '.join(_COLUMNS)} FROM versions{' WHERE ' if conditions else ''}"
+               f"{' AND '.join(conditions)} ORDER BY file, position")
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+
+        templates = dict()
+        versions = []
+        for appname, *values in rows:
+            if specifier is not None and specifier.excluded and not specifier.contains(values[0]):
+                continue
+            if installdir is not None and values[3][len(base):len(base) + 1] not in ('', '/', '\\'):
+                continue
+            record = VersionRecord(*values[:2], bool(values[2]), *values[3:])
+            if appname not in templates:
+                templates[appname] = layouts.template(appname)
+            if templates[appname] is not None:
+                record = record._replace(executable=layouts.executable(templates[appname], record))
+            versions.append((appname, record))
+
+        return versions
+
+    def application(self, appname, appverxml=None):
+        """
+        Application as registered in an XML file in the store
+
+        Parameters
+        ----------
+        appname : str
+            Application name
+        appverxml : str or sequence, optional
+            XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+            merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+
+        Returns
+        -------
+        Application or None
+            Application and its versions, None if it is not registered
+
+        Raises
+        ------
+        KeyError
+            If an XML file is not in the store
+        """
+        return self.applications(appverxml, appnames=[appname]).get(appname.lower())
+
+    def applications(self, appverxml=None, appnames=None):
+        """
+        Applications as registered in an XML file in the store, equal to `avm.registered_applications` for the file
+        as it was ingested
+
+        Parameters
+        ----------
+        appverxml : str or sequence, optional
+            XML file listing application-versions. By default the file in APPDATA is applied. A sequence of XML files is
+            merged into a layered registry, from highest to lowest precedence, see `avm.layers`.
+        appnames : iterable, optional
+            Only these applications. By default all applications.
+
+        Returns
+        -------
+        types.MappingProxyType
+            Read-only mapping of application names to applications
+
+        Raises
+        ------
+        KeyError
+            If an XML file is not in the store
+        """
+        from .avm import _cache_key
+
+        if isinstance(appverxml, (list, tuple)):
+            from . import layers
+
+            return layers.merge([self.applications(layer, appnames=appnames) for layer in appverxml])
+
+        path = _cache_key(appverxml)
+        if path not in self.sources():
+            raise KeyError(f"The xml file '{path}' is not in the store.")
+
+        versions = dict()
+        for appname, record in self.query(appnames=appnames, appverxml=path):
+            versions.setdefault(appname, []).append(record)
+        return registry(Application(appname, records) for appname, records in versions.items())
+
+
+def _key(versionnumber):
+    """Indexed version key of a version number, None if it has non-numeric parts"""
+    try:
+        return _encode(version_key(versionnumber))
+    except ValueError:
+        return None
+
+
+def _encode(key):
+    """
+    Encode a version key as bytes which sort in the same order as the key, e.g. (9, 5) before (9, 5, 1) before (10,)
+
+    Raises
+    ------
+    ValueError
+        If a version part is negative or too large to be indexed
+    """
+    if any(part < 0 or part > _MAX_PART for part in key):
+        raise ValueError(f"Version key {key} can not be indexed.")
+    return b''.join(part.to_bytes(4, 'big') for part in key)
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""
+Import time regression benchmark of `import avm` and `avm-list --help`
+
+Runs each command in a fresh interpreter with `python -X importtime`, and reports the cumulative import time of the
+`avm` package and the modules imported on the way. Fails if the import time exceeds `--max-ms`.
+
+Usage: python -m benchmarks.bench_import [--repeat R] [--max-ms MS] [--output FILE]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# commands to measure, each run with `python -X importtime`
+COMMANDS = dict(
+    import_avm=['-c', 'import avm'],
+    avm_list_help=['-c', 'from avm.entry_points import list_applications; list_applications()', '--help'],
+)
+
+# modules that should not be imported by the commands above
+HEAVY_MODULES = ('xml.dom.minidom', 'xml.parsers.expat', 'avm.parsers', 'tempfile', 'hashlib', 'concurrent.futures',
+                 'typing')
+
+
+def importtime(args):
+    """
+    Import times of a command run with `python -X importtime`
+
+    Parameters
+    ----------
+    args : list
+        Arguments to the interpreter
+
+    Returns
+    -------
+    dict
+        Cumulative import time, in microseconds, by module
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + list(args), env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    modules = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split(':', 1)[1].split('|')
+        modules[name.strip()] = int(cumulative)
+
+    return modules
+
+
+def run(repeat=5):
+    """
+    Measure the import time of each command
+
+    Parameters
+    ----------
+    repeat : int, optional
+        Number of runs of each command, the fastest is reported
+
+    Returns
+    -------
+    dict
+        Import time of `avm` in milliseconds, number of imported modules and imported heavy modules, by command
+    """
+    results = dict()
+    for name, args in COMMANDS.items():
+        runs = [importtime(args) for _ in range(repeat)]
+        fastest = min(runs, key=lambda modules: modules.get('avm', 0))
+        results[name] = dict(
+            avm_ms=fastest.get('avm', 0) / 1000.,
+            modules=len(fastest),
+            heavy_modules=sorted(module for module in HEAVY_MODULES if module in fastest),
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs of each command.')
+    parser.add_argument('--max-ms', type=float, help='Fail if the import time of avm exceeds this, in milliseconds.')
+    parser.add_argument('--output', help='Write results to this JSON file instead of to screen.')
+    args = parser.parse_args()
+
+    results = run(repeat=args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    failed = [name for name, result in results.items()
+              if result['heavy_modules'] or (args.max_ms is not None and result['avm_ms'] > args.max_ms)]
+    if failed:
+        sys.exit(f"Import time regression in: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
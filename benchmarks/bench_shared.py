@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+"""
+Benchmark of process pools: every worker parsing the xml file versus attaching to a shared registry
+
+Workers are started with the 'spawn' method, so they do not inherit the parsed registry of the parent. Each worker
+loads the registry once, in the initializer, and then answers lookups. Reported per worker are the seconds spent
+loading and the growth of its resident memory while loading (Linux only).
+
+Usage: python -m benchmarks.bench_shared [--apps N] [--versions M] [--workers W [W ...]] [--lookups L]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from avm import shared
+from .synthetic import write_registry
+
+_worker = dict()
+
+
+def _rss():
+    """Resident memory of this process in kilobytes, None if it is not available on this platform"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _load(mode, path):
+    """Worker initializer, loading the registry by parsing the xml file or attaching to the shared registry"""
+    import avm
+
+    logging.getLogger('avm').setLevel(logging.ERROR)
+    rss = _rss()
+    start = time.perf_counter()
+    if mode == 'parse':
+        avm.registered_applications(appverxml=path)
+        _worker['lookup'] = lambda appname: avm.default_version(appname, appverxml=path)
+    else:
+        registry = shared.attach(path)
+        _worker['lookup'] = registry.default_version
+
+    _worker['stats'] = dict(seconds=time.perf_counter() - start,
+                            rss_kb=None if rss is None else _rss() - rss)
+
+
+def _lookups(appnames):
+    """Look up the default version of applications, and report the loading stats of this worker"""
+    for appname in appnames:
+        _worker['lookup'](appname)
+    return os.getpid(), _worker['stats']
+
+
+def run_pool(mode, path, n_workers, appnames, lookups=100):
+    """
+    Run lookups on a pool of workers
+
+    Returns
+    -------
+    dict
+        Wall time of the pool, and mean loading seconds and memory growth per worker
+    """
+    context = multiprocessing.get_context('spawn')
+    chunks = [appnames[i::n_workers * 4] for i in range(n_workers * 4)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=context, initializer=_load,
+                             initargs=(mode, path)) as pool:
+        stats = dict(pool.map(_lookups, [chunk[:lookups] for chunk in chunks]))
+    wall = time.perf_counter() - start
+
+    rss = [worker['rss_kb'] for worker in stats.values() if worker['rss_kb'] is not None]
+    return dict(
+        wall_seconds=wall,
+        workers=len(stats),
+        load_seconds=sum(worker['seconds'] for worker in stats.values()) / len(stats),
+        rss_kb=sum(rss) / len(rss) if rss else None,
+    )
+
+
+def run(n_apps=2000, n_versions=10, workers=(1, 2, 4, 8), lookups=100):
+    """
+    Compare parsing in every worker against attaching to a shared registry, for pools of increasing size
+
+    Parameters
+    ----------
+    n_apps : int, optional
+        Number of applications
+    n_versions : int, optional
+        Number of versions per application
+    workers : sequence, optional
+        Pool sizes
+    lookups : int, optional
+        Maximum number of lookups per task
+
+    Returns
+    -------
+    dict
+        Results per pool size and loading method
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_registry(os.path.join(tmp, 'ApplicationVersions.xml'), n_apps=n_apps, n_versions=n_versions)
+        appnames = [f'App{i:05d}' for i in range(n_apps)]
+        with shared.publish(appverxml=path, path=os.path.join(tmp, 'registry.bin')) as registry:
+            for n_workers in workers:
+                results.append(dict(
+                    workers=n_workers,
+                    parse=run_pool('parse', path, n_workers, appnames, lookups=lookups),
+                    attach=run_pool('attach', registry.path, n_workers, appnames, lookups=lookups),
+                ))
+
+    return dict(apps=n_apps, versions=n_versions, results=results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--apps', type=int, default=2000, help='Number of applications.')
+    parser.add_argument('--versions', type=int, default=10, help='Number of versions per application.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='Pool sizes.')
+    parser.add_argument('--lookups', type=int, default=100, help='Maximum number of lookups per task.')
+    args = parser.parse_args()
+    print(json.dumps(run(args.apps, n_versions=args.versions, workers=args.workers, lookups=args.lookups), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""
+Benchmark of cold starts: parsing the xml file with minidom or expat versus loading a snapshot
+
+Usage: python -m benchmarks.bench_snapshot [--apps N] [--versions M] [--repeat R]
+"""
+import argparse
+import json
+import os
+import tempfile
+import timeit
+
+from avm import parsers, snapshot
+from avm.cache import file_signature
+from .synthetic import write_registry
+
+
+def run(n_apps=1000, n_versions=10, repeat=5):
+    """
+    Time loading a synthetic registry
+
+    Parameters
+    ----------
+    n_apps : int, optional
+        Number of applications
+    n_versions : int, optional
+        Number of versions per application
+    repeat : int, optional
+        Number of repetitions, the fastest is reported
+
+    Returns
+    -------
+    dict
+        Seconds per load for each method
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_registry(os.path.join(tmp, 'ApplicationVersions.xml'), n_apps=n_apps, n_versions=n_versions)
+        signature = file_signature(path)
+        snapshot.enable(os.path.join(tmp, 'snapshots'))
+        try:
+            snapshot.write(path, signature, parsers.parse(path, backend='expat'))
+            timings = dict(
+                minidom=lambda: parsers.parse(path, backend='minidom'),
+                expat=lambda: parsers.parse(path, backend='expat'),
+                snapshot=lambda: snapshot.load(path, signature),
+            )
+            results = {name: min(timeit.repeat(func, number=1, repeat=repeat)) for name, func in timings.items()}
+        finally:
+            snapshot.disable()
+
+    results['speedup_vs_minidom'] = results['minidom'] / results['snapshot']
+    return dict(apps=n_apps, versions=n_versions, seconds=results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--apps', type=int, default=1000, help='Number of applications.')
+    parser.add_argument('--versions', type=int, default=10, help='Number of versions per application.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repetitions.')
+    args = parser.parse_args()
+    print(json.dumps(run(args.apps, args.versions, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
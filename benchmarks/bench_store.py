@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Benchmark of attribute queries: scanning the parsed registries versus querying the indexed SQLite store
+
+Usage: python -m benchmarks.bench_store [--apps N] [--versions M] [--files F] [--repeat R]
+"""
+import argparse
+import json
+import os
+import tempfile
+import timeit
+
+from avm import registered_applications, invalidate
+from avm.store import Store
+from .synthetic import write_registry
+
+# installation root of the applications of the first xml file, the other files use other roots
+ROOT = 'C:\\Program Files\\DNV'
+
+# categories of the applications and platforms of the versions, assigned in turn
+CATEGORIES = ('Sesam', 'Component', 'Custom', 'Marine')
+PLATFORMS = ('64', '32')
+
+
+def run(n_apps=1000, n_versions=10, n_files=10, repeat=5):
+    """
+    Time attribute queries over synthetic registries
+
+    Parameters
+    ----------
+    n_apps : int, optional
+        Number of applications per xml file
+    n_versions : int, optional
+        Number of versions per application
+    n_files : int, optional
+        Number of xml files, e.g. collected from as many hosts
+    repeat : int, optional
+        Number of repetitions, the fastest is reported
+
+    Returns
+    -------
+    dict
+        Seconds per query for each method, and the seconds to get ready to query in a new process: parsing the xml
+        files versus opening the store and checking that the xml files are unchanged
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [write_registry(os.path.join(tmp, f'host{i:03d}.xml'), n_apps=n_apps, n_versions=n_versions,
+                                root=ROOT if i == 0 else f'D:\\Host{i:03d}', default='random', seed=i,
+                                categories=CATEGORIES, platforms=PLATFORMS)
+                 for i in range(n_files)]
+        database = os.path.join(tmp, 'avm.sqlite')
+
+        def parse():
+            invalidate()
+            return [registered_applications(appverxml=path) for path in paths]
+
+        def open_store():
+            with Store(database) as store:
+                store.ingest(paths)
+
+        ingest = timeit.timeit(open_store, number=1)
+        ready = dict(parse=min(timeit.repeat(parse, number=1, repeat=repeat)),
+                     store=min(timeit.repeat(open_store, number=1, repeat=repeat)),
+                     ingest_once=ingest)
+        registries = parse()
+
+        def scan_category():
+            return [(appname, record) for data in registries for appname, app in data.items()
+                    for record in app.values() if record.category.lower() == 'sesam' and record.platform == '64']
+
+        def scan_defaults():
+            return [(appname, app.default) for data in registries for appname, app in data.items()
+                    if app.default is not None and app.default.installdir.startswith(ROOT)]
+
+        def scan_versions():
+            return [('app00042', record) for data in registries for record in data['app00042'].values()
+                    if record.versionnumber.startswith('1.')]
+
+        seconds = dict()
+        with Store(database) as store:
+            queries = dict(
+                category=(scan_category, lambda: store.query(category='Sesam', platform='64')),
+                defaults_under_root=(scan_defaults, lambda: store.query(default=True, installdir=ROOT)),
+                app_versions=(scan_versions, lambda: store.query(appnames=['App00042'], version='==1.*')),
+            )
+            for name, (scan, query) in queries.items():
+                assert len(scan()) == len(query()), name
+                seconds[name] = dict(
+                    scan=min(timeit.repeat(scan, number=1, repeat=repeat)),
+                    store=min(timeit.repeat(query, number=1, repeat=repeat)),
+                    matches=len(query()),
+                )
+                seconds[name]['speedup'] = seconds[name]['scan'] / seconds[name]['store']
+
+    ready['speedup'] = ready['parse'] / ready['store']
+    return dict(apps=n_apps, versions=n_versions, files=n_files, ready=ready, seconds=seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--apps', type=int, default=1000, help='Number of applications per xml file.')
+    parser.add_argument('--versions', type=int, default=10, help='Number of versions per application.')
+    parser.add_argument('--files', type=int, default=10, help='Number of xml files.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repetitions.')
+    args = parser.parse_args()
+    print(json.dumps(run(n_apps=args.apps, n_versions=args.versions, n_files=args.files, repeat=args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+"""
+Benchmark suite measuring how parsing and lookups scale with the size of the registry
+
+Writes machine-readable JSON results, to compare runs across versions of avm.
+
+Usage: python -m benchmarks.run [--apps N [N ...]] [--versions M] [--repeat R] [--output FILE]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from importlib import metadata
+
+import avm
+from avm import parsers
+from .synthetic import write_registry
+
+
+def avm_version():
+    """Installed version of avm, None if it is not installed"""
+    try:
+        return metadata.version('avm')
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def best(func, repeat=5, number=1):
+    """Fastest of `repeat` timings, in seconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def peak_memory(func):
+    """Peak memory allocated while calling a function, in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_parse(path, repeat=5):
+    """Parse time and peak memory per parser backend"""
+    return {
+        backend: dict(
+            seconds=best(lambda: parsers.parse(path, backend=backend), repeat=repeat),
+            peak_bytes=peak_memory(lambda: parsers.parse(path, backend=backend)),
+        )
+        for backend in sorted(parsers.BACKENDS)
+    }
+
+
+def bench_lookup(path, appname, repeat=5, number=1000):
+    """Latency of a single `exe_path` lookup on a cold and on a warm cache"""
+    def cold():
+        avm.invalidate()
+        avm.exe_path(appname, appverxml=path)
+
+    avm.invalidate()
+    avm.exe_path(appname, appverxml=path)
+    return dict(
+        cold_seconds=best(cold, repeat=repeat),
+        warm_seconds=best(lambda: avm.exe_path(appname, appverxml=path), repeat=repeat, number=number),
+    )
+
+
+def bench_latest_version(path, appnames, repeat=5):
+    """Throughput of `latest_version` lookups on a warm cache, optionally below a version"""
+    avm.invalidate()
+    avm.registered_applications(appverxml=path)
+
+    def lookups(below=None):
+        for appname in appnames:
+            avm.latest_version(appname, below=below, appverxml=path)
+
+    return dict(
+        calls_per_second=len(appnames) / best(lookups, repeat=repeat),
+        below_calls_per_second=len(appnames) / best(lambda: lookups('1.5'), repeat=repeat),
+    )
+
+
+def bench_avm_list(path, repeat=3):
+    """Wall time of the `avm-list` command, including interpreter startup"""
+    command = [sys.executable, '-c', 'from avm.entry_points import list_applications; list_applications()',
+               '--all-versions', f'--xml-file={path}']
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+
+    return dict(seconds=min(timings))
+
+
+def run(sizes=(10, 100, 1000), n_versions=10, repeat=5):
+    """
+    Run the benchmark suite on synthetic registries of increasing size
+
+    Parameters
+    ----------
+    sizes : sequence, optional
+        Number of applications of each registry
+    n_versions : int, optional
+        Number of versions per application
+    repeat : int, optional
+        Number of repetitions of each timing, the fastest is reported
+
+    Returns
+    -------
+    dict
+        Environment and results per registry size
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_apps in sizes:
+            root = os.path.join(tmp, f'installs-{n_apps}')
+            os.makedirs(root)
+            path = write_registry(os.path.join(tmp, f'ApplicationVersions-{n_apps}.xml'), n_apps=n_apps,
+                                  n_versions=n_versions, root=root, existing=0.5)
+            appnames = [f'App{i:05d}' for i in range(n_apps)]
+            results.append(dict(
+                apps=n_apps,
+                versions=n_versions,
+                file_bytes=os.path.getsize(path),
+                parse=bench_parse(path, repeat=repeat),
+                lookup_first=bench_lookup(path, appnames[0], repeat=repeat),
+                lookup_last=bench_lookup(path, appnames[-1], repeat=repeat),
+                latest_version=bench_latest_version(path, appnames, repeat=repeat),
+                avm_list=bench_avm_list(path, repeat=min(repeat, 3)),
+            ))
+            avm.invalidate()
+
+    return dict(
+        environment=dict(
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            platform=platform.platform(),
+            avm=avm_version(),
+            parser_backend=parsers.get_backend(),
+        ),
+        results=results,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--apps', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Number of applications of each registry.')
+    parser.add_argument('--versions', type=int, default=10, help='Number of versions per application.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repetitions of each timing.')
+    parser.add_argument('--output', help='Write results to this JSON file instead of to screen.')
+    args = parser.parse_args()
+
+    # missing paths are expected, keep their warnings out of the results
+    logging.getLogger('avm').setLevel(logging.ERROR)
+    results = run(args.apps, n_versions=args.versions, repeat=args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""
+Generator of synthetic 'ApplicationVersions.xml' files for benchmarks
+
+Usage: python -m benchmarks.synthetic OUTPUT [--apps N] [--versions M] [--default last|first|random|none]
+       [--existing FRACTION] [--root DIR] [--categories C ...] [--platforms P ...]
+"""
+import argparse
+import os
+import random
+from xml.sax.saxutils import quoteattr
+
+HEADER = """\ufeff<?xml version="1.0" encoding="utf-8"?>
+<DNVS>
+  <Global>
+    <AutoSetLatestAsDefault>false</AutoSetLatestAsDefault>
+    <AutoUpdateFromRegistry>false</AutoUpdateFromRegistry>
+    <LatestAsDefaultTypeSetting>V</LatestAsDefaultTypeSetting>
+    <Version>3.0</Version>
+  </Global>
+  <Applications>
+"""
+
+FOOTER = """  </Applications>
+</DNVS>"""
+
+# placement of the default version within each application
+DEFAULT_PLACEMENTS = ('last', 'first', 'random', 'none')
+
+
+def version_number(j):
+    """Version number of the j'th version of an application"""
+    return f'{1 + j // 100}.{j // 10 % 10}.{j % 10}'
+
+
+def write_registry(path, n_apps=100, n_versions=10, root='C:\\Program Files\\DNV', default='last', existing=0.,
+                   seed=0, categories=('Sesam',), platforms=('64',)):
+    """
+    Write a synthetic xml file listing application-versions
+
+    Parameters
+    ----------
+    path : str
+        Path to the xml file
+    n_apps : int, optional
+        Number of applications
+    n_versions : int, optional
+        Number of versions per application
+    root : str, optional
+        Root directory of the installation directories
+    default : str, optional
+        Version marked as default: 'last' (the latest), 'first', 'random' or 'none'
+    existing : float, optional
+        Fraction of the versions for which the installation directory and executable are created below `root`.
+        Creating paths requires `root` to be a writable directory.
+    seed : int, optional
+        Seed of the random choice of default versions and existing paths
+    categories : sequence, optional
+        Categories, assigned to the applications in turn
+    platforms : sequence, optional
+        Platforms, assigned to the versions of each application in turn
+
+    Returns
+    -------
+    str
+        Path to the xml file
+    """
+    if default not in DEFAULT_PLACEMENTS:
+        raise ValueError(f"Unknown default placement '{default}'. Choose from {', '.join(DEFAULT_PLACEMENTS)}.")
+
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(HEADER)
+        for i in range(n_apps):
+            appname = f'App{i:05d}'
+            default_index = dict(last=n_versions - 1, first=0, random=rng.randrange(max(n_versions, 1)),
+                                 none=None)[default]
+            f.write(f'    <Application Name="{appname}">\n')
+            for j in range(n_versions):
+                versionnumber = version_number(j)
+                installdir = os.path.join(root, f'{appname} V{versionnumber}')
+                exepath = os.path.join(installdir, 'bin', f'{appname.lower()}.exe')
+                if existing and rng.random() < existing:
+                    os.makedirs(os.path.dirname(exepath), exist_ok=True)
+                    open(exepath, 'w').close()
+
+                f.write(
+                    f'      <Version VersionNumber="{versionnumber}" InstallDir={quoteattr(installdir)} '
+                    f'ExeFilePath={quoteattr(exepath)} UserManualPath="" '
+                    f'Platform="{platforms[j % len(platforms)]}" ProductType="V" '
+                    f'Category="{categories[i % len(categories)]}" HelpFile="" '
+                    f'IsDefault="{j == default_index}" UserSpecifiedDefault="False" PersistenceType="Temp" />\n'
+                )
+            f.write('    </Application>\n')
+        f.write(FOOTER)
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help='Path to the xml file.')
+    parser.add_argument('--apps', type=int, default=100, help='Number of applications.')
+    parser.add_argument('--versions', type=int, default=10, help='Number of versions per application.')
+    parser.add_argument('--default', default='last', choices=DEFAULT_PLACEMENTS, help='Default version placement.')
+    parser.add_argument('--existing', type=float, default=0., help='Fraction of versions with existing paths.')
+    parser.add_argument('--root', default='C:\\Program Files\\DNV', help='Root directory of installations.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed.')
+    parser.add_argument('--categories', nargs='+', default=['Sesam'], help='Categories of the applications.')
+    parser.add_argument('--platforms', nargs='+', default=['64'], help='Platforms of the versions.')
+    args = parser.parse_args()
+    write_registry(args.output, n_apps=args.apps, n_versions=args.versions, root=args.root, default=args.default,
+                   existing=args.existing, seed=args.seed, categories=args.categories, platforms=args.platforms)
+
+
+if __name__ == '__main__':
+    main()
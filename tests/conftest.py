@@ -2,6 +2,30 @@ import pytest
 import os
 from string import Template
 
+import avm
+from avm import client, parsers, snapshot
+
+
+@pytest.fixture(autouse=True, params=sorted(parsers.BACKENDS))
+def parser_backend(request):
+    # run every test against each of the parser backends
+    backend = parsers.get_backend()
+    parsers.set_backend(request.param)
+    yield request.param
+    parsers.set_backend(backend)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch):
+    # start every test with a cold registry cache, snapshots disabled and without a resolver daemon
+    monkeypatch.delenv(snapshot.SNAPSHOT_DIR_ENV, raising=False)
+    client.disable()
+    avm.invalidate()
+    yield
+    avm.invalidate()
+    snapshot.disable()
+    client.disable()
+
 
 @pytest.fixture(scope='session')
 def xml_input(tmp_path_factory):
@@ -57,3 +81,13 @@ def faulty_xml_file_path():
     xml_file = os.path.join(os.path.dirname(__file__), 'files/Faulty.xml')
 
     return xml_file
+
+
+@pytest.fixture()
+def xml_file_copy(xml_file_path, tmp_path):
+    # private copy of the xml file, for tests modifying it
+    xml_file = os.path.join(tmp_path, 'ApplicationVersions.xml')
+    with open(xml_file_path, 'r') as src, open(xml_file, 'w') as dst:
+        dst.write(src.read())
+
+    return xml_file
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+
+from avm import aio, exe_path, installation_path, registered_applications, resolve_many
+
+
+@pytest.fixture()
+def load_counter(monkeypatch):
+    calls = []
+    load = aio._load
+
+    def counting_load(appverxml):
+        calls.append(appverxml)
+        return load(appverxml)
+
+    monkeypatch.setattr(aio, '_load', counting_load)
+    return calls
+
+
+def test_same_answers(xml_file_path):
+    async def main():
+        return await asyncio.gather(
+            aio.exe_path('wadam', appverxml=xml_file_path),
+            aio.exe_path('simo', version='>=4.20', appverxml=xml_file_path),
+            aio.installation_path('wadam', version='9.2.4', appverxml=xml_file_path),
+            aio.resolve_many(['wadam', ('sima', '4.2.0'), 'dadam'], appverxml=xml_file_path),
+            aio.registered_applications(appverxml=xml_file_path),
+        )
+
+    assert asyncio.run(main()) == [
+        exe_path('wadam', appverxml=xml_file_path),
+        exe_path('simo', version='>=4.20', appverxml=xml_file_path),
+        installation_path('wadam', version='9.2.4', appverxml=xml_file_path),
+        resolve_many(['wadam', ('sima', '4.2.0'), 'dadam'], appverxml=xml_file_path),
+        registered_applications(appverxml=xml_file_path),
+    ]
+
+
+def test_coalesced(xml_file_path, load_counter):
+    async def main():
+        return await asyncio.gather(*(aio.exe_path('wadam', appverxml=xml_file_path) for _ in range(50)))
+
+    paths = asyncio.run(main())
+    assert len(set(paths)) == 1 and paths[0] is not None
+    assert load_counter == [xml_file_path]
+    assert aio._loading == dict()
+
+
+def test_missing_file():
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(aio.exe_path('wadam', appverxml='not_here'))
+
+
+def test_configure(xml_file_path):
+    aio.configure(max_workers=2)
+    try:
+        assert asyncio.run(aio.exe_path('wadam', appverxml=xml_file_path)) is not None
+        assert aio._get_executor()._max_workers == 2
+    finally:
+        aio.configure(max_workers=aio.MAX_WORKERS)
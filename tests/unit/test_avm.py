@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import os
 
 import pytest
@@ -6,7 +9,7 @@ import sys
 from xml.parsers.expat import ExpatError
 
 from avm import (exe_path, installation_path, all_versions, default_version,
-                 latest_version, registered_applications, list_applications)
+                 latest_version, registered_applications, list_applications, resolve_many, iter_versions)
 
 
 def test_exe_path(xml_file_path, xml_input):
@@ -102,6 +105,24 @@ def test_latest_version(xml_file_path):
     latest_below_9_5_3 = latest_version(appname='wadam', appverxml=xml_file_path, below='9.5.3')
     assert latest_below_9_5_3 == '9.5.2'
 
+    latest_simo = latest_version(appname='simo', appverxml=xml_file_path)
+    assert latest_simo == '4.20.4'
+
+    latest_below_4_20 = latest_version(appname='simo', appverxml=xml_file_path, below='4.20')
+    assert latest_below_4_20 == '4.14.0'
+
+    with pytest.raises(ValueError):
+        _ = latest_version(appname='wadam', appverxml=xml_file_path, below='9.2')
+
+    with pytest.raises(ValueError):
+        _ = latest_version(appname='prewad', appverxml=xml_file_path)
+
+    with pytest.raises(ValueError):
+        _ = latest_version(appname='dadam', appverxml=xml_file_path)
+
+    with pytest.raises(ValueError):
+        _ = latest_version(appname='wadam', appverxml=xml_file_path, below='9.x')
+
     with pytest.raises(ValueError):
         _ = latest_version(appname='wadam', below='10.5.10.5', appverxml='not_here')
 
@@ -148,3 +169,99 @@ def test_list_applications(xml_file_path, capsys, monkeypatch):
         list_applications()
         captured = capsys.readouterr()
         assert 115 * "=" in captured.out
+
+
+def test_list_applications_formats(xml_file_path, xml_input, capsys, monkeypatch):
+    _, subs = xml_input
+    args = ['avm-list', fr'--xml-file={xml_file_path}', '--app', 'Wadam', '--app', 'sima']
+
+    monkeypatch.setattr(sys, 'argv', args + ['--format', 'jsonl', '--check-paths'])
+    list_applications()
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(row['appname'], row['versionnumber']) for row in rows][2:5] == [('sima', '4.1.2'), ('wadam', '9.5.3'),
+                                                                            ('wadam', '9.5.1')]
+    assert len(rows) == 9
+    assert rows[3]['exists'] and not rows[4]['exists'] and rows[3]['exepath'] == str(subs['WADAM_EXE'])
+
+    monkeypatch.setattr(sys, 'argv', args + ['--format', 'json', '--default-only'])
+    list_applications()
+    rows = json.loads(capsys.readouterr().out)
+    assert [(row['appname'], row['versionnumber']) for row in rows] == [('sima', '4.4.0'), ('wadam', '9.5.3')]
+    assert 'exists' not in rows[0]
+
+    monkeypatch.setattr(sys, 'argv', ['avm-list', fr'--xml-file={xml_file_path}', '--format', 'csv',
+                                      '--category', 'custom', '--platform', '64'])
+    list_applications()
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [(row['appname'], row['versionnumber']) for row in rows] == [('riflex', '4.20.4'), ('simo', '4.20.4')]
+
+    monkeypatch.setattr(sys, 'argv', args + ['--check-paths'])
+    list_applications()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 6 and 'Exists' in lines[1] and lines[3].startswith('sima')
+
+
+def test_list_applications_check_executable(xml_file_path, xml_input, capsys, monkeypatch):
+    # the executable resolved from the installation directory is checked, not the registered path
+    _, subs = xml_input
+    executable = os.path.join(subs['SIMO_DIR'], 'simo', 'bin', 'rsimo.exe')
+    monkeypatch.setattr(sys, 'argv', ['avm-list', fr'--xml-file={xml_file_path}', '--app', 'simo', '--check-paths',
+                                      '--format', 'jsonl'])
+    list_applications()
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    row = next(row for row in rows if row['versionnumber'] == '4.20.4')
+    assert row['exists'] and row['executable'] == executable and not row['exepath']
+
+    monkeypatch.setattr(sys, 'argv', ['avm-list', fr'--xml-file={xml_file_path}', '--app', 'simo', '--check-paths'])
+    list_applications()
+    line = next(line for line in capsys.readouterr().out.splitlines() if line.startswith('simo') and '4.20.4' in line)
+    assert line.split()[2:4] == ['*', 'yes'] and line.endswith(executable)
+
+    # without checking paths the registered executable is listed, which is empty
+    monkeypatch.setattr(sys, 'argv', ['avm-list', fr'--xml-file={xml_file_path}', '--app', 'simo'])
+    list_applications()
+    line = next(line for line in capsys.readouterr().out.splitlines() if line.startswith('simo') and '4.20.4' in line)
+    assert line.split() == ['simo', '4.20.4', '*']
+
+
+def test_iter_versions(xml_file_path):
+    versions = iter_versions(appverxml=xml_file_path, appnames=['WADAM'], default_only=True)
+    assert [(appname, record.versionnumber) for appname, record in versions] == [('wadam', '9.5.3')]
+
+    with pytest.raises(FileNotFoundError):
+        _ = iter_versions(appverxml='not_here')
+
+
+def test_resolve_many(xml_file_path, xml_input, monkeypatch):
+    _, subs = xml_input
+
+    results = resolve_many(['wadam', ('Wadam', '9.2.4'), ('wadam', None), ('wadam', '205.2.1'), ('wadam', '9.5.2'),
+                            'dadam', 'nodefault', ('simo', '4.20.4')], appverxml=xml_file_path)
+    assert len(results) == 8
+
+    assert results[0].ok and results[0] == results[2]
+    assert results[0].versionnumber == '9.5.3'
+    assert results[0].exepath == str(subs['WADAM_EXE'])
+    assert results[0].installdir == str(subs['WADAM_DIR'])
+    assert results[1].exepath == str(subs['WADAM_924_EXE']) and results[1].installdir is None
+    assert not results[3].ok and 'not registered' in results[3].reason and results[3].versionnumber is None
+    assert not results[4].ok and 'does not exist' in results[4].reason and results[4].versionnumber == '9.5.2'
+    assert not results[5].ok and 'not registered' in results[5].reason
+    assert not results[6].ok and 'no default version' in results[6].reason
+    assert f'"{results[7].exepath}"' == exe_path('simo', appverxml=xml_file_path)
+
+    # each path is checked once
+    checked = []
+    exists = os.path.exists
+    monkeypatch.setattr(os.path, 'exists', lambda path: checked.append(path) or exists(path))
+    _ = resolve_many(['wadam', 'wadam', ('wadam', '9.5.3')], appverxml=xml_file_path, strict=True)
+    assert sorted(checked) == sorted([str(subs['WADAM_EXE']), str(subs['WADAM_DIR'])])
+
+    # and then cached
+    _ = resolve_many(['wadam'], appverxml=xml_file_path)
+    assert len(checked) == 2
+
+    assert resolve_many([], appverxml=xml_file_path) == []
+
+    with pytest.raises(FileNotFoundError):
+        _ = resolve_many(['wadam'], appverxml='not_here')
@@ -0,0 +1,390 @@
+import os
+import threading
+import time
+
+import pytest
+
+import avm
+from avm import avm as avm_module
+from avm import (registered_applications, invalidate, exe_path, installation_path, configure_path_cache,
+                 path_cache_info, configure_registry_cache, registry_cache_info, pin, unpin)
+from avm.cache import RegistryCache, RegistryCacheInfo, PathCache, PathCacheInfo, file_signature, FOOTPRINT_PER_BYTE
+from avm.registry import Registry
+
+
+@pytest.fixture()
+def parse_counter(monkeypatch):
+    calls = []
+    parse = avm_module._parse_registry
+
+    def counting_parse(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr(avm_module, '_parse_registry', counting_parse)
+    return calls
+
+
+def test_file_signature(xml_file_path):
+    st = os.stat(xml_file_path)
+    assert file_signature(xml_file_path) == (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    with pytest.raises(FileNotFoundError):
+        _ = file_signature('not_here')
+
+
+def test_registry_cache():
+    cache = RegistryCache()
+    loaded = []
+
+    def loader(path, signature):
+        loaded.append(path)
+        return object()
+
+    data = cache.get('a.xml', (1, 2, 3), loader)
+    assert cache.get('a.xml', (1, 2, 3), loader) is data
+    assert 'a.xml' in cache and len(cache) == 1
+    assert loaded == ['a.xml']
+
+    assert cache.get('a.xml', (2, 2, 3), loader) is not data
+    assert loaded == ['a.xml', 'a.xml']
+
+    cache.get('b.xml', (1, 2, 3), loader)
+    cache.invalidate('a.xml')
+    assert 'a.xml' not in cache and 'b.xml' in cache
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def _run_threads(target, n_threads=16):
+    # start threads at once and collect their results or errors
+    barrier = threading.Barrier(n_threads)
+    results = [None] * n_threads
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_registry_cache_single_flight():
+    cache = RegistryCache()
+    loaded = []
+
+    def loader(path, signature):
+        loaded.append(path)
+        time.sleep(0.05)
+        return object()
+
+    results = _run_threads(lambda: cache.get('a.xml', (1, 2, 3), loader))
+    assert len(loaded) == 1
+    assert all(result is results[0] for result in results)
+
+    def failing_loader(path, signature):
+        loaded.append(path)
+        time.sleep(0.05)
+        raise ValueError('Not well-formed')
+
+    results = _run_threads(lambda: cache.get('b.xml', (1, 2, 3), failing_loader))
+    assert len(loaded) == 2 and all(isinstance(result, ValueError) for result in results)
+    assert 'b.xml' not in cache
+
+
+def test_registry_cache_readers_do_not_block():
+    cache = RegistryCache()
+    old = cache.get('a.xml', (1, 2, 3), lambda path, signature: object())
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader(path, signature):
+        started.set()
+        release.wait(5)
+        return object()
+
+    refresh = threading.Thread(target=cache.get, args=('a.xml', (2, 2, 3), slow_loader))
+    refresh.start()
+    started.wait(5)
+
+    # the old snapshot is served while the refresh is in progress, and replaced when it completes
+    start = time.perf_counter()
+    assert cache.get('a.xml', (1, 2, 3), slow_loader) is old
+    assert time.perf_counter() - start < 1.
+    release.set()
+    refresh.join()
+    assert cache.get('a.xml', (2, 2, 3), slow_loader) is not old
+
+
+def test_parsed_once_per_change_under_contention(xml_file_copy, monkeypatch):
+    calls = []
+    parse = avm_module._parse_registry
+
+    def slow_parse(path):
+        calls.append(path)
+        time.sleep(0.02)
+        return parse(path)
+
+    monkeypatch.setattr(avm_module, '_parse_registry', slow_parse)
+    with open(xml_file_copy) as f:
+        content = f.read()
+
+    for change in range(1, 6):
+        # change the size of the file, so that its stat signature changes
+        with open(xml_file_copy, 'w') as f:
+            f.write(content + change * ' ')
+
+        results = _run_threads(lambda: registered_applications(appverxml=xml_file_copy))
+        assert len(calls) == change
+        assert all(result is results[0] for result in results)
+
+
+def test_registry_refresh_under_contention(xml_file_copy, monkeypatch):
+    calls = []
+    load = avm_module._load_registry
+
+    def counting_load(path, signature):
+        calls.append(path)
+        time.sleep(0.02)
+        return load(path, signature)
+
+    registry = Registry(xml_file_copy)
+    monkeypatch.setattr('avm.registry._load_registry', counting_load)
+    with open(xml_file_copy) as f:
+        content = f.read()
+    with open(xml_file_copy, 'w') as f:
+        f.write(content.replace('"HydroD"', '"HydroDX"'))
+
+    changes = _run_threads(registry.refresh)
+    assert len(calls) == 1
+    assert sum(bool(change) for change in changes) == 1
+    assert registry.snapshot[1:] == (os.path.abspath(xml_file_copy), file_signature(xml_file_copy))
+
+
+def test_registry_cache_bounded():
+    cache = RegistryCache(maxsize=2)
+    loaded = []
+
+    def loader(path, signature):
+        loaded.append(path)
+        return object()
+
+    for path in ('a.xml', 'b.xml', 'a.xml', 'c.xml'):
+        cache.get(path, (1, 100, 1), loader)
+    assert 'a.xml' in cache and 'b.xml' not in cache and 'c.xml' in cache
+
+    # pinned files are never evicted, and may be pinned before they are loaded
+    cache.pin('d.xml')
+    cache.get('d.xml', (1, 100, 1), loader)
+    cache.get('e.xml', (1, 100, 1), loader)
+    assert 'd.xml' in cache and 'e.xml' in cache and len(cache) == 2
+    assert cache.info() == RegistryCacheInfo(hits=1, misses=5, evictions=3, size=2, maxsize=2,
+                                             bytes=2 * 100 * FOOTPRINT_PER_BYTE, max_bytes=None, pinned=1)
+
+    # bounded by the estimated footprint, from the size of the files
+    cache.configure(maxsize=0, max_bytes=500 * FOOTPRINT_PER_BYTE)
+    cache.get('f.xml', (1, 200, 1), loader)
+    cache.get('g.xml', (1, 200, 1), loader)
+    assert sorted(cache._entries) == ['d.xml', 'f.xml', 'g.xml']
+    cache.unpin('d.xml')
+    cache.get('h.xml', (1, 300, 1), loader)
+    assert sorted(cache._entries) == ['g.xml', 'h.xml']
+
+    # disabled, every lookup loads the file
+    cache.configure(enabled=False)
+    loaded.clear()
+    cache.get('h.xml', (1, 300, 1), loader)
+    cache.get('h.xml', (1, 300, 1), loader)
+    assert loaded == ['h.xml', 'h.xml'] and len(cache) == 0
+
+
+@pytest.fixture()
+def bounded_registry_cache():
+    avm_module._registry_cache.clear()
+    yield
+    configure_registry_cache(maxsize=0, max_bytes=0, enabled=True)
+    avm_module._registry_cache.clear()
+
+
+def test_multi_tenant(xml_file_path, xml_file_copy, parse_counter, bounded_registry_cache):
+    other_copy = os.path.join(os.path.dirname(xml_file_copy), 'other.xml')
+    with open(xml_file_copy) as src, open(other_copy, 'w') as dst:
+        dst.write(src.read())
+
+    # the pinned file stays cached, while the other two evict each other
+    configure_registry_cache(maxsize=2)
+    pin(xml_file_path)
+    for _ in range(3):
+        for path in (xml_file_path, xml_file_copy, other_copy):
+            _ = registered_applications(appverxml=path)
+    assert parse_counter == [xml_file_path] + 3 * [xml_file_copy, other_copy]
+
+    info = registry_cache_info()
+    assert (info.hits, info.misses, info.evictions, info.size, info.pinned) == (2, 7, 5, 2, 1)
+
+    unpin(xml_file_path)
+    configure_registry_cache(maxsize=1)
+    assert registry_cache_info().size == 1
+
+    # lookups of single applications count towards the bounds as well
+    configure_registry_cache(maxsize=0, max_bytes=1)
+    _ = exe_path('wadam', appverxml=xml_file_copy)
+    _ = exe_path('sima', appverxml=xml_file_path)
+    assert registry_cache_info().size == 1
+
+
+def test_parsed_once(xml_file_path, parse_counter):
+    data = registered_applications(appverxml=xml_file_path)
+    for _ in range(5):
+        assert registered_applications(appverxml=xml_file_path) is data
+        _ = exe_path('wadam', appverxml=xml_file_path)
+
+    assert len(parse_counter) == 1
+
+
+def test_reparsed_on_change(xml_file_copy, parse_counter):
+    data = registered_applications(appverxml=xml_file_copy)
+    assert 'hydrod' in data
+
+    with open(xml_file_copy, 'r') as f:
+        content = f.read()
+    with open(xml_file_copy, 'w') as f:
+        f.write(content.replace('"HydroD"', '"HydroDX"'))
+
+    data = registered_applications(appverxml=xml_file_copy)
+    assert 'hydrod' not in data and 'hydrodx' in data
+    assert len(parse_counter) == 2
+
+
+def test_invalidate(xml_file_path, parse_counter):
+    _ = registered_applications(appverxml=xml_file_path)
+    invalidate(xml_file_path)
+    _ = registered_applications(appverxml=xml_file_path)
+    invalidate()
+    _ = registered_applications(appverxml=xml_file_path)
+    assert len(parse_counter) == 3
+
+
+def test_located_in_appdata(xml_file_path, tmp_path, monkeypatch, parse_counter):
+    for vendor in ('DNVGL', 'DNV'):
+        os.makedirs(os.path.join(tmp_path, vendor, 'ApplicationVersionManager'))
+
+    dnv_xml = os.path.join(tmp_path, 'DNV', 'ApplicationVersionManager', 'ApplicationVersions.xml')
+    dnvgl_xml = os.path.join(tmp_path, 'DNVGL', 'ApplicationVersionManager', 'ApplicationVersions.xml')
+    with open(xml_file_path, 'r') as src:
+        content = src.read()
+    for path in (dnv_xml, dnvgl_xml):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    monkeypatch.setenv('appdata', str(tmp_path))
+    _ = registered_applications()
+    _ = registered_applications()
+    assert parse_counter == [dnvgl_xml]
+    assert avm_module._locations == {str(tmp_path): dnvgl_xml}
+
+    # memoized location removed, falls back to the next location
+    os.remove(dnvgl_xml)
+    _ = registered_applications()
+    assert parse_counter == [dnvgl_xml, dnv_xml]
+
+    avm.invalidate()
+    assert avm_module._locations == dict()
+
+
+def test_single_application_lookup(xml_file_path, parse_counter, monkeypatch):
+    calls = []
+    find = avm_module._find_application
+
+    def counting_find(path, appname):
+        calls.append(appname)
+        return find(path, appname)
+
+    monkeypatch.setattr(avm_module, '_find_application', counting_find)
+
+    # cold cache, only the requested application is looked up and cached
+    for _ in range(3):
+        _ = exe_path('wadam', appverxml=xml_file_path)
+        _ = exe_path('dadam', appverxml=xml_file_path)
+    assert calls == ['wadam', 'dadam']
+    assert parse_counter == []
+
+    # once the complete registry is loaded it is used for lookups
+    _ = registered_applications(appverxml=xml_file_path)
+    _ = exe_path('simo', appverxml=xml_file_path)
+    assert calls == ['wadam', 'dadam']
+    assert len(parse_counter) == 1
+
+
+def test_path_cache(tmp_path, monkeypatch):
+    cache = PathCache(maxsize=2, ttl=60., negative_ttl=0.)
+    existing, missing = str(tmp_path), os.path.join(tmp_path, 'not_here')
+
+    assert cache.exists('a', existing)
+    assert cache.exists('a', existing)
+    assert cache.info() == PathCacheInfo(hits=1, misses=1, evictions=0, size=1, maxsize=2)
+
+    # negative results expire immediately
+    assert not cache.exists('b', missing)
+    assert not cache.exists('b', missing)
+    assert cache.info().misses == 3
+
+    # least recently used result is evicted
+    assert cache.exists('c', existing)
+    assert cache.info().evictions == 1
+    assert cache.exists('b', existing)
+    assert cache.info().size == 2
+
+    # strict checks bypass cached results
+    monkeypatch.setattr(os.path, 'exists', lambda path: False)
+    assert cache.exists('c', existing)
+    assert not cache.exists('c', existing, strict=True)
+    assert not cache.exists('c', existing)
+
+    cache.configure(enabled=False)
+    assert not cache.exists('b', existing)
+
+    cache.configure(maxsize=0, ttl=1., negative_ttl=1., enabled=True)
+    assert cache.info().size == 0
+    cache.clear()
+    assert cache.info() == PathCacheInfo(hits=0, misses=0, evictions=0, size=0, maxsize=0)
+
+
+def test_path_checks_cached(xml_file_copy, xml_input, monkeypatch):
+    checked = []
+    exists = os.path.exists
+    monkeypatch.setattr(os.path, 'exists', lambda path: checked.append(path) or exists(path))
+
+    for _ in range(3):
+        assert exe_path('wadam', appverxml=xml_file_copy) is not None
+        assert exe_path('wadam', version='9.5.2', appverxml=xml_file_copy) is None
+        assert installation_path('wadam', appverxml=xml_file_copy) is not None
+    assert len(checked) == 3
+    assert path_cache_info().hits == 6
+
+    _ = exe_path('wadam', appverxml=xml_file_copy, strict=True)
+    _ = installation_path('wadam', appverxml=xml_file_copy, strict=True)
+    assert len(checked) == 5
+
+    # results are keyed on the signature of the xml file
+    with open(xml_file_copy, 'a') as f:
+        f.write('\n')
+    _ = exe_path('wadam', appverxml=xml_file_copy)
+    assert len(checked) == 6
+
+    configure_path_cache(enabled=False)
+    try:
+        _ = exe_path('wadam', appverxml=xml_file_copy)
+        _ = exe_path('wadam', appverxml=xml_file_copy)
+        assert len(checked) == 8
+    finally:
+        configure_path_cache(enabled=True)
+
+    invalidate()
+    assert path_cache_info().size == 0
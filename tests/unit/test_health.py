@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+import pytest
+
+from avm import check_installations
+from avm.entry_points import check_applications
+from avm.health import NO_EXEPATH, MISSING_EXEPATH, MISSING_INSTALLDIR, MISSING_EXECUTABLE, MISSING_DEFAULT, DUPLICATE_DEFAULT
+
+TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<DNVS>
+  <Applications>
+    <Application Name="Wadam">
+      <Version VersionNumber="9.5.3" InstallDir="{root}" ExeFilePath="{exe}" IsDefault="True" />
+      <Version VersionNumber="9.4.1" InstallDir="{root}" ExeFilePath="{missing}" IsDefault="True" />
+    </Application>
+    <Application Name="Mimosa">
+      <Version VersionNumber="6.3.10" InstallDir="{missing}" ExeFilePath="{exe}" IsDefault="False" />
+    </Application>
+    <Application Name="Simo">
+      <Version VersionNumber="4.20.4" InstallDir="{root}" ExeFilePath="{exe}" IsDefault="True" />
+      <Version VersionNumber="4.20.2" InstallDir="{installed}" ExeFilePath="" IsDefault="False" />
+    </Application>
+    <Application Name="Custom">
+      <Version VersionNumber="1.0" InstallDir="{root}" ExeFilePath="" IsDefault="True" />
+    </Application>
+  </Applications>
+</DNVS>
+"""
+
+
+@pytest.fixture()
+def registry(tmp_path):
+    exe = os.path.join(tmp_path, 'app.exe')
+    open(exe, 'w').close()
+    # simo installation registered without executable, which is derived from the layout rule
+    installed = os.path.join(tmp_path, 'installed')
+    os.makedirs(os.path.join(installed, 'simo', 'bin'))
+    open(os.path.join(installed, 'simo', 'bin', 'rsimo.exe'), 'w').close()
+    path = os.path.join(tmp_path, 'ApplicationVersions.xml')
+    with open(path, 'w') as f:
+        f.write(TEMPLATE.format(root=tmp_path, exe=exe, installed=installed, missing=os.path.join(tmp_path, 'missing')))
+    return path
+
+
+def test_check_installations(registry, tmp_path):
+    missing = os.path.join(tmp_path, 'missing')
+    findings = check_installations(appverxml=registry, max_workers=2)
+    assert [tuple(finding) for finding in findings] == [
+        ('wadam', '9.4.1', MISSING_EXEPATH, missing),
+        ('wadam', '9.5.3', DUPLICATE_DEFAULT, None),
+        ('wadam', '9.4.1', DUPLICATE_DEFAULT, None),
+        ('mimosa', '6.3.10', MISSING_INSTALLDIR, missing),
+        ('mimosa', None, MISSING_DEFAULT, None),
+        ('simo', '4.20.4', MISSING_EXECUTABLE, os.path.join(tmp_path, 'simo', 'bin', 'rsimo.exe')),
+        ('custom', '1.0', NO_EXEPATH, None),
+    ]
+    assert check_installations(appverxml=registry, appnames=['Simo'])[0].problem == MISSING_EXECUTABLE
+
+
+def test_check_applications(registry, capsys, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['avm-check', f'--xml-file={registry}', '--format', 'json', '--app', 'wadam'])
+    assert check_applications() == 1
+    findings = json.loads(capsys.readouterr().out)
+    assert [finding['problem'] for finding in findings] == [MISSING_EXEPATH, DUPLICATE_DEFAULT, DUPLICATE_DEFAULT]
+
+    monkeypatch.setattr(sys, 'argv', ['avm-check', f'--xml-file={registry}', '--app', 'simo'])
+    assert check_applications() == 1
+    assert '1 problems found.' in capsys.readouterr().out
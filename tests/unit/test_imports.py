@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import pytest
+import avm
+
+# modules which are only needed once an xml file is parsed or a command is run
+LAZY_MODULES = ('xml.dom.minidom', 'xml.parsers.expat', 'avm.parsers', 'argparse', 'tempfile', 'concurrent.futures',
+                'sqlite3')
+
+
+def _imported(code):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(avm.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.getenv('PYTHONPATH')))))
+    result = subprocess.run([sys.executable, '-c', f'{code}; import sys; print(" ".join(sys.modules))'], env=env,
+                            stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_import_is_lazy():
+    modules = _imported('import avm; avm.exe_path; avm.Registry')
+    assert not modules.intersection(LAZY_MODULES)
+
+
+def test_parse_imports_parser(xml_file_path):
+    modules = _imported(f'import avm; avm.registered_applications(appverxml={xml_file_path!r})')
+    assert 'avm.parsers' in modules
+
+
+def test_lazy_attributes():
+    assert set(avm.__all__) <= set(dir(avm))
+    assert avm.exe_path is avm.avm.exe_path
+    with pytest.raises(AttributeError):
+        _ = avm.not_here
+
+
+def test_submodule_attributes():
+    modules = _imported('import avm; avm.avm.exe_path; avm.entry_points.list_applications')
+    assert {'avm.avm', 'avm.entry_points'} <= modules
@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+import sys
+import pytest
+
+from avm.entry_points import inventory_applications
+from avm.inventory import scan, host_name
+
+
+@pytest.fixture()
+def collected(tmp_path, xml_file_path, faulty_xml_file_path):
+    directory = os.path.join(tmp_path, 'collected')
+    os.makedirs(os.path.join(directory, 'node2'))
+    shutil.copy(xml_file_path, os.path.join(directory, 'node1.xml'))
+    with open(xml_file_path) as src, open(os.path.join(directory, 'node2', 'ApplicationVersions.xml'), 'w') as dst:
+        dst.write(src.read().replace('Name="Riflex"', 'Name="RiflexOld"').replace('IsDefault="True"', 'IsDefault="False"'))
+    shutil.copy(faulty_xml_file_path, os.path.join(directory, 'node3.xml'))
+    open(os.path.join(directory, 'notes.txt'), 'w').close()
+    return directory
+
+
+def test_host_name():
+    assert host_name(os.path.join('root', 'node1.xml'), 'root') == 'node1'
+    assert host_name(os.path.join('root', 'lab', 'node2', 'ApplicationVersions.xml'), 'root') == 'lab/node2'
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_scan(collected, max_workers):
+    inventory = scan(collected, max_workers=max_workers, chunksize=1)
+    assert inventory.hosts == {'node1', 'node2'}
+    assert [(failure.host, failure.error.split(':')[0]) for failure in inventory.failures] == [('node3', 'ExpatError')]
+
+    assert inventory.hosts_with('Wadam', '9.5.3') == ['node1', 'node2']
+    assert inventory.hosts_with('wadam', '9.5.3', default=True) == ['node1']
+    assert inventory.hosts_with('wadam', '>=9.4,<9.5') == ['node1', 'node2']
+    assert inventory.hosts_without('riflex', '==4.20.*') == ['node2']
+    assert inventory.hosts_without('wadam') == []
+    assert ('riflex', '4.20.4', 1, 1) in inventory.summary()
+
+
+def test_inventory_applications(collected, capsys, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['avm-inventory', collected, '--max-workers', '1', '--format', 'json',
+                                      '--default', 'wadam@9.5.3', '--lacks', 'riflex@4.20.4'])
+    inventory_applications()
+    result = json.loads(capsys.readouterr().out)
+    assert result['hosts'] == 2 and len(result['failures']) == 1
+    assert result['queries'] == [dict(query='default wadam@9.5.3', hosts=['node1']),
+                                 dict(query='lacks riflex@4.20.4', hosts=['node2'])]
+
+    monkeypatch.setattr(sys, 'argv', ['avm-inventory', collected, '--max-workers', '1'])
+    inventory_applications()
+    out = capsys.readouterr().out
+    assert '2 hosts scanned, 1 files failed.' in out
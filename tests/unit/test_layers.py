@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from avm import avm as avm_module
+from avm import (registered_applications, default_version, latest_version, all_versions, exe_path, resolve_many,
+                 invalidate, Registry)
+from avm.layers import merge, merge_applications
+from avm.records import VersionRecord, Application
+
+USER_XML = """<?xml version="1.0" encoding="utf-8"?>
+<DNVS>
+  <Applications>
+    <Application Name="Wadam">
+      <Version VersionNumber="9.5.1" InstallDir="{root}" ExeFilePath="{exe}" Platform="64" ProductType="V"
+               Category="Sesam" IsDefault="True" />
+      <Version VersionNumber="10.0.0" InstallDir="{root}" ExeFilePath="{root}" Platform="64" ProductType="V"
+               Category="Sesam" IsDefault="False" />
+    </Application>
+    <Application Name="Override">
+      <Version VersionNumber="1.0.0" InstallDir="{root}" ExeFilePath="{exe}" Platform="64" ProductType="V"
+               Category="Custom" IsDefault="True" />
+    </Application>
+  </Applications>
+</DNVS>"""
+
+
+@pytest.fixture()
+def user_xml(tmp_path):
+    exe = os.path.join(tmp_path, 'wadam.exe')
+    open(exe, 'w').close()
+    path = os.path.join(tmp_path, 'User.xml')
+    with open(path, 'w') as f:
+        f.write(USER_XML.format(root=tmp_path, exe=exe))
+
+    return path
+
+
+def _record(versionnumber, default, exepath=''):
+    return VersionRecord(versionnumber, exepath, default, '', '64', 'V', 'Sesam')
+
+
+def test_merge_applications():
+    high = Application('app', [_record('2.0', False, 'high'), _record('1.0', False, 'high')])
+    low = Application('app', [_record('1.0', True, 'low'), _record('0.9', False, 'low')])
+    merged = merge_applications('app', [high, None, low])
+    assert list(merged) == ['2.0', '1.0', '0.9']
+    assert merged['1.0'].exepath == 'high' and merged.default is merged['1.0']
+
+    other = Application('app', [_record('0.9', True, 'other')])
+    merged = merge_applications('app', [other, low])
+    assert merged.default.exepath == 'other' and sum(record.default for record in merged.records) == 1
+
+    assert merge_applications('app', [None, low]) is low
+    assert merge_applications('app', [None, None]) is None
+
+
+def test_layered_queries(xml_file_path, user_xml):
+    layers = [user_xml, xml_file_path]
+    assert default_version('wadam', appverxml=layers) == '9.5.1'
+    assert latest_version('wadam', appverxml=layers) == '10.0.0'
+    assert latest_version('wadam', below='9.5', appverxml=layers) == '9.4.9'
+    assert exe_path('wadam', appverxml=layers) == f'"{os.path.join(os.path.dirname(user_xml), "wadam.exe")}"'
+    assert exe_path('wadam', version='9.2.4', appverxml=layers) == exe_path('wadam', '9.2.4', appverxml=xml_file_path)
+
+    wadam = all_versions('wadam', appverxml=layers)
+    assert sum(record.default for record in wadam.records) == 1
+    assert set(wadam) == set(all_versions('wadam', appverxml=xml_file_path)) | {'10.0.0'}
+
+    # reversing the layers reverses the precedence
+    assert default_version('wadam', appverxml=layers[::-1]) == '9.5.3'
+    assert resolve_many(['wadam'], appverxml=layers[::-1])[0].versionnumber == '9.5.3'
+
+
+def test_layered_registry(xml_file_path, user_xml):
+    data = registered_applications(appverxml=[user_xml, xml_file_path])
+    shared = registered_applications(appverxml=xml_file_path)
+    assert list(data)[:2] == ['wadam', 'override']
+    assert set(data) == set(shared) | {'override'}
+    assert data['hydrod'] is shared['hydrod']
+    assert data == merge([registered_applications(appverxml=user_xml), shared])
+    assert Registry([user_xml, xml_file_path]) == data
+
+    with pytest.raises(FileNotFoundError):
+        _ = registered_applications(appverxml=[user_xml, 'not_here'])
+
+    with pytest.raises(ValueError):
+        _ = registered_applications(appverxml=[])
+
+
+def test_layers_cached_separately(xml_file_path, user_xml, monkeypatch):
+    calls = []
+    parse = avm_module._parse_registry
+
+    def counting_parse(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr(avm_module, '_parse_registry', counting_parse)
+    layers = [user_xml, xml_file_path]
+    _ = registered_applications(appverxml=layers)
+    _ = registered_applications(appverxml=layers)
+    assert sorted(calls) == sorted(os.path.abspath(path) for path in layers)
+
+    # changing the user file only re-parses the user file
+    calls.clear()
+    with open(user_xml, 'a') as f:
+        f.write('\n')
+    data = registered_applications(appverxml=layers)
+    assert calls == [os.path.abspath(user_xml)] and 'override' in data
+
+    # invalidating a layer drops the layered registry
+    calls.clear()
+    invalidate(xml_file_path)
+    _ = registered_applications(appverxml=layers)
+    assert calls == [os.path.abspath(xml_file_path)]
@@ -0,0 +1,91 @@
+import json
+import os
+import pytest
+
+from avm import layouts, all_versions, exe_path, iter_versions, Registry
+
+
+@pytest.fixture(autouse=True)
+def clear_rules(monkeypatch):
+    monkeypatch.delenv(layouts.LAYOUTS_ENV, raising=False)
+    yield
+    layouts._registered.clear()
+    layouts.reload()
+
+
+def test_builtin_rules(xml_input, xml_file_path):
+    _, subs = xml_input
+    simo = all_versions('simo', appverxml=xml_file_path)['4.20.4']
+    assert simo.executable == os.path.join(subs['SIMO_DIR'], 'simo', 'bin', 'rsimo.exe')
+    assert simo.executable != simo.exepath
+
+    wadam = all_versions('wadam', appverxml=xml_file_path)['9.5.3']
+    assert wadam.executable == wadam.exepath
+    assert 'executable' not in wadam
+
+
+def test_register(xml_input, xml_file_path):
+    _, subs = xml_input
+    assert exe_path('wadam', appverxml=xml_file_path) is not None
+
+    # registering drops the cached registry, so the rule applies to the next lookup
+    layouts.register('wad*', 'bin/{versionnumber}/wadam.exe')
+    wadam = all_versions('wadam', appverxml=xml_file_path)['9.5.3']
+    assert wadam.executable == os.path.join(subs['WADAM_DIR'], 'bin', '9.5.3', 'wadam.exe')
+    assert exe_path('wadam', appverxml=xml_file_path) is None
+
+    layouts.register('simo', None)
+    simo = all_versions('simo', appverxml=xml_file_path)['4.20.4']
+    assert simo.executable == simo.exepath
+
+    layouts.unregister('wad*')
+    assert exe_path('wadam', appverxml=xml_file_path) is not None
+
+
+def test_registry_refresh(xml_input, xml_file_path):
+    _, subs = xml_input
+    registry = Registry(xml_file_path)
+    sima = registry['sima']
+    assert not registry.refresh()
+
+    # a new rule is applied on the next refresh, although the xml file did not change
+    layouts.register('wadam', 'bin/wadam.exe')
+    changes = registry.refresh()
+    assert changes.modified_applications == ('wadam',)
+    assert ('wadam', '9.5.3') in changes.modified_versions
+    assert set(appname for appname, _ in changes.modified_versions) == {'wadam'}
+    assert registry['wadam']['9.5.3'].executable == os.path.join(subs['WADAM_DIR'], 'bin', 'wadam.exe')
+    assert registry['sima'] is sima
+    assert not registry.refresh()
+
+
+def test_anchored_template(xml_file_path):
+    layouts.register('wadam', '{exepath}.bat')
+    wadam = all_versions('wadam', appverxml=xml_file_path)['9.5.3']
+    assert wadam.executable == wadam.exepath + '.bat'
+
+
+def test_rules_file(tmp_path, monkeypatch, xml_file_path):
+    path = os.path.join(tmp_path, 'layouts.json')
+    with open(path, 'w') as f:
+        json.dump({'Riflex': None, 'sima': 'bin/sima.exe'}, f)
+    monkeypatch.setenv(layouts.LAYOUTS_ENV, path)
+    layouts.reload()
+
+    assert layouts.template('riflex') is None
+    assert layouts.template('sima') == 'bin/sima.exe'
+    records = dict(iter_versions(appverxml=xml_file_path, appnames=['sima', 'simo']))
+    assert records['sima'].executable.endswith(os.path.join('bin', 'sima.exe'))
+    assert records['simo'].executable.endswith('rsimo.exe')
+
+
+def test_invalid_rules(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        layouts.register('wadam', 'bin/{version}.exe')
+
+    path = os.path.join(tmp_path, 'layouts.json')
+    with open(path, 'w') as f:
+        f.write('[]')
+    monkeypatch.setenv(layouts.LAYOUTS_ENV, path)
+    layouts.reload()
+    assert layouts.rules() == layouts.LAYOUTS
@@ -0,0 +1,55 @@
+import pytest
+
+from avm import exe_path, metrics
+
+
+@pytest.fixture()
+def sink():
+    sink = metrics.enable()
+    yield sink
+    metrics.disable()
+
+
+def test_disabled():
+    assert metrics.get_sink() is None
+    with metrics.timer('parse'):
+        metrics.increment('registry_cache.hit')
+
+
+def test_histogram():
+    histogram = metrics.Histogram()
+    assert histogram.asdict()['mean'] == 0. and histogram.asdict()['min'] == 0.
+    for seconds in (5e-7, 5e-3, 20.):
+        histogram.add(seconds)
+
+    data = histogram.asdict()
+    assert data['count'] == 3 and data['min'] == 5e-7 and data['max'] == 20.
+    assert data['buckets']['1e-06'] == 1 and data['buckets']['0.01'] == 1 and data['buckets']['inf'] == 1
+
+
+def test_in_memory_sink(xml_file_path, sink):
+    for _ in range(3):
+        _ = exe_path('wadam', appverxml=xml_file_path)
+
+    snapshot = sink.snapshot()
+    assert snapshot['counters'] == {'registry_cache.miss': 1, 'registry_cache.hit': 2, 'path_cache.miss': 1,
+                                    'path_cache.hit': 2}
+    assert snapshot['timings']['parse']['count'] == 1
+    assert snapshot['timings']['locate']['count'] == 3
+    assert snapshot['timings']['lookup']['count'] == 3
+    assert snapshot['timings']['path_check']['count'] == 1
+
+    sink.reset()
+    assert sink.snapshot() == dict(counters=dict(), timings=dict())
+
+
+def test_callback_sink(xml_file_path):
+    measurements = []
+    metrics.enable(metrics.CallbackSink(lambda *args: measurements.append(args)))
+    try:
+        _ = exe_path('wadam', appverxml=xml_file_path)
+    finally:
+        metrics.disable()
+
+    assert ('counter', 'registry_cache.miss', 1) in measurements
+    assert {name for kind, name, _ in measurements if kind == 'timing'} == {'locate', 'parse', 'lookup', 'path_check'}
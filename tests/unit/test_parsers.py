@@ -0,0 +1,87 @@
+import pytest
+
+from xml.parsers.expat import ExpatError
+
+from avm import parsers
+
+
+def test_backends_agree(xml_file_path):
+    expat_data = parsers.parse(xml_file_path, backend='expat')
+    minidom_data = parsers.parse(xml_file_path, backend='minidom')
+    assert expat_data == minidom_data
+    assert list(expat_data) == list(minidom_data)
+    for appname in expat_data:
+        assert list(expat_data[appname]) == list(minidom_data[appname])
+
+
+def test_backends_agree_on_small_chunks(xml_file_path, monkeypatch):
+    monkeypatch.setattr(parsers, 'CHUNK_SIZE', 7)
+    assert parsers.parse_expat(xml_file_path) == parsers.parse_minidom(xml_file_path)
+
+
+def test_iter_applications(xml_file_path):
+    apps = list(parsers.iter_applications(xml_file_path))
+    assert [app.name for app in apps][:3] == ['force', 'hydrod', 'nodefault']
+    assert list(apps[0]) == ['9.5.3', '9.2.4']
+
+
+def test_iter_versions(xml_file_path, monkeypatch):
+    monkeypatch.setattr(parsers, 'CHUNK_SIZE', 7)
+    data = parsers.parse(xml_file_path)
+    versions = list(parsers.iter_versions(xml_file_path))
+    assert versions == [(appname, record) for appname, app in data.items() for record in app.records]
+
+    selected = list(parsers.iter_versions(xml_file_path, appnames={'wadam', 'sima'},
+                                          select=lambda appname, record: record.platform == '64'))
+    assert set(appname for appname, _ in selected) == {'wadam', 'sima'}
+    assert all(record.platform == '64' for _, record in selected)
+
+
+def test_faulty(faulty_xml_file_path, parser_backend):
+    with pytest.raises(ExpatError):
+        _ = parsers.parse(faulty_xml_file_path, backend=parser_backend)
+
+
+def test_backend_selection(parser_backend):
+    assert parsers.get_backend() == parser_backend
+
+    with pytest.raises(ValueError):
+        parsers.set_backend('lxml')
+
+    with pytest.raises(ValueError):
+        _ = parsers.parse('not_here', backend='lxml')
+
+
+def test_find_application(xml_file_path, parser_backend):
+    wadam = parsers.find_application(xml_file_path, 'wadam', backend=parser_backend)
+    assert wadam == parsers.parse(xml_file_path, backend=parser_backend)['wadam']
+    assert parsers.find_application(xml_file_path, 'dadam', backend=parser_backend) is None
+
+
+def test_find_application_duplicated(xml_file_path, tmp_path, parser_backend):
+    # an application listed more than once is found as its first entry, as in the parsed registry
+    with open(xml_file_path, 'r') as f:
+        content = f.read()
+    duplicate = ('<Application Name="HydroD"><Version VersionNumber="4.11.0" InstallDir="" ExeFilePath="" '
+                 'IsDefault="True" /></Application>')
+    path = tmp_path.joinpath('duplicated.xml')
+    path.write_text(content.replace('</Applications>', duplicate + '</Applications>'))
+
+    hydrod = parsers.find_application(str(path), 'hydrod', backend=parser_backend)
+    assert list(hydrod) == ['4.10.1']
+    assert hydrod == parsers.parse(str(path), backend=parser_backend)['hydrod']
+
+
+def test_find_application_stops_early(xml_file_path, tmp_path, monkeypatch):
+    # the streaming lookup never reaches the malformed end of the file
+    monkeypatch.setattr(parsers, 'CHUNK_SIZE', 256)
+    truncated = tmp_path.joinpath('truncated.xml')
+    with open(xml_file_path, 'r') as f:
+        content = f.read()
+    truncated.write_text(content[:content.index('<Application Name="Mimosa">')] + '<Applicatn></Application>')
+
+    hydrod = parsers.find_application_expat(str(truncated), 'hydrod')
+    assert list(hydrod) == ['4.10.1']
+
+    with pytest.raises(ExpatError):
+        _ = parsers.find_application_expat(str(truncated), 'wadam')
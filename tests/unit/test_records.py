@@ -0,0 +1,86 @@
+import pickle
+import sys
+from collections import OrderedDict
+
+import pytest
+
+from avm import registered_applications, all_versions, VersionRecord, Application
+
+
+def test_version_record():
+    record = VersionRecord('9.5.3', 'C:\\Wadam\\Wadam.exe', True, 'C:\\Wadam', '64', 'V', 'Sesam')
+    assert record.exepath == record['exepath'] == record.get('exepath') == 'C:\\Wadam\\Wadam.exe'
+    assert record.get('helpfile') is None
+    assert list(record.keys()) == ['versionnumber', 'exepath', 'default', 'installdir', 'platform', 'producttype',
+                                   'category']
+    assert record == OrderedDict(record.items())
+    assert record.category is sys.intern('Sesam')
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert hash(pickle.loads(pickle.dumps(record))) == hash(record)
+    assert 'VersionRecord(versionnumber=' in repr(record)
+
+    with pytest.raises(KeyError):
+        _ = record['helpfile']
+
+    with pytest.raises(AttributeError):
+        record.default = False
+
+    with pytest.raises(AttributeError):
+        del record.default
+
+    with pytest.raises(AttributeError):
+        _ = record.__dict__
+
+
+def test_application():
+    records = [VersionRecord(v, '', v == '1.1.0', '', '64', 'V', 'Sesam') for v in ('1.0.0', '1.1.0', '1.0.0')]
+    app = Application('wadam', records)
+    assert list(app) == ['1.0.0', '1.1.0'] and len(app) == 2
+    assert app['1.0.0'] is records[2]
+    assert app.records == (records[2], records[1])
+    assert pickle.loads(pickle.dumps(app)) == app
+    assert hash(pickle.loads(pickle.dumps(app))) == hash(app)
+    assert repr(app) == "Application('wadam', versions=['1.0.0', '1.1.0'])"
+
+    with pytest.raises(AttributeError):
+        app.name = 'dadam'
+
+    with pytest.raises(AttributeError):
+        del app.name
+
+
+def test_read_only_registry(xml_file_path):
+    reg_apps = registered_applications(appverxml=xml_file_path)
+    with pytest.raises(TypeError):
+        reg_apps['wadam'] = None
+
+    wadam = all_versions('wadam', appverxml=xml_file_path)
+    assert isinstance(wadam, Application)
+    assert wadam is reg_apps['wadam']
+    with pytest.raises(TypeError):
+        wadam['9.5.3'] = None
+
+
+def test_version_key():
+    from avm.records import version_key
+    assert version_key('9.5.3') == (9, 5, 3)
+    assert version_key('9.5') == version_key('9.5.0') == (9, 5)
+    assert version_key('10') > version_key('9.5.3')
+    assert version_key('4.20.4') > version_key('4.4.0')
+
+    with pytest.raises(ValueError):
+        _ = version_key('6.2-08')
+
+
+def test_version_index():
+    records = [VersionRecord(v, '', v == '9.5.3', '', '64', 'V', 'Sesam')
+               for v in ('9.5.3', '10.0.1', '9.4.9', '6.2-08', '9.10.0')]
+    app = Application('wadam', records)
+    assert [record.versionnumber for record in app.sorted] == ['9.4.9', '9.5.3', '9.10.0', '10.0.1']
+    assert app.unindexed == ('6.2-08',)
+    assert app.default.versionnumber == '9.5.3'
+    assert app.latest().versionnumber == '10.0.1'
+    assert app.latest(below=(10,)).versionnumber == '9.10.0'
+    assert app.latest(below=(9, 5, 3)).versionnumber == '9.4.9'
+    assert app.latest(below=(9, 4)) is None
+    assert Application('wadam').default is None
@@ -0,0 +1,63 @@
+import pytest
+
+from avm import Registry, RegistryDiff, registered_applications
+
+
+def replace_in_file(path, old, new):
+    with open(path, 'r') as f:
+        content = f.read()
+    assert old in content
+    with open(path, 'w') as f:
+        f.write(content.replace(old, new))
+
+
+def test_registry(xml_file_copy):
+    registry = Registry(xml_file_copy)
+    assert len(registry) == 13
+    assert registry == registered_applications(appverxml=xml_file_copy)
+    assert 'Wadam' in registry and 'dadam' not in registry and None not in registry
+    assert registry['Wadam'].default.versionnumber == '9.5.3'
+    assert list(registry)[0] == 'force'
+    assert registry.applications['wadam'] is registry['wadam']
+    assert registry.path == xml_file_copy
+    assert repr(registry) == f"Registry({xml_file_copy!r}, applications=13)"
+
+    with pytest.raises(FileNotFoundError):
+        _ = Registry('not_here')
+
+
+def test_refresh(xml_file_copy):
+    registry = Registry(xml_file_copy)
+    signature = registry.signature
+    wadam, simo, force = registry['wadam'], registry['simo'], registry['force']
+
+    # unchanged
+    changes = registry.refresh()
+    assert changes == RegistryDiff() and not changes
+    assert registry.signature == signature
+
+    # change the default version of wadam, remove hydrod and add a version of simo
+    replace_in_file(xml_file_copy, 'VersionNumber="9.5.1" InstallDir="C:\\Program Files\\DNVGL\\Wadam V9.5-01\\" '
+                    'ExeFilePath="C:\\Program Files\\DNVGL\\Wadam V9.5-01\\Bin\\Wadam.exe" UserManualPath="" '
+                    'Platform="32" ProductType="V" Category="Sesam" HelpFile="" IsDefault="False"',
+                    'VersionNumber="9.5.1" InstallDir="C:\\Program Files\\DNVGL\\Wadam V9.5-01\\" '
+                    'ExeFilePath="C:\\Program Files\\DNVGL\\Wadam V9.5-01\\Bin\\Wadam.exe" UserManualPath="" '
+                    'Platform="32" ProductType="V" Category="Sesam" HelpFile="" IsDefault="True"')
+    replace_in_file(xml_file_copy, '<Application Name="HydroD">', '<Application Name="HydroDX">')
+    replace_in_file(xml_file_copy, 'VersionNumber="4.14.0"', 'VersionNumber="4.15.0"')
+
+    changes = registry.refresh()
+    assert changes
+    assert changes.added_applications == ('hydrodx',)
+    assert changes.removed_applications == ('hydrod',)
+    assert changes.modified_applications == ('simo', 'wadam')
+    assert changes.added_versions == (('hydrodx', '4.10.1'), ('simo', '4.15.0'))
+    assert changes.removed_versions == (('simo', '4.14.0'), ('hydrod', '4.10.1'))
+    assert changes.modified_versions == (('wadam', '9.5.1'),)
+    assert registry.signature != signature
+
+    # unchanged applications are kept
+    assert registry['force'] is force
+    assert registry['wadam'] is not wadam and registry['simo'] is not simo
+    assert not registry.refresh(force=True)
+    assert registry['force'] is force
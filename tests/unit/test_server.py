@@ -0,0 +1,220 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from avm import avm as avm_module
+from avm import (client, exe_path, installation_path, default_version, all_versions, latest_version,
+                 registered_applications, resolve_many, select_version, invalidate)
+from avm.specifiers import UnsatisfiableSpecifier
+from avm.server import Server
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix domain sockets are not supported')
+
+
+@pytest.fixture()
+def server(tmp_path):
+    server = Server(os.path.join(tmp_path, 'avm.sock'), refresh_interval=0.05)
+    thread = threading.Thread(target=server.serve_forever, kwargs=dict(poll_interval=0.01), daemon=True)
+    thread.start()
+    for _ in range(200):
+        if os.path.exists(server.path):
+            break
+        time.sleep(0.01)
+
+    client.enable(server.path)
+    yield server
+    client.disable()
+    server.shutdown()
+    thread.join()
+
+
+@pytest.fixture()
+def in_process_calls(monkeypatch):
+    calls = []
+    application = avm_module._application
+    load = avm_module._load_registry
+
+    def counting_application(appname, appverxml=None):
+        calls.append(appname)
+        return application(appname, appverxml=appverxml)
+
+    def counting_load(appverxml, signature):
+        calls.append(appverxml)
+        return load(appverxml, signature)
+
+    monkeypatch.setattr(avm_module, '_application', counting_application)
+    monkeypatch.setattr(avm_module, '_load_registry', counting_load)
+    return calls
+
+
+def test_queries(server, xml_file_path, in_process_calls):
+    served = dict(
+        exe=exe_path('wadam', appverxml=xml_file_path),
+        exe_924=exe_path('wadam', version='9.2.4', appverxml=xml_file_path),
+        install=installation_path('wadam', appverxml=xml_file_path),
+        default=default_version('mimosa', appverxml=xml_file_path),
+        versions=all_versions('sima', appverxml=xml_file_path),
+        latest=latest_version('wadam', below='9.5', appverxml=xml_file_path),
+        selected=select_version('wadam', '>=9.4,<9.5', appverxml=xml_file_path),
+        resolutions=resolve_many(['wadam', ('simo', '4.20.4'), 'dadam'], appverxml=xml_file_path),
+        apps=registered_applications(appverxml=xml_file_path),
+    )
+    assert in_process_calls == []
+    assert all_versions('dadam', appverxml=xml_file_path) is None
+    with pytest.raises(ValueError):
+        _ = latest_version('wadam', below='1.0', appverxml=xml_file_path)
+    with pytest.raises(FileNotFoundError):
+        _ = exe_path('wadam', appverxml='not_here')
+    with pytest.raises(UnsatisfiableSpecifier):
+        _ = select_version('wadam', '>=11', appverxml=xml_file_path)
+
+    # the daemon gives the same answers as in-process parsing
+    client.disable()
+    assert served == dict(
+        exe=exe_path('wadam', appverxml=xml_file_path),
+        exe_924=exe_path('wadam', version='9.2.4', appverxml=xml_file_path),
+        install=installation_path('wadam', appverxml=xml_file_path),
+        default=default_version('mimosa', appverxml=xml_file_path),
+        versions=all_versions('sima', appverxml=xml_file_path),
+        latest=latest_version('wadam', below='9.5', appverxml=xml_file_path),
+        selected=select_version('wadam', '>=9.4,<9.5', appverxml=xml_file_path),
+        resolutions=resolve_many(['wadam', ('simo', '4.20.4'), 'dadam'], appverxml=xml_file_path),
+        apps=registered_applications(appverxml=xml_file_path),
+    )
+
+
+def test_mixed_case(server, xml_file_path, in_process_calls):
+    served = (exe_path('Wadam', appverxml=xml_file_path), installation_path('WADAM', appverxml=xml_file_path),
+              default_version('Mimosa', appverxml=xml_file_path))
+    assert in_process_calls == []
+    assert None not in served
+
+    client.disable()
+    assert served == (exe_path('Wadam', appverxml=xml_file_path), installation_path('WADAM', appverxml=xml_file_path),
+                      default_version('Mimosa', appverxml=xml_file_path))
+
+
+def test_caller_appdata(server, xml_file_path, tmp_path, monkeypatch, in_process_calls):
+    # the xml file in the APPDATA of the caller is sent to the daemon, which has another environment
+    folder = os.path.join(tmp_path, 'appdata', 'DNVGL', 'ApplicationVersionManager')
+    os.makedirs(folder)
+    path = os.path.join(folder, 'ApplicationVersions.xml')
+    with open(xml_file_path) as src, open(path, 'w') as dst:
+        dst.write(src.read())
+    monkeypatch.setenv('appdata', os.path.join(tmp_path, 'appdata'))
+
+    assert default_version('wadam') == '9.5.3'
+    assert in_process_calls == []
+    assert list(server._registries) == [path]
+
+
+@pytest.fixture()
+def daemon_requests(monkeypatch):
+    ops = []
+    request = client.request
+
+    def counting_request(op, **kwargs):
+        ops.append(op)
+        return request(op, **kwargs)
+
+    monkeypatch.setattr(client, 'request', counting_request)
+    return ops
+
+
+def test_warm_cache(server, xml_file_path, daemon_requests):
+    # registries and applications received from the daemon are cached in-process
+    data = registered_applications(appverxml=xml_file_path)
+    assert registered_applications(appverxml=xml_file_path) is data
+    assert exe_path('Wadam', appverxml=xml_file_path) is not None
+    assert daemon_requests == ['registered_applications']
+
+    invalidate()
+    app = all_versions('sima', appverxml=xml_file_path)
+    assert all_versions('Sima', appverxml=xml_file_path) is app
+    assert default_version('sima', appverxml=xml_file_path) == '4.4.0'
+    assert daemon_requests == ['registered_applications', 'all_versions']
+
+    # a warm in-process cache is used without asking the daemon
+    invalidate()
+    client.disable()
+    _ = registered_applications(appverxml=xml_file_path)
+    client.enable(server.path)
+    _ = resolve_many(['wadam', 'simo'], appverxml=xml_file_path)
+    assert daemon_requests == ['registered_applications', 'all_versions']
+
+
+def test_connection_reused(server, xml_file_path):
+    _ = default_version('wadam', appverxml=xml_file_path)
+    connection = client._local.connection
+    _ = default_version('wadam', appverxml=xml_file_path)
+    assert client._local.connection is connection
+    assert client.request('ping')['registries'] == 1
+
+
+def test_refresh(server, xml_file_copy):
+    assert default_version('wadam', appverxml=xml_file_copy) == '9.5.3'
+    with open(xml_file_copy) as f:
+        text = f.read()
+    with open(xml_file_copy, 'w') as f:
+        f.write(text.replace('Name="Wadam"', 'Name="Wadam2"'))
+
+    for _ in range(200):
+        if default_version('wadam2', appverxml=xml_file_copy) is not None:
+            break
+        time.sleep(0.01)
+    assert default_version('wadam2', appverxml=xml_file_copy) == '9.5.3'
+
+
+def test_fallback(tmp_path, xml_file_path, in_process_calls):
+    client.enable(os.path.join(tmp_path, 'missing.sock'))
+    assert default_version('wadam', appverxml=xml_file_path) == '9.5.3'
+    assert in_process_calls == ['wadam']
+
+    # an unreachable daemon is not tried again right away
+    assert client.request('ping') is client.UNAVAILABLE
+
+
+@pytest.mark.skipif(not hasattr(os, 'chown') or os.geteuid() != 0, reason='Changing owners requires root')
+def test_foreign_socket(server, xml_file_path, in_process_calls):
+    # a socket of another user is never connected to
+    os.chown(server.path, 12345, -1)
+    assert default_version('wadam', appverxml=xml_file_path) == '9.5.3'
+    assert in_process_calls == ['wadam']
+    assert client._local.connection is None
+
+
+def test_writable_socket_directory(server, xml_file_path, in_process_calls):
+    # a socket in a directory where other users may replace it is never connected to
+    folder = os.path.dirname(server.path)
+    mode = os.stat(folder).st_mode
+    os.chmod(folder, 0o777)
+    try:
+        assert default_version('wadam', appverxml=xml_file_path) == '9.5.3'
+    finally:
+        os.chmod(folder, mode)
+    assert in_process_calls == ['wadam']
+
+    # unless the directory is sticky, like /tmp
+    client.enable(server.path)
+    invalidate()
+    os.chmod(folder, 0o1777)
+    try:
+        assert default_version('wadam', appverxml=xml_file_path) == '9.5.3'
+    finally:
+        os.chmod(folder, mode)
+    assert in_process_calls == ['wadam']
+
+
+def test_fallback_on_stopped_daemon(server, xml_file_path, in_process_calls):
+    assert default_version('wadam', appverxml=xml_file_path) == '9.5.3'
+    server.shutdown()
+    for _ in range(200):
+        if not os.path.exists(server.path):
+            break
+        time.sleep(0.01)
+
+    assert default_version('wadam', appverxml=xml_file_path) == '9.5.3'
+    assert in_process_calls == ['wadam']
@@ -0,0 +1,72 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from avm import shared, registered_applications, exe_path, installation_path, latest_version, resolve_many
+from avm.cache import file_signature
+
+
+@pytest.fixture()
+def published(xml_file_path, tmp_path):
+    with shared.publish(appverxml=xml_file_path, path=os.path.join(tmp_path, 'registry.bin')) as registry:
+        yield registry
+
+
+def test_round_trip(published, xml_file_path):
+    data = registered_applications(appverxml=xml_file_path)
+    assert list(published) == list(data)
+    assert len(published) == len(data)
+    assert all(published[appname] == app for appname, app in data.items())
+    assert 'WADAM' in published and 'dadam' not in published
+    with pytest.raises(KeyError):
+        _ = published['dadam']
+
+
+def test_lookups(published, xml_file_path):
+    assert published.source == (os.path.abspath(xml_file_path), file_signature(xml_file_path))
+    assert published.exe_path('wadam') == exe_path('wadam', appverxml=xml_file_path)
+    assert published.exe_path('wadam', version='9.2.4') == exe_path('wadam', version='9.2.4', appverxml=xml_file_path)
+    assert published.installation_path('wadam') == installation_path('wadam', appverxml=xml_file_path)
+    assert published.latest_version('wadam', below='9.5') == latest_version('wadam', below='9.5',
+                                                                            appverxml=xml_file_path)
+    assert published.default_version('nodefault') is None and published.default_version('mimosa') == '6.3.10'
+    assert published.default_version('dadam') is None and published.all_versions('dadam') is None
+    assert published.resolve_many(['wadam', 'dadam']) == resolve_many(['wadam', 'dadam'], appverxml=xml_file_path)
+
+
+def test_layered_source(xml_file_path, xml_file_copy, tmp_path):
+    # the source, which keys the cache of path checks, changes when any of the layers changes
+    layered = [xml_file_path, xml_file_copy]
+    with shared.publish(appverxml=layered, path=os.path.join(tmp_path, 'registry.bin')) as registry:
+        source = registry.source
+    assert source[0] == os.pathsep.join(map(os.path.abspath, layered))
+
+    stat = os.stat(xml_file_copy)
+    os.utime(xml_file_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    with shared.publish(appverxml=layered, path=os.path.join(tmp_path, 'registry.bin')) as registry:
+        assert registry.source[0] == source[0] and registry.source[1] != source[1]
+
+
+def test_attach_in_workers(published):
+    attached = pickle.loads(pickle.dumps(published))
+    assert attached.path == published.path and attached is pickle.loads(pickle.dumps(published))
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(published.default_version, ['wadam', 'sima', 'dadam'])) == ['9.5.3', '4.4.0', None]
+
+
+def test_close(xml_file_path, tmp_path):
+    registry = shared.publish(appverxml=xml_file_path)
+    attached = shared.attach(registry.path)
+    attached.close()
+    assert os.path.exists(registry.path)
+    registry.close()
+    registry.close()
+    assert not os.path.exists(registry.path)
+
+    path = os.path.join(tmp_path, 'not_a_registry.bin')
+    with open(path, 'wb') as f:
+        f.write(b'\0' * 64)
+    with pytest.raises(ValueError):
+        _ = shared.attach(path)
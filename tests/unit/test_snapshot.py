@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from avm import registered_applications, exe_path, invalidate, snapshot
+from avm import avm as avm_module
+from avm.cache import file_signature
+
+
+@pytest.fixture()
+def parse_counter(monkeypatch):
+    calls = []
+    parse = avm_module._parse_registry
+
+    def counting_parse(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr(avm_module, '_parse_registry', counting_parse)
+    return calls
+
+
+def test_directory(tmp_path, monkeypatch):
+    assert snapshot.directory() is None
+
+    monkeypatch.setenv(snapshot.SNAPSHOT_DIR_ENV, str(tmp_path))
+    assert snapshot.directory() == str(tmp_path)
+    monkeypatch.delenv(snapshot.SNAPSHOT_DIR_ENV)
+
+    monkeypatch.setenv('localappdata', str(tmp_path))
+    snapshot.enable()
+    assert snapshot.directory() == os.path.join(tmp_path, 'avm', 'Cache')
+
+    monkeypatch.delenv('localappdata')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert snapshot.default_directory() == os.path.join(tmp_path, 'avm')
+
+    snapshot.disable()
+    assert snapshot.directory() is None
+
+
+def test_roundtrip(xml_file_path, tmp_path):
+    snapshot.enable(str(tmp_path))
+    path = os.path.abspath(xml_file_path)
+    signature = file_signature(path)
+    data = registered_applications(appverxml=xml_file_path)
+    assert os.path.exists(snapshot.snapshot_path(path))
+
+    loaded = snapshot.load(path, signature)
+    assert loaded == data
+    assert list(loaded['wadam']) == list(data['wadam'])
+    assert loaded['wadam'].default == data['wadam'].default
+
+    # stale
+    assert snapshot.load(path, (0, 0, 0)) is None
+
+    # corrupt
+    for content in (b'', b'not marshal', b'\xe9\x02\x00\x00\x00\x01\x00\x00\x00'):
+        with open(snapshot.snapshot_path(path), 'wb') as f:
+            f.write(content)
+        assert snapshot.load(path, signature) is None
+
+    snapshot.disable()
+    assert snapshot.load(path, signature) is None
+    snapshot.write(path, signature, data)
+
+
+def test_corrupt_records(xml_file_path, tmp_path, monkeypatch):
+    snapshot.enable(str(tmp_path))
+    path = os.path.abspath(xml_file_path)
+    signature = file_signature(path)
+    snapshot.write(path, signature, {'wadam': registered_applications(appverxml=xml_file_path)['wadam']})
+    assert list(snapshot.load(path, signature)) == ['wadam']
+
+    # records with missing values
+    monkeypatch.setattr(snapshot, 'FIELDS', snapshot.FIELDS[:3])
+    snapshot.write(path, signature, {'wadam': registered_applications(appverxml=xml_file_path)['wadam']})
+    assert snapshot.load(path, signature) is None
+
+
+def test_write_failure(xml_file_path, tmp_path):
+    blocker = tmp_path.joinpath('file')
+    blocker.write_text('')
+    snapshot.enable(str(blocker.joinpath('snapshots')))
+    _ = registered_applications(appverxml=xml_file_path)
+    assert os.listdir(tmp_path) == ['file']
+
+
+def test_cold_start_uses_snapshot(xml_file_copy, xml_input, tmp_path, parse_counter):
+    _, subs = xml_input
+    snapshot.enable(str(tmp_path.joinpath('snapshots')))
+
+    # first process parses the file and writes the snapshot
+    assert exe_path('wadam', appverxml=xml_file_copy) == f'"{subs["WADAM_EXE"]}"'
+    assert len(parse_counter) == 1
+
+    # new processes load the snapshot
+    invalidate()
+    assert exe_path('wadam', appverxml=xml_file_copy) == f'"{subs["WADAM_EXE"]}"'
+    assert len(registered_applications(appverxml=xml_file_copy)) == 13
+    assert len(parse_counter) == 1
+
+    # until the file changes
+    with open(xml_file_copy, 'a') as f:
+        f.write('\n')
+    invalidate()
+    _ = registered_applications(appverxml=xml_file_copy)
+    assert len(parse_counter) == 2
+    assert len(os.listdir(tmp_path.joinpath('snapshots'))) == 1
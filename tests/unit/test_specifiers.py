@@ -0,0 +1,89 @@
+import pytest
+
+from avm import select_version, exe_path, resolve_many, all_versions
+from avm.records import VersionRecord, Application
+from avm.specifiers import parse, is_specifier, InvalidSpecifier, UnsatisfiableSpecifier
+
+
+@pytest.fixture()
+def app():
+    versions = ['9.2.4', '9.4.1', '9.4.9', '9.5.1', '9.5.2', '9.5.3', '10.0', '6.2-08']
+    return Application('wadam', [VersionRecord(v, f'C:\\wadam{v}.exe', v == '9.4.9', 'C:\\', 'win64', '', '')
+                                 for v in versions])
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('>=9.4,<10', ['9.4.1', '9.4.9', '9.5.1', '9.5.2', '9.5.3']),
+    ('>9.4.1, <=9.5.1', ['9.4.9', '9.5.1']),
+    ('~=9.4', ['9.4.1', '9.4.9', '9.5.1', '9.5.2', '9.5.3']),
+    ('~=9.5.1', ['9.5.1', '9.5.2', '9.5.3']),
+    ('==9.4.*', ['9.4.1', '9.4.9']),
+    ('9.4.1', ['9.4.1']),
+    ('==10.0.0', ['10.0']),
+    ('>=9.4,!=9.5.*,!=9.4.1', ['9.4.9', '10.0']),
+    ('<9', []),
+])
+def test_filter(app, text, expected):
+    assert [record.versionnumber for record in parse(text).filter(app)] == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('>=9.4,<10', '9.5.3'),
+    ('!=10.0', '9.5.3'),
+    ('>=9.4,!=9.5.*', '10.0'),
+    ('default', '9.4.9'),
+    ('default,>=9.4', '9.4.9'),
+    ('default,>=9.5', '10.0'),
+    ('<9', None),
+])
+def test_select(app, text, expected):
+    record = parse(text).select(app)
+    assert (record and record.versionnumber) == expected
+
+
+def test_parsed_once():
+    assert parse('>=9.4,<10') is parse('>=9.4,<10')
+    assert parse('>=9.4, <10') == parse('<10,>=9.4')
+
+
+@pytest.mark.parametrize('text', ['>=9.4,', 'latest', '>=9.4.*', '~=9', '>>9', '9.4-1'])
+def test_invalid(text):
+    with pytest.raises(InvalidSpecifier):
+        _ = parse(text)
+
+
+@pytest.mark.parametrize('text', ['>=10,<9', '>9.4,<=9.4', '==9.4.1,!=9.4.1', '==9.4.*,>=9.5'])
+def test_contradictory(text):
+    with pytest.raises(UnsatisfiableSpecifier, match='contradict'):
+        _ = parse(text)
+
+
+def test_is_specifier():
+    assert is_specifier('>=9.4') and is_specifier('9.4,9.5') and is_specifier('Default')
+    assert not is_specifier('9.4.1') and not is_specifier('6.2-08')
+
+
+def test_select_version(xml_file_path):
+    assert select_version('wadam', '>=9.4,<9.5', appverxml=xml_file_path) == '9.4.9'
+    assert select_version('mimosa', 'default,>=6.3', appverxml=xml_file_path) == '6.3.10'
+    assert select_version('simo', '~=4.14', appverxml=xml_file_path) == '4.20.4'
+    with pytest.raises(UnsatisfiableSpecifier, match='9.2.4, 9.4.1'):
+        _ = select_version('wadam', '>=11', appverxml=xml_file_path)
+    with pytest.raises(UnsatisfiableSpecifier, match='not registered'):
+        _ = select_version('dadam', '>=11', appverxml=xml_file_path)
+
+
+def test_specifier_as_version(xml_file_path):
+    assert exe_path('wadam', version='<9.5', appverxml=xml_file_path) == \
+        exe_path('wadam', version='9.4.9', appverxml=xml_file_path)
+    assert exe_path('wadam', version='>=11', appverxml=xml_file_path) is None
+
+    resolutions = resolve_many([('wadam', '==9.2.*'), ('wadam', '>=11'), ('wadam', '>=9.4,')], appverxml=xml_file_path)
+    assert resolutions[0].versionnumber == '9.2.4'
+    assert not resolutions[1].ok and 'Registered versions' in resolutions[1].reason
+    assert not resolutions[2].ok and 'Invalid clause' in resolutions[2].reason
+
+
+def test_version_keys(xml_file_path):
+    app = all_versions('wadam', appverxml=xml_file_path)
+    assert app.version_keys == ((9, 2, 4), (9, 4, 1), (9, 4, 9), (9, 5, 1), (9, 5, 2), (9, 5, 3))
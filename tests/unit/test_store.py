@@ -0,0 +1,77 @@
+import os
+import pytest
+
+from avm import registered_applications, iter_versions
+from avm.store import Store, FORMAT_VERSION
+
+
+@pytest.fixture()
+def store(tmp_path):
+    with Store(os.path.join(tmp_path, 'avm.sqlite')) as store:
+        yield store
+
+
+def test_applications(store, xml_file_path):
+    assert store.ingest(xml_file_path) == 1
+    assert store.sources() == [os.path.abspath(xml_file_path)]
+    data = registered_applications(appverxml=xml_file_path)
+    assert store.applications(xml_file_path) == data
+    assert store.application('Simo', appverxml=xml_file_path).default.executable == data['simo'].default.executable
+    assert store.application('missing', appverxml=xml_file_path) is None
+    with pytest.raises(KeyError):
+        store.applications(os.path.join(os.path.dirname(xml_file_path), 'other.xml'))
+
+
+def test_query(store, xml_file_path):
+    store.ingest(xml_file_path)
+    assert store.query(category='sesam', platform='64') == list(iter_versions(xml_file_path, category='Sesam',
+                                                                              platform='64'))
+    assert [(appname, record.versionnumber) for appname, record in store.query(appnames=['Sima'], version='>=4.2')] \
+        == [('sima', '4.4.0'), ('sima', '4.2.0')]
+    assert [record.versionnumber for _, record in store.query(appnames=['sima'], version='!=4.2.*')] == ['4.4.0', '4.1.2']
+    assert [record.versionnumber for _, record in store.query(version='6.3.8')] == ['6.3.8']
+
+    under = store.query(default=True, installdir='C:\\Program Files\\DNV')
+    assert [appname for appname, _ in under] == ['sima']
+    assert all(record.default for _, record in under)
+
+
+def test_incremental_ingest(tmp_path, xml_file_copy):
+    path = os.path.join(tmp_path, 'avm.sqlite')
+    with Store(path) as store:
+        assert store.ingest([xml_file_copy]) == 1
+        assert store.ingest([xml_file_copy]) == 0
+
+        with open(xml_file_copy) as f:
+            text = f.read()
+        with open(xml_file_copy, 'w') as f:
+            f.write(text.replace('Name="Sima"', 'Name="Sima2"'))
+        assert store.ingest(xml_file_copy) == 1
+        assert 'sima2' in store.applications(xml_file_copy) and 'sima' not in store.applications(xml_file_copy)
+
+    # the database persists, and unchanged files are not parsed again
+    with Store(path) as store:
+        assert store.ingest(xml_file_copy) == 0
+        assert store.remove(xml_file_copy) and not store.remove(xml_file_copy)
+        assert store.query() == []
+
+
+def test_failed_ingest(store, xml_file_path, faulty_xml_file_path):
+    from xml.parsers.expat import ExpatError
+
+    with pytest.raises(ExpatError):
+        store.ingest([xml_file_path, faulty_xml_file_path])
+    assert store.sources() == [os.path.abspath(xml_file_path)]
+
+
+def test_rebuild(tmp_path, xml_file_path):
+    import sqlite3
+
+    path = os.path.join(tmp_path, 'avm.sqlite')
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE files (path TEXT)')
+        connection.execute(f'PRAGMA user_version = {FORMAT_VERSION + 1}')
+    connection.close()
+
+    with Store(path) as store:
+        assert store.ingest(xml_file_path) == 1
@@ -0,0 +1,48 @@
+import io
+import json
+import os
+import sys
+import pytest
+
+from avm.entry_points import which_applications, EXPORT_FORMATS
+
+
+def test_which_arguments(xml_input, xml_file_path, capsys, monkeypatch):
+    _, subs = xml_input
+    monkeypatch.setattr(sys, 'argv', ['avm-which', f'--xml-file={xml_file_path}', 'Wadam', 'simo@>=4.20'])
+    assert which_applications() == 0
+    assert capsys.readouterr().out.splitlines() == [
+        str(subs['WADAM_EXE']), os.path.join(subs['SIMO_DIR'], 'simo', 'bin', 'rsimo.exe')]
+
+
+def test_which_stdin(xml_input, xml_file_path, capsys, monkeypatch):
+    _, subs = xml_input
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('wadam@9.2.4\n\n# comment\nmissing\nwadam@>=10\n'))
+    monkeypatch.setattr(sys, 'argv', ['avm-which', f'--xml-file={xml_file_path}', '--format', 'json'])
+    assert which_applications() == 1
+    captured = capsys.readouterr()
+    result = json.loads(captured.out)
+    assert [(item['query'], item['ok']) for item in result] == [('wadam@9.2.4', True), ('missing', False),
+                                                               ('wadam@>=10', False)]
+    assert result[0]['exepath'] == str(subs['WADAM_924_EXE'])
+    assert 'avm-which: missing: ' in captured.err
+
+
+def test_which_export(xml_input, xml_file_path, tmp_path, capsys, monkeypatch):
+    _, subs = xml_input
+    queries = os.path.join(tmp_path, 'queries.txt')
+    with open(queries, 'w') as f:
+        f.write('wadam\nnodefault\n')
+    monkeypatch.setattr(sys, 'argv', ['avm-which', f'--xml-file={xml_file_path}', '--file', queries, '--export',
+                                      '--shell', 'cmd'])
+    assert which_applications() == 1
+    assert capsys.readouterr().out.splitlines() == [f'set "WADAM_EXE={subs["WADAM_EXE"]}"']
+
+
+@pytest.mark.parametrize('shell, expected', [
+    ('sh', "export SIMA_EXE='/opt/it'\"'\"'s/sima'"),
+    ('cmd', 'set "SIMA_EXE=/opt/it\'s/sima"'),
+    ('powershell', "$env:SIMA_EXE = '/opt/it''s/sima'"),
+])
+def test_export_formats(shell, expected):
+    assert EXPORT_FORMATS[shell]('SIMA_EXE', "/opt/it's/sima") == expected